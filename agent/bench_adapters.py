@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos adapters de site - Lisboa Real Estate AI
+Débito e rendimento de cada adapter (site_adapters) no seu corpus de páginas
+
+O corpus são as fixtures gravadas (fixtures.py, ../data/fixtures/<host>/)
+ou uma diretoria com uma subdiretoria de .html por host. Cada host corre
+com a extração que usa em produção (SUITES); os hosts sem adapter próprio
+correm com os parsers genéricos de leilões (generic_cards, de
+integrador_dados.scrape_generico e scraper_requests, e regex_leilao, de
+scraper_scraperapi).
+
+O Idealista é extraído no browser ($$eval de EXTRACT_ITEMS_JS) e em Python
+(IdealistaScraper._parse_item): os itens do $$eval são reconstruídos do
+HTML fora da medição (eval_items) e só o _parse_item é medido.
+
+Por adapter: páginas/s, imóveis/s, memória alocada por página (pico
+tracemalloc), imóveis por página e completude (fração com preço e com
+área). Com --baseline, termina com código 1 se o débito ou o rendimento
+caírem face a uma execução anterior.
+
+Uso:
+    python bench_adapters.py
+    python bench_adapters.py --pages paginas/ -n 10 --json adapters.json
+    python bench_adapters.py --baseline adapters.json
+"""
+
+import sys
+import gzip
+import json
+import time
+import argparse
+import tracemalloc
+from pathlib import Path
+from statistics import median
+from typing import Callable, Dict, List, Tuple
+
+from site_adapters import get_adapter
+
+DEFAULT_PAGES = Path(__file__).parent / "../data/fixtures"
+
+# Extração do Idealista em produção ($$eval + IdealistaScraper._parse_item)
+IDEALISTA_ITEMS = 'idealista_items'
+
+# Host -> (nome, adapter, contexto)
+SUITES: Dict[str, Tuple[str, str, Dict]] = {
+    'www.idealista.pt': ('idealista', IDEALISTA_ITEMS, {}),
+    'www.leilosoc.com': ('leilosoc', 'leilosoc', {}),
+}
+# Sites de leilões sem adapter próprio
+GENERIC_ADAPTERS = ('generic_cards', 'regex_leilao')
+
+# Nomes dos campos nos registos dos vários adapters
+PRICE_FIELDS = ('price', 'preco', 'preco_base')
+AREA_FIELDS = ('area_m2', 'area')
+
+
+def load_corpus(directory: Path, limit: int) -> Dict[str, List[str]]:
+    """Páginas HTML por host (fixtures JSON ou ficheiros .html/.html.gz)"""
+    corpus: Dict[str, List[str]] = {}
+    for host_dir in sorted(p for p in directory.iterdir() if p.is_dir()):
+        pages = []
+        for path in sorted(host_dir.iterdir()):
+            if path.suffix == '.json':
+                with open(path, encoding='utf-8') as f:
+                    entry = json.load(f)
+                if entry.get('status') != 200 or 'html' not in entry.get('headers', {}).get('content-type', 'html'):
+                    continue
+                pages.append(entry.get('body', ''))
+            elif path.name.endswith(('.html', '.html.gz')):
+                opener = gzip.open if path.suffix == '.gz' else open
+                with opener(path, 'rt', encoding='utf-8', errors='replace') as f:
+                    pages.append(f.read())
+            if len(pages) >= limit:
+                break
+        if pages:
+            corpus[host_dir.name] = pages
+    return corpus
+
+
+def suites_for(corpus: Dict[str, List[str]]) -> List[Tuple[str, str, Dict, List[str]]]:
+    """(nome, adapter, contexto, páginas) de cada combinação a medir"""
+    suites = []
+    for host, pages in corpus.items():
+        if host in SUITES:
+            name, adapter_name, context = SUITES[host]
+            suites.append((name, adapter_name, context, pages))
+            continue
+        for adapter_name in GENERIC_ADAPTERS:
+            context = {'fonte': host}
+            if adapter_name == 'regex_leilao':
+                context['base_url'] = f"https://{host}/"
+            suites.append((f"{host} [{adapter_name}]", adapter_name, context, pages))
+    return suites
+
+
+def _has(record: Dict, fields: Tuple[str, ...]) -> bool:
+    return any(record.get(field) for field in fields)
+
+
+def eval_items(html: str, selectors: Dict[str, str]) -> List[Dict[str, str]]:
+    """Os dicts que o $$eval de EXTRACT_ITEMS_JS devolve para esta página"""
+    from html_parser import parse_html
+
+    def text(item, selector: str) -> str:
+        element = item.css_first(selector)
+        return element.text(separator=' ', strip=True) if element is not None else ''
+
+    items = []
+    for item in parse_html(html).css(selectors['items']):
+        link = item.css_first(selectors['title'])
+        items.append({
+            'title': link.text(separator=' ', strip=True) if link is not None else '',
+            'href': link.attr('href', '') if link is not None else '',
+            'price': text(item, selectors['price']),
+            'details': text(item, selectors['details']),
+            'location': text(item, selectors['location']),
+        })
+    return items
+
+
+def _parser(adapter_name: str, context: Dict, pages: List[str]) -> Tuple[str, Callable, List]:
+    """(nome na tabela, função de extração, entrada de cada página)"""
+    if adapter_name == IDEALISTA_ITEMS:
+        from scrapers_v2 import IdealistaScraper
+
+        scraper = IdealistaScraper()
+
+        def parse_items(items: List[Dict[str, str]]) -> List[Dict]:
+            # Como IdealistaScraper._extract_properties, sem a ida ao browser
+            properties = (scraper._parse_item(item) for item in items)
+            return [vars(prop) for prop in properties if prop and prop.price > 0]
+
+        return ('IdealistaScraper._parse_item', parse_items,
+                [eval_items(html, IdealistaScraper.SELECTORS) for html in pages])
+
+    found = get_adapter(adapter_name)
+    return found.cache_key, lambda html: found.func(html, **context), pages
+
+
+def bench_suite(adapter_name: str, context: Dict, pages: List[str], runs: int) -> Dict:
+    """Débito, memória e rendimento de um adapter nas suas páginas"""
+    key, func, inputs = _parser(adapter_name, context, pages)
+
+    # Aquecimento (imports, seletores compilados) e rendimento
+    records = [record for page in inputs for record in func(page)]
+
+    per_page = []
+    start = time.perf_counter()
+    for _ in range(runs):
+        for page in inputs:
+            page_start = time.perf_counter()
+            func(page)
+            per_page.append(time.perf_counter() - page_start)
+    elapsed = time.perf_counter() - start
+
+    # Memória numa passagem à parte (tracemalloc abranda muito o parse)
+    peaks = []
+    tracemalloc.start()
+    try:
+        for page in inputs:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            func(page)
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+
+    listings = len(records)
+    return {
+        'adapter': key,
+        'pages': len(pages),
+        'avg_page_kb': round(sum(len(p) for p in pages) / len(pages) / 1024, 1),
+        'pages_per_s': round(len(pages) * runs / elapsed, 1),
+        'listings_per_s': round(listings * runs / elapsed, 1),
+        'median_ms': round(median(per_page) * 1000, 3),
+        'alloc_kb_per_page': round(sum(peaks) / len(peaks) / 1024, 1),
+        'listings_per_page': round(listings / len(pages), 2),
+        'with_price': round(sum(_has(r, PRICE_FIELDS) for r in records) / listings, 3) if listings else 0.0,
+        'with_area': round(sum(_has(r, AREA_FIELDS) for r in records) / listings, 3) if listings else 0.0,
+    }
+
+
+def regressions(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Quebras de débito (> tolerance) ou de rendimento/completude face à baseline"""
+    found = []
+    for name, old in baseline.get('suites', {}).items():
+        new = results['suites'].get(name)
+        if new is None:
+            continue
+        if new['pages_per_s'] < old['pages_per_s'] * (1 - tolerance):
+            found.append(f"{name}: {new['pages_per_s']} páginas/s (antes {old['pages_per_s']})")
+        for field in ('listings_per_page', 'with_price', 'with_area'):
+            if new[field] < old[field] - 0.01:
+                found.append(f"{name}: {field} {new[field]} (antes {old[field]})")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark dos adapters de site')
+    parser.add_argument('--pages', type=Path, default=DEFAULT_PAGES,
+                        help='Fixtures ou diretoria com uma subdiretoria de páginas por host')
+    parser.add_argument('--limit', type=int, default=100, help='Máximo de páginas por host')
+    parser.add_argument('-n', '--runs', type=int, default=5, help='Passagens pelo corpus')
+    parser.add_argument('--only', action='append', help='Só esta suite (repetível)')
+    parser.add_argument('--json', help='Guardar resultados em JSON')
+    parser.add_argument('--baseline', type=Path, help='JSON de uma execução anterior para comparar')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Quebra de páginas/s aceite face à baseline (0.2 = 20%%)')
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.pages, args.limit) if args.pages.is_dir() else {}
+    suites = [s for s in suites_for(corpus) if not args.only or s[0] in args.only]
+    if not suites:
+        print(f"Sem páginas em {args.pages} (grave fixtures com --fixtures record ou use --pages)")
+        return 1
+
+    results = {
+        'runs': args.runs,
+        'suites': {name: bench_suite(adapter_name, context, pages, args.runs)
+                   for name, adapter_name, context, pages in suites},
+    }
+
+    print("=" * 96)
+    print(f"🧪 ADAPTERS - {len(suites)} suites, {sum(len(p) for p in corpus.values())} páginas")
+    print("=" * 96)
+    print(f"{'suite':<36} {'pág/s':>8} {'imóveis/s':>10} {'KiB/pág':>8} "
+          f"{'imóv/pág':>9} {'c/ preço':>9} {'c/ área':>8}")
+    for name, r in results['suites'].items():
+        print(f"{name[:36]:<36} {r['pages_per_s']:>8.1f} {r['listings_per_s']:>10.1f} "
+              f"{r['alloc_kb_per_page']:>8.0f} {r['listings_per_page']:>9.1f} "
+              f"{r['with_price']:>8.0%} {r['with_area']:>8.0%}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Guardado em {args.json}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            found = regressions(results, json.load(f), args.tolerance)
+        for line in found:
+            print(f"   ❌ {line}")
+        if found:
+            return 1
+        print(f"\n✅ Sem regressões face a {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Benchmark e precisão dos extractors - Lisboa Real Estate AI
+Mede extract_fields contra um corpus anotado (extractors_corpus.json)
+
+- Precisão por campo (preço, área, tipologia, concelho) face às anotações
+- Tempo por texto de extract_fields em lote vs. os helpers antigos dos
+  scripts (padrões em string, testados um a um)
+
+Termina com código 1 se a precisão de algum campo ficar abaixo de
+--min-accuracy (para usar antes de mudar padrões).
+
+Uso:
+    python bench_extractors.py
+    python bench_extractors.py -n 2000 --json extractors.json
+"""
+
+import re
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+from extractors import extract_fields
+
+CORPUS = Path(__file__).parent / "extractors_corpus.json"
+FIELDS = ('price', 'area_m2', 'typology', 'location')
+
+
+# Helpers antigos (scraper_definitivo / integrador_dados), como referência
+def legacy_price(texto):
+    for padrao in [r'(\d+[\.\s]?\d+)\s*€', r'€\s*(\d+[\.\s]?\d+)', r'(\d+)\.?\d{0,3}\s*€']:
+        match = re.search(padrao, texto)
+        if match:
+            try:
+                return float(match.group(1).replace('.', '').replace(' ', '').replace(',', '.'))
+            except ValueError:
+                continue
+    return None
+
+
+def legacy_area(texto):
+    for padrao in [r'(\d+)\s*m2', r'(\d+)\s*m²', r'(\d+)\s*metros', r'(\d+)\s*m\s*2']:
+        match = re.search(padrao, texto.lower())
+        if match:
+            return float(match.group(1))
+    return None
+
+
+def legacy_typology(texto):
+    for tipo in ['T0', 'T1', 'T2', 'T3', 'T4', 'T5', 'T6', 'Moradia', 'Loja', 'Armazém', 'Terreno', 'Prédio']:
+        if tipo.lower() in texto.lower():
+            return tipo
+    return None
+
+
+def legacy_location(texto):
+    for concelho in ['Lisboa', 'Oeiras', 'Cascais', 'Sintra', 'Amadora', 'Loures', 'Almada', 'Seixal']:
+        if concelho.lower() in texto.lower():
+            return concelho
+    return None
+
+
+def legacy_fields(texts):
+    return [
+        {'price': legacy_price(t), 'area_m2': legacy_area(t),
+         'typology': legacy_typology(t), 'location': legacy_location(t)}
+        for t in texts
+    ]
+
+
+def accuracy(results, corpus) -> dict:
+    """Fração de textos com cada campo correto"""
+    hits = {field: 0 for field in FIELDS}
+    errors = []
+    for got, case in zip(results, corpus):
+        for field in FIELDS:
+            value = got[field]
+            expected = case[field]
+            ok = value == expected or (
+                isinstance(value, float) and expected is not None and abs(value - expected) < 0.01
+            )
+            if ok:
+                hits[field] += 1
+            else:
+                errors.append({'text': case['text'], 'field': field, 'got': value, 'expected': expected})
+    return {'by_field': {f: round(hits[f] / len(corpus), 4) for f in FIELDS}, 'errors': errors}
+
+
+def time_per_text(func, texts, runs: int) -> float:
+    """Microssegundos por texto"""
+    start = time.perf_counter()
+    for _ in range(runs):
+        func(texts)
+    return (time.perf_counter() - start) / (runs * len(texts)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark e precisão dos extractors')
+    parser.add_argument('--corpus', type=Path, default=CORPUS, help='Corpus anotado (JSON)')
+    parser.add_argument('-n', '--runs', type=int, default=500, help='Passagens pelo corpus')
+    parser.add_argument('--min-accuracy', type=float, default=1.0, help='Precisão mínima por campo')
+    parser.add_argument('--json', help='Guardar resultados em JSON')
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding='utf-8') as f:
+        corpus = json.load(f)
+    texts = [case['text'] for case in corpus]
+
+    new = accuracy([r.as_dict() for r in extract_fields(texts)], corpus)
+    old = accuracy(legacy_fields(texts), corpus)
+    results = {
+        'texts': len(texts),
+        'accuracy': new['by_field'],
+        'legacy_accuracy': old['by_field'],
+        'us_per_text': round(time_per_text(extract_fields, texts, args.runs), 2),
+        'legacy_us_per_text': round(time_per_text(legacy_fields, texts, args.runs), 2),
+        'errors': new['errors'],
+    }
+
+    print("=" * 60)
+    print(f"🔎 EXTRACTORS - {len(texts)} textos anotados")
+    print("=" * 60)
+    print(f"{'campo':<12} {'extractors':>12} {'antigos':>12}")
+    for field in FIELDS:
+        print(f"{field:<12} {results['accuracy'][field]:>11.0%} {results['legacy_accuracy'][field]:>11.0%}")
+    print(f"\n⏱️  extract_fields: {results['us_per_text']:.1f} µs/texto "
+          f"(antigos: {results['legacy_us_per_text']:.1f} µs/texto)")
+
+    for error in results['errors']:
+        print(f"   ❌ {error['field']}: {error['got']!r} (esperado {error['expected']!r}) - {error['text'][:60]}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Guardado em {args.json}")
+
+    below = [f for f, acc in results['accuracy'].items() if acc < args.min_accuracy]
+    return 1 if below else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark de parsers HTML - Lisboa Real Estate AI
+Compara os backends de html_parser em páginas guardadas
+
+Por omissão usa os corpos da cache HTTP (../data/http_cache/bodies);
+aceita também uma diretoria com ficheiros .html. Mede, por página, o parse
+e a extração dos cards (seletores genéricos, texto e link de cada card).
+
+Uso:
+    python bench_parsers.py
+    python bench_parsers.py --pages paginas/ -n 20 --json parsers.json
+"""
+
+import sys
+import gzip
+import json
+import time
+import argparse
+from pathlib import Path
+from statistics import median
+
+from html_parser import available_backends, parse_html, select_cards, site_selectors
+
+DEFAULT_PAGES = Path(__file__).parent / "../data/http_cache/bodies"
+
+
+def load_pages(directory: Path, limit: int) -> list:
+    """Páginas guardadas (.html ou .html.gz da cache)"""
+    pages = []
+    for path in sorted(directory.rglob('*.html*')):
+        opener = gzip.open if path.suffix == '.gz' else open
+        with opener(path, 'rt', encoding='utf-8', errors='replace') as f:
+            pages.append(f.read())
+        if len(pages) >= limit:
+            break
+    return pages
+
+
+def extract(html: str, backend: str) -> int:
+    """Parse + extração típica de uma página de listagens"""
+    selectors = site_selectors('generic')
+    doc = parse_html(html, backend)
+    cards = select_cards(doc, selectors['cards'])
+    for card in cards:
+        card.text(separator=' ')
+        link = card.css_first(selectors['link'])
+        if link is not None:
+            link.attr('href')
+    return len(cards)
+
+
+def bench_backend(backend: str, pages: list, runs: int) -> dict:
+    """Mediana (ms) por página, em `runs` passagens por todas as páginas"""
+    # Aquecimento: imports e compilação dos seletores
+    extract(pages[0], backend)
+
+    per_page = []
+    cards = 0
+    for _ in range(runs):
+        for html in pages:
+            start = time.perf_counter()
+            cards = extract(html, backend)
+            per_page.append((time.perf_counter() - start) * 1000)
+
+    per_page.sort()
+    return {
+        'median_ms': round(median(per_page), 3),
+        'p95_ms': round(per_page[int(len(per_page) * 0.95) - 1], 3),
+        'max_ms': round(per_page[-1], 3),
+        'pages_per_s': round(1000 / median(per_page), 1),
+        'cards_last_page': cards,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark dos parsers HTML')
+    parser.add_argument('--pages', type=Path, default=DEFAULT_PAGES, help='Diretoria com páginas guardadas')
+    parser.add_argument('--limit', type=int, default=200, help='Máximo de páginas')
+    parser.add_argument('-n', '--runs', type=int, default=5, help='Passagens por backend')
+    parser.add_argument('--backend', action='append', help='Backend a medir (repetível; por omissão todos os instalados)')
+    parser.add_argument('--json', help='Guardar resultados em JSON')
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages, args.limit)
+    if not pages:
+        print(f"Sem páginas em {args.pages} (corra um scraping com cache ou use --pages)")
+        return 1
+
+    backends = args.backend or list(available_backends())
+    total_kb = sum(len(p) for p in pages) / 1024
+    results = {
+        'pages': len(pages),
+        'avg_page_kb': round(total_kb / len(pages), 1),
+        'runs': args.runs,
+        'backends': {b: bench_backend(b, pages, args.runs) for b in backends},
+    }
+
+    print("=" * 60)
+    print(f"🧪 PARSERS HTML - {len(pages)} páginas (média {results['avg_page_kb']} KiB)")
+    print("=" * 60)
+    print(f"{'backend':<12} {'mediana':>10} {'p95':>10} {'máx':>10} {'páginas/s':>10}")
+    for backend, r in results['backends'].items():
+        print(f"{backend:<12} {r['median_ms']:>8.2f}ms {r['p95_ms']:>8.2f}ms "
+              f"{r['max_ms']:>8.2f}ms {r['pages_per_s']:>10.1f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Guardado em {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
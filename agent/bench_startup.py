@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark de arranque - Lisboa Real Estate AI
+Mede o tempo de import de main.py e o tempo total de `main.py --stats`
+
+Uso:
+    python bench_startup.py            # 10 repetições
+    python bench_startup.py -n 20 --json startup.json
+"""
+
+import sys
+import json
+import argparse
+import subprocess
+import time
+from pathlib import Path
+from statistics import median
+
+AGENT_DIR = Path(__file__).parent
+
+
+def wall_time(cmd: list, runs: int) -> float:
+    """Mediana do tempo total de um comando (segundos)"""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, cwd=AGENT_DIR, capture_output=True)
+        samples.append(time.perf_counter() - start)
+    return median(samples)
+
+
+def import_profile(module: str = "main") -> dict:
+    """Tempos de -X importtime: total do módulo e imports diretos mais caros"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=AGENT_DIR, capture_output=True, text=True
+    )
+
+    total_us = 0
+    children = []
+    pending = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            _, cumulative, name = line.split("|")
+            cumulative = int(cumulative)
+        except ValueError:
+            continue
+        # Os filhos aparecem antes do pai; os imports diretos têm 1 nível a mais
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        if depth == 0:
+            if name.strip() == module:
+                total_us = cumulative
+                children = pending
+            pending = []
+        elif depth == 1:
+            pending.append((name.strip(), cumulative))
+
+    children.sort(key=lambda c: c[1], reverse=True)
+    return {
+        'total_ms': total_us / 1000,
+        'top_imports_ms': {name: us / 1000 for name, us in children[:10]},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de arranque do CLI')
+    parser.add_argument('-n', '--runs', type=int, default=10, help='Repetições por medição')
+    parser.add_argument('--json', help='Guardar resultados em JSON')
+    args = parser.parse_args()
+
+    baseline = wall_time([sys.executable, "-c", "pass"], args.runs)
+    stats = wall_time([sys.executable, "main.py", "--stats"], args.runs)
+    imports = [import_profile("main") for _ in range(args.runs)]
+
+    results = {
+        'runs': args.runs,
+        'python_startup_ms': round(baseline * 1000, 1),
+        'stats_command_ms': round(stats * 1000, 1),
+        'stats_overhead_ms': round((stats - baseline) * 1000, 1),
+        'import_main_ms': round(median(i['total_ms'] for i in imports), 1),
+        'top_imports_ms': imports[-1]['top_imports_ms'],
+    }
+
+    print("=" * 60)
+    print("⏱️  ARRANQUE DO CLI")
+    print("=" * 60)
+    print(f"Python (vazio):        {results['python_startup_ms']:>8.1f} ms")
+    print(f"main.py --stats:       {results['stats_command_ms']:>8.1f} ms")
+    print(f"  (acima do Python):   {results['stats_overhead_ms']:>8.1f} ms")
+    print(f"import main:           {results['import_main_ms']:>8.1f} ms")
+    print("\nImports diretos mais caros:")
+    for name, ms in results['top_imports_ms'].items():
+        print(f"   {name:<30} {ms:>8.1f} ms")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Guardado em {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""
+Browser pool - Lisboa Real Estate AI
+Chromium partilhado por todos os scrapers Playwright
+
+- Um browser mantido quente entre pesquisas e ciclos do daemon
+- Contextos (sessões isoladas) e páginas emprestados a cada scraper
+- Limite de separadores abertos em simultâneo (max_tabs)
+- Reciclagem do browser após N páginas ou acima de um limite de RSS;
+  o browser antigo fecha quando o último contexto emprestado é devolvido
+- Bloqueio de imagens, media, fontes e tracking por site (resource_policy)
+- Gravação/reprodução das respostas com LRE_FIXTURES (fixtures)
+"""
+
+import os
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, TYPE_CHECKING
+
+# Playwright é importado apenas quando o browser é lançado (arranque rápido do CLI)
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, BrowserContext, Page
+    from resource_policy import ResourcePolicy
+
+logger = logging.getLogger(__name__)
+
+
+def _process_tree_rss_mb(root_pid: int) -> Optional[float]:
+    """RSS (MiB) dos processos descendentes de root_pid (Chromium e driver)"""
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+
+    if psutil is not None:
+        try:
+            children = psutil.Process(root_pid).children(recursive=True)
+            return sum(child.memory_info().rss for child in children) / 1024 / 1024
+        except psutil.Error:
+            return None
+
+    # Sem psutil: /proc (Linux)
+    if not os.path.isdir('/proc'):
+        return None
+
+    parents: Dict[int, int] = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                # "pid (comm) state ppid ..." - comm pode conter espaços
+                fields = f.read().rsplit(')', 1)[1].split()
+            parents[int(entry)] = int(fields[1])
+        except (OSError, IndexError, ValueError):
+            continue
+
+    descendants = set()
+    frontier = [root_pid]
+    while frontier:
+        pid = frontier.pop()
+        for child, parent in parents.items():
+            if parent == pid and child not in descendants:
+                descendants.add(child)
+                frontier.append(child)
+
+    total_kb = 0
+    for pid in descendants:
+        try:
+            with open(f'/proc/{pid}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total_kb += int(line.split()[1])
+                        break
+        except (OSError, ValueError):
+            continue
+    return total_kb / 1024
+
+
+class BrowserPool:
+    """
+    Pool de browser Chromium com contextos e páginas emprestados
+
+    Args:
+        max_tabs: Máximo de páginas abertas em simultâneo
+        max_pages_per_browser: Reciclar o browser após N páginas servidas
+        max_rss_mb: Reciclar o browser acima deste RSS (Chromium + driver)
+        headless: Browser sem interface
+        launch_args: Argumentos extra do Chromium
+        block_resources: Aplicar a política de recursos do site a cada página
+    """
+
+    def __init__(self,
+                 max_tabs: int = 8,
+                 max_pages_per_browser: int = 200,
+                 max_rss_mb: float = 1500,
+                 headless: bool = True,
+                 launch_args: Optional[List[str]] = None,
+                 block_resources: bool = True):
+        self.max_tabs = max_tabs
+        self.max_pages_per_browser = max_pages_per_browser
+        self.max_rss_mb = max_rss_mb
+        self.headless = headless
+        self.launch_args = launch_args or ['--disable-blink-features=AutomationControlled']
+        self.block_resources = block_resources
+
+        self._playwright = None
+        self._browser: Optional['Browser'] = None
+        self._pages_served = 0
+        self._leases: Dict['Browser', int] = {}
+        self._context_browser: Dict['BrowserContext', 'Browser'] = {}
+        self._tabs: Optional[asyncio.Semaphore] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self.launches = 0
+        self.recycles = 0
+
+    # ------------------------------------------------------------------
+    # Browser
+    # ------------------------------------------------------------------
+
+    async def _ensure_browser(self) -> 'Browser':
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+            self._tabs = asyncio.Semaphore(self.max_tabs)
+
+        async with self._lock:
+            if self._browser is not None and self._should_recycle():
+                self._retire_browser()
+
+            if self._browser is None:
+                if self._playwright is None:
+                    from playwright.async_api import async_playwright
+                    self._playwright = await async_playwright().start()
+
+                self._browser = await self._playwright.chromium.launch(
+                    headless=self.headless,
+                    args=self.launch_args
+                )
+                self._leases[self._browser] = 0
+                self._pages_served = 0
+                self.launches += 1
+                logger.info(f"Browser lançado (#{self.launches})")
+
+            return self._browser
+
+    def _should_recycle(self) -> bool:
+        """Browser atual ultrapassou o limite de páginas ou de memória"""
+        if self._pages_served >= self.max_pages_per_browser:
+            logger.info(f"A reciclar browser: {self._pages_served} páginas servidas")
+            return True
+
+        if self.max_rss_mb:
+            rss = _process_tree_rss_mb(os.getpid())
+            if rss is not None and rss > self.max_rss_mb:
+                logger.info(f"A reciclar browser: RSS {rss:.0f} MiB > {self.max_rss_mb:.0f} MiB")
+                return True
+
+        return False
+
+    def _retire_browser(self):
+        """Novos contextos vão para um browser novo; o antigo fecha quando ficar livre"""
+        browser = self._browser
+        self._browser = None
+        self.recycles += 1
+        if self._leases.get(browser, 0) == 0:
+            asyncio.ensure_future(self._close_browser(browser))
+
+    async def _close_browser(self, browser: 'Browser'):
+        self._leases.pop(browser, None)
+        try:
+            await browser.close()
+        except Exception as e:
+            logger.warning(f"Erro ao fechar browser: {e}")
+
+    # ------------------------------------------------------------------
+    # Contextos e páginas
+    # ------------------------------------------------------------------
+
+    async def acquire_context(self, init_script: Optional[str] = None,
+                              **context_options) -> 'BrowserContext':
+        """
+        Empresta um contexto (sessão isolada: cookies, user agent, viewport)
+
+        Args:
+            init_script: Script injetado em todas as páginas do contexto
+            context_options: Passados a browser.new_context
+
+        Returns:
+            BrowserContext (devolver com release_context)
+        """
+        browser = await self._ensure_browser()
+        self._leases[browser] += 1
+        try:
+            context = await browser.new_context(**context_options)
+            if init_script:
+                await context.add_init_script(init_script)
+        except Exception:
+            await self._release_browser(browser)
+            raise
+
+        self._context_browser[context] = browser
+        return context
+
+    async def release_context(self, context: 'BrowserContext'):
+        """Fecha o contexto e liberta o browser a que pertence"""
+        browser = self._context_browser.pop(context, None)
+        try:
+            await context.close()
+        except Exception as e:
+            logger.debug(f"Erro ao fechar contexto: {e}")
+        if browser is not None:
+            await self._release_browser(browser)
+
+    async def _release_browser(self, browser: 'Browser'):
+        self._leases[browser] -= 1
+        # Browser reciclado e sem contextos ativos: fechar
+        if browser is not self._browser and self._leases[browser] == 0:
+            await self._close_browser(browser)
+
+    async def new_page(self, context: 'BrowserContext',
+                       policy: Optional['ResourcePolicy'] = None) -> 'Page':
+        """
+        Abre uma página no contexto, respeitando max_tabs
+
+        O separador é devolvido ao pool quando a página é fechada (page.close()).
+
+        Args:
+            policy: Política de recursos (por omissão a do site da página)
+        """
+        from fixtures import fixture_mode, install_on_page
+        from resource_policy import apply_policy
+
+        await self._tabs.acquire()
+        try:
+            page = await context.new_page()
+            if self.block_resources:
+                await apply_policy(page, policy)
+            if fixture_mode():
+                # Depois da política: em replay responde antes dela (rede nunca usada)
+                await install_on_page(page)
+        except Exception:
+            self._tabs.release()
+            raise
+
+        self._pages_served += 1
+        page.once('close', lambda _: self._tabs.release())
+        return page
+
+    @asynccontextmanager
+    async def context(self, init_script: Optional[str] = None, **context_options):
+        """Contexto emprestado durante o bloco"""
+        context = await self.acquire_context(init_script=init_script, **context_options)
+        try:
+            yield context
+        finally:
+            await self.release_context(context)
+
+    @asynccontextmanager
+    async def page(self, init_script: Optional[str] = None, **context_options):
+        """Página num contexto próprio, durante o bloco (scripts de um só site)"""
+        async with self.context(init_script=init_script, **context_options) as context:
+            page = await self.new_page(context)
+            try:
+                yield page
+            finally:
+                if not page.is_closed():
+                    await page.close()
+
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict:
+        return {
+            'launches': self.launches,
+            'recycles': self.recycles,
+            'pages_served': self._pages_served,
+            'active_contexts': len(self._context_browser),
+        }
+
+    async def close(self):
+        """Fecha todos os browsers e o Playwright"""
+        for browser in list(self._leases):
+            await self._close_browser(browser)
+        self._browser = None
+        self._context_browser.clear()
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+
+# Pool global (um por event loop)
+_pool: Optional[BrowserPool] = None
+_pool_loop = None
+
+
+def get_browser_pool(**options) -> BrowserPool:
+    """Pool partilhado do processo; as opções só contam na criação"""
+    global _pool, _pool_loop
+
+    loop = asyncio.get_running_loop()
+    if _pool is None or _pool_loop is not loop:
+        _pool = BrowserPool(**options)
+        _pool_loop = loop
+    return _pool
+
+
+async def close_browser_pool():
+    """Fecha o pool global, se chegou a ser criado"""
+    global _pool, _pool_loop
+
+    if _pool is not None:
+        await _pool.close()
+    _pool = None
+    _pool_loop = None
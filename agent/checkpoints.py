@@ -0,0 +1,122 @@
+"""
+Checkpoints - Lisboa Real Estate AI
+Retoma de pesquisas longas a partir da última página guardada
+
+Cada página concluída é guardada na base de dados na mesma transação que o
+progresso (portal, localização, tipologia, última página, IDs já guardados).
+Se a execução morrer a meio, a seguinte continua na página seguinte.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class CellCheckpoint:
+    """Progresso de uma pesquisa (portal, localização, tipologia)"""
+
+    def __init__(self, checkpointer: 'CrawlCheckpointer',
+                 portal: str, location: str, typology: str,
+                 last_page: int = 0, persisted_ids: Optional[Set[str]] = None):
+        self.checkpointer = checkpointer
+        self.portal = portal
+        self.location = location
+        self.typology = typology or ''
+        self.last_page = last_page
+        self.persisted_ids: Set[str] = set(persisted_ids or [])
+        # IDs guardados por uma execução anterior interrompida
+        self.resumed_ids: Set[str] = set(self.persisted_ids)
+
+    @property
+    def start_page(self) -> int:
+        """Primeira página ainda por fazer"""
+        return self.last_page + 1
+
+    def page_done(self, page_num: int, items: List, finished: bool = False) -> int:
+        """
+        Guarda os imóveis da página e o progresso numa só transação
+
+        Args:
+            page_num: Página concluída
+            items: ScrapedProperty extraídos da página
+            finished: True se foi a última página da pesquisa
+
+        Returns:
+            Número de imóveis novos guardados
+        """
+        new_items = [item for item in items if item.id not in self.persisted_ids]
+        rows = self.checkpointer.persist(new_items)
+
+        persisted = self.persisted_ids | {item.id for item in new_items}
+        self.checkpointer.db.save_properties(rows, checkpoint={
+            'portal': self.portal,
+            'location': self.location,
+            'typology': self.typology,
+            'last_page': page_num,
+            'persisted_ids': list(persisted),
+            'status': 'done' if finished else 'running',
+        })
+
+        self.persisted_ids = persisted
+        self.last_page = page_num
+        return len(new_items)
+
+
+class CrawlCheckpointer:
+    """
+    Fábrica de checkpoints por pesquisa
+
+    Args:
+        db: PropertyDatabase
+        persist: Converte ScrapedProperty em linhas para save_properties
+            (análise e score acontecem aqui, página a página)
+        max_age_hours: Checkpoints mais antigos recomeçam do início
+            (as listagens dos portais mudam de página ao longo do dia)
+    """
+
+    def __init__(self, db, persist: Callable[[List], List[Dict]], max_age_hours: int = 24):
+        self.db = db
+        self.persist = persist
+        self.max_age = timedelta(hours=max_age_hours)
+        self.cells: Dict[str, CellCheckpoint] = {}
+
+    def for_cell(self, portal: str, location: str, typology: str = '') -> CellCheckpoint:
+        """Checkpoint da pesquisa, retomado se houver um recente por terminar"""
+        key = f"{portal}|{location}|{typology or ''}"
+        if key in self.cells:
+            return self.cells[key]
+
+        saved = self.db.get_checkpoint(portal, location, typology)
+
+        if saved and saved['status'] == 'running' and saved['last_page'] > 0 and not self._expired(saved):
+            cell = CellCheckpoint(self, portal, location, typology,
+                                  last_page=saved['last_page'],
+                                  persisted_ids=set(saved['persisted_ids']))
+            logger.info(f"A retomar {key} na página {cell.start_page} "
+                        f"({len(cell.persisted_ids)} imóveis já guardados)")
+        else:
+            self.db.reset_checkpoint(portal, location, typology)
+            cell = CellCheckpoint(self, portal, location, typology)
+
+        self.cells[key] = cell
+        return cell
+
+    def _expired(self, saved: Dict) -> bool:
+        try:
+            updated = datetime.fromisoformat(str(saved['updated_at']))
+        except (TypeError, ValueError):
+            return True
+        # CURRENT_TIMESTAMP do SQLite é UTC
+        return datetime.utcnow() - updated > self.max_age
+
+    @property
+    def persisted_ids(self) -> Set[str]:
+        """IDs guardados durante o crawl (todas as pesquisas)"""
+        return set().union(*(cell.persisted_ids for cell in self.cells.values()))
+
+    @property
+    def resumed_ids(self) -> Set[str]:
+        """IDs guardados por execuções anteriores que foram retomadas"""
+        return set().union(*(cell.resumed_ids for cell in self.cells.values()))
@@ -5,17 +5,57 @@ Gestão da base de dados SQLite
 
 import sqlite3
 import json
+import hashlib
 import logging
 from typing import List, Dict, Optional
 from datetime import datetime
 from pathlib import Path
-from dataclasses import asdict
+
+from metrics import metrics
 
 logger = logging.getLogger(__name__)
 
+# Campos de uma listagem que entram na fingerprint (o resto é derivado:
+# score, preço/m², dias no mercado)
+FINGERPRINT_FIELDS = (
+    'portal', 'url', 'title', 'price', 'area_m2', 'typology', 'location',
+    'parish', 'municipality', 'description', 'features', 'photos',
+)
+
+# Parâmetros por consulta WHERE id IN (...) (limite antigo do SQLite: 999)
+_IN_CHUNK = 500
+
+
+def listing_fingerprint(data: Dict) -> str:
+    """
+    Hash estável dos campos materiais de uma listagem
+
+    Igual entre execuções enquanto a listagem não mudar (preço ao euro,
+    área à décima, textos sem espaços nas pontas).
+
+    Args:
+        data: Dict (ou __dict__ de um ScrapedProperty) com FINGERPRINT_FIELDS
+    """
+    values = []
+    for field in FINGERPRINT_FIELDS:
+        value = data.get(field)
+        if field == 'price':
+            value = round(value or 0)
+        elif field == 'area_m2':
+            value = round(value, 1) if value else None
+        elif isinstance(value, str):
+            value = value.strip()
+        values.append(value or None)
+    encoded = json.dumps(values, ensure_ascii=False, separators=(',', ':'), default=str)
+    return hashlib.blake2b(encoded.encode('utf-8'), digest_size=16).hexdigest()
+
+
 class PropertyDatabase:
     """Base de dados para imóveis"""
     
+    # Campos preenchidos pela página de detalhe (enrichment)
+    ENRICHED_FIELDS = ('price_history', 'description', 'features', 'photos', 'contact')
+    
     def __init__(self, db_path: str = "../data/listings.db"):
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
@@ -25,7 +65,8 @@ class PropertyDatabase:
     
     def _init_db(self):
         """Inicializa a base de dados e tabelas"""
-        self.conn = sqlite3.connect(self.db_path)
+        # timeout: vários workers (processos ou máquinas) partilham o ficheiro
+        self.conn = sqlite3.connect(self.db_path, timeout=30)
         self.conn.row_factory = sqlite3.Row
         self.cursor = self.conn.cursor()
         
@@ -54,11 +95,14 @@ class PropertyDatabase:
                 price_per_m2 REAL,
                 opportunity_score INTEGER DEFAULT 0,
                 opportunity_category TEXT,
-                status TEXT DEFAULT 'active',  -- active, sold, inactive
-                last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                status TEXT DEFAULT 'active',  -- active, sold, inactive, duplicate
+                last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                fingerprint TEXT  -- listing_fingerprint da última gravação
             )
         ''')
-        
+        # Bases de dados criadas antes da coluna
+        self._add_missing_columns('properties', {'fingerprint': 'TEXT'})
+
         # Tabela de histórico de preços
         self.cursor.execute('''
             CREATE TABLE IF NOT EXISTS price_history (
@@ -103,6 +147,109 @@ class PropertyDatabase:
             )
         ''')
         
+        # Tabela de checkpoints de crawl (retomar pesquisas interrompidas)
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS crawl_checkpoints (
+                portal TEXT NOT NULL,
+                location TEXT NOT NULL,
+                typology TEXT NOT NULL DEFAULT '',
+                last_page INTEGER DEFAULT 0,
+                persisted_ids TEXT,  -- JSON array (cursor de IDs já guardados)
+                status TEXT DEFAULT 'running',  -- running, done
+                started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (portal, location, typology)
+            )
+        ''')
+        
+        # Fila de jobs de scraping (workers em vários processos/máquinas)
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS scrape_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                portal TEXT NOT NULL,
+                location TEXT NOT NULL,
+                typology TEXT NOT NULL DEFAULT '',
+                max_pages INTEGER DEFAULT 3,
+                priority INTEGER DEFAULT 0,
+                status TEXT DEFAULT 'pending',  -- pending, leased, done, failed
+                attempts INTEGER DEFAULT 0,
+                max_attempts INTEGER DEFAULT 3,
+                lease_until TIMESTAMP,
+                worker TEXT,
+                last_error TEXT,
+                result_count INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Estratégia de fetch por site (HTTP simples ou browser)
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS fetch_strategy (
+                host TEXT PRIMARY KEY,
+                tier TEXT NOT NULL,  -- http, browser
+                http_ok INTEGER DEFAULT 0,
+                http_fail INTEGER DEFAULT 0,
+                browser_ok INTEGER DEFAULT 0,
+                browser_fail INTEGER DEFAULT 0,
+                last_http_check TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Registo de saúde e rendimento por site (decide a ordem e o orçamento do crawl)
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS site_health (
+                site TEXT PRIMARY KEY,  -- host
+                technique TEXT,  -- http, browser, api (última que funcionou)
+                attempts INTEGER DEFAULT 0,
+                successes INTEGER DEFAULT 0,
+                success_rate REAL,  -- nas últimas tentativas (janela)
+                median_latency_ms REAL,  -- idem
+                listings_total INTEGER DEFAULT 0,
+                listings_per_page REAL,  -- idem
+                recent TEXT,  -- JSON: janela de [ok, latência ms]
+                recent_yields TEXT,  -- JSON: janela de imóveis por página/pesquisa
+                last_error TEXT,
+                last_success TIMESTAMP,
+                last_attempt TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Circuit breakers dos health checks (um por site)
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS circuit_breakers (
+                site TEXT PRIMARY KEY,
+                url TEXT,
+                state TEXT DEFAULT 'closed',  -- closed, open, half_open
+                failures INTEGER DEFAULT 0,  -- falhas seguidas
+                cooldown_s REAL DEFAULT 0,
+                open_until TIMESTAMP,
+                last_status INTEGER,
+                last_error TEXT,
+                last_latency_ms REAL,
+                last_checked TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Fila de enrichment (páginas de detalhe por visitar)
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS enrichment_queue (
+                property_id TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                priority REAL DEFAULT 0,  -- score preliminar
+                listed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,  -- primeira vez em fila
+                status TEXT DEFAULT 'pending',  -- pending, done, failed
+                attempts INTEGER DEFAULT 0,
+                last_error TEXT,
+                enriched_at TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (property_id) REFERENCES properties(id)
+            )
+        ''')
+        
         # Índices para performance
         self.cursor.execute('''
             CREATE INDEX IF NOT EXISTS idx_properties_score 
@@ -120,10 +267,33 @@ class PropertyDatabase:
             CREATE INDEX IF NOT EXISTS idx_properties_status 
             ON properties(status)
         ''')
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_jobs_lease 
+            ON scrape_jobs(status, priority DESC, id)
+        ''')
+        # No máximo um job ativo por pesquisa (enqueue repetido é ignorado)
+        self.cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_active 
+            ON scrape_jobs(portal, location, typology)
+            WHERE status IN ('pending', 'leased')
+        ''')
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_enrichment_next 
+            ON enrichment_queue(status, priority DESC, listed_at DESC)
+        ''')
         
         self.conn.commit()
         logger.info(f"Base de dados inicializada: {self.db_path}")
-    
+
+    def _add_missing_columns(self, table: str, columns: Dict[str, str]):
+        """ALTER TABLE para colunas novas numa tabela que já existia"""
+        self.cursor.execute(f'PRAGMA table_info({table})')
+        existing = {row['name'] for row in self.cursor.fetchall()}
+        for name, definition in columns.items():
+            if name not in existing:
+                self.cursor.execute(f'ALTER TABLE {table} ADD COLUMN {name} {definition}')
+                logger.info(f"Coluna {table}.{name} adicionada")
+
     def save_property(self, property_data: Dict) -> bool:
         """
         Guarda ou atualiza um imóvel
@@ -134,6 +304,48 @@ class PropertyDatabase:
         Returns:
             True se foi inserido, False se foi atualizado
         """
+        with metrics.timer('db_save_seconds'):
+            inserted = self._save_property(property_data)
+            self.conn.commit()
+        
+        metrics.inc('db_writes_total', op='insert' if inserted else 'update')
+        return inserted
+    
+    def save_properties(self, properties: List[Dict],
+                        checkpoint: Optional[Dict] = None) -> Dict[str, int]:
+        """
+        Guarda vários imóveis numa única transação
+        
+        Args:
+            properties: Lista de dicts com dados dos imóveis
+            checkpoint: Progresso do crawl a gravar na mesma transação
+                (ver save_checkpoint)
+            
+        Returns:
+            Dict com número de inseridos e atualizados
+        """
+        counts = {'inserted': 0, 'updated': 0}
+        
+        try:
+            for property_data in properties:
+                with metrics.timer('db_save_seconds'):
+                    inserted = self._save_property(property_data)
+                counts['inserted' if inserted else 'updated'] += 1
+            
+            if checkpoint:
+                self._save_checkpoint(**checkpoint)
+            
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        
+        metrics.inc('db_writes_total', counts['inserted'], op='insert')
+        metrics.inc('db_writes_total', counts['updated'], op='update')
+        return counts
+    
+    def _save_property(self, property_data: Dict) -> bool:
+        """Upsert de um imóvel sem commit (ver save_property)"""
         prop_id = property_data.get('id')
         
         # Verificar se já existe
@@ -146,7 +358,7 @@ class PropertyDatabase:
             'area_m2', 'typology', 'location', 'parish', 'municipality',
             'district', 'description', 'features', 'photos', 'contact',
             'days_on_market', 'price_per_m2', 'opportunity_score',
-            'opportunity_category', 'status'
+            'opportunity_category', 'status', 'fingerprint'
         ]
         
         values = []
@@ -169,15 +381,20 @@ class PropertyDatabase:
                     VALUES (?, ?, ?)
                 ''', (prop_id, new_price, change_pct))
             
-            # Update
-            set_clause = ', '.join([f"{f} = ?" for f in fields[1:]])
+            # Update (campos vindos do enrichment não são apagados por uma
+            # listagem que não os traz)
+            set_clause = ', '.join([
+                f"{f} = COALESCE(?, {f})" if f in self.ENRICHED_FIELDS
+                else f"{f} = MAX(COALESCE(?, 0), COALESCE({f}, 0))" if f == 'days_on_market'
+                else f"{f} = ?"
+                for f in fields[1:]
+            ])
             set_clause += ', updated_at = CURRENT_TIMESTAMP, last_seen = CURRENT_TIMESTAMP'
             
             self.cursor.execute(f'''
                 UPDATE properties SET {set_clause} WHERE id = ?
             ''', values[1:] + [prop_id])
             
-            self.conn.commit()
             return False
         
         else:
@@ -196,9 +413,73 @@ class PropertyDatabase:
                     VALUES (?, ?, ?)
                 ''', (prop_id, property_data['price'], 0))
             
-            self.conn.commit()
             return True
     
+    def get_fingerprints(self, prop_ids: List[str]) -> Dict[str, str]:
+        """Fingerprint gravada de cada imóvel (os que não existem ficam de fora)"""
+        fingerprints = {}
+        for i in range(0, len(prop_ids), _IN_CHUNK):
+            chunk = prop_ids[i:i + _IN_CHUNK]
+            self.cursor.execute(f'''
+                SELECT id, fingerprint FROM properties
+                WHERE id IN ({', '.join('?' * len(chunk))}) AND fingerprint IS NOT NULL
+            ''', chunk)
+            fingerprints.update((row['id'], row['fingerprint']) for row in self.cursor.fetchall())
+        return fingerprints
+
+    def touch_properties(self, prop_ids: List[str]) -> int:
+        """
+        Marca imóveis sem alterações como vistos agora (last_seen e status ativo)
+
+        Returns:
+            Número de imóveis atualizados
+        """
+        touched = 0
+        for i in range(0, len(prop_ids), _IN_CHUNK):
+            chunk = prop_ids[i:i + _IN_CHUNK]
+            self.cursor.execute(f'''
+                UPDATE properties SET last_seen = CURRENT_TIMESTAMP, status = 'active'
+                WHERE id IN ({', '.join('?' * len(chunk))})
+            ''', chunk)
+            touched += self.cursor.rowcount
+        self.conn.commit()
+
+        metrics.inc('db_writes_total', touched, op='touch')
+        return touched
+
+    def mark_duplicates(self, prop_ids: List[str]) -> int:
+        """
+        Marca como 'duplicate' imóveis que a deduplicação juntou a outro
+
+        Guardados página a página durante o crawl (checkpoints) antes de a
+        deduplicação correr; deixam de contar nas consultas de imóveis ativos.
+        Voltam a 'active' se uma execução seguinte os mantiver.
+
+        Returns:
+            Número de imóveis marcados
+        """
+        marked = 0
+        for i in range(0, len(prop_ids), _IN_CHUNK):
+            chunk = prop_ids[i:i + _IN_CHUNK]
+            self.cursor.execute(f'''
+                UPDATE properties SET status = 'duplicate'
+                WHERE id IN ({', '.join('?' * len(chunk))})
+            ''', chunk)
+            marked += self.cursor.rowcount
+        self.conn.commit()
+        return marked
+
+    def get_properties_by_ids(self, prop_ids: List[str]) -> List[Dict]:
+        """Imóveis pelos IDs (sem ordem garantida)"""
+        rows = []
+        for i in range(0, len(prop_ids), _IN_CHUNK):
+            chunk = prop_ids[i:i + _IN_CHUNK]
+            self.cursor.execute(f'''
+                SELECT * FROM properties WHERE id IN ({', '.join('?' * len(chunk))})
+            ''', chunk)
+            rows.extend(self._row_to_dict(row) for row in self.cursor.fetchall())
+        return rows
+
     def get_property(self, prop_id: str) -> Optional[Dict]:
         """Obtém um imóvel pelo ID"""
         self.cursor.execute('SELECT * FROM properties WHERE id = ?', (prop_id,))
@@ -304,6 +585,404 @@ class PropertyDatabase:
         row = self.cursor.fetchone()
         return dict(row) if row else None
     
+    def get_checkpoint(self, portal: str, location: str, typology: str = '') -> Optional[Dict]:
+        """Obtém o checkpoint de uma pesquisa (portal, localização, tipologia)"""
+        self.cursor.execute('''
+            SELECT * FROM crawl_checkpoints 
+            WHERE portal = ? AND location = ? AND typology = ?
+        ''', (portal, location, typology or ''))
+        
+        row = self.cursor.fetchone()
+        if not row:
+            return None
+        
+        result = dict(row)
+        result['persisted_ids'] = json.loads(result['persisted_ids'] or '[]')
+        return result
+    
+    def save_checkpoint(self, portal: str, location: str, typology: str,
+                        last_page: int, persisted_ids: List[str],
+                        status: str = 'running'):
+        """Guarda o progresso de uma pesquisa"""
+        self._save_checkpoint(portal, location, typology, last_page, persisted_ids, status)
+        self.conn.commit()
+    
+    def _save_checkpoint(self, portal: str, location: str, typology: str,
+                         last_page: int, persisted_ids: List[str],
+                         status: str = 'running'):
+        """Upsert do checkpoint sem commit"""
+        self.cursor.execute('''
+            INSERT INTO crawl_checkpoints 
+            (portal, location, typology, last_page, persisted_ids, status)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(portal, location, typology) DO UPDATE SET
+                last_page = excluded.last_page,
+                persisted_ids = excluded.persisted_ids,
+                status = excluded.status,
+                updated_at = CURRENT_TIMESTAMP
+        ''', (portal, location, typology or '', last_page,
+              json.dumps(sorted(persisted_ids)), status))
+    
+    def reset_checkpoint(self, portal: str, location: str, typology: str = ''):
+        """Recomeça uma pesquisa do início"""
+        self.cursor.execute('''
+            INSERT INTO crawl_checkpoints (portal, location, typology, last_page, persisted_ids, status)
+            VALUES (?, ?, ?, 0, '[]', 'running')
+            ON CONFLICT(portal, location, typology) DO UPDATE SET
+                last_page = 0,
+                persisted_ids = '[]',
+                status = 'running',
+                started_at = CURRENT_TIMESTAMP,
+                updated_at = CURRENT_TIMESTAMP
+        ''', (portal, location, typology or ''))
+        self.conn.commit()
+    
+    def enqueue_job(self, portal: str, location: str, typology: str = '',
+                    max_pages: int = 3, priority: int = 0,
+                    max_attempts: int = 3) -> Optional[int]:
+        """
+        Adiciona uma pesquisa à fila de jobs
+        
+        Returns:
+            ID do job, ou None se já existir um job ativo para a pesquisa
+        """
+        self.cursor.execute('''
+            INSERT OR IGNORE INTO scrape_jobs 
+            (portal, location, typology, max_pages, priority, max_attempts)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (portal, location, typology or '', max_pages, priority, max_attempts))
+        self.conn.commit()
+        return self.cursor.lastrowid if self.cursor.rowcount else None
+    
+    def lease_job(self, worker: str, lease_seconds: int = 900) -> Optional[Dict]:
+        """
+        Reserva atomicamente o próximo job (maior prioridade primeiro)
+        
+        Jobs com lease expirado (worker morreu) voltam a estar disponíveis
+        até esgotarem as tentativas.
+        
+        Args:
+            worker: Identificador do worker
+            lease_seconds: Duração da reserva (renovar com renew_lease)
+            
+        Returns:
+            Dict com o job, ou None se a fila estiver vazia
+        """
+        # BEGIN IMMEDIATE: bloqueio de escrita antes de ler, evita que dois
+        # workers reservem o mesmo job
+        self.cursor.execute('BEGIN IMMEDIATE')
+        try:
+            self.cursor.execute('''
+                UPDATE scrape_jobs 
+                SET status = 'failed', last_error = COALESCE(last_error, 'lease expirado'),
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE status = 'leased' AND lease_until < datetime('now')
+                AND attempts >= max_attempts
+            ''')
+            self.cursor.execute('''
+                SELECT id FROM scrape_jobs 
+                WHERE (status = 'pending' 
+                       OR (status = 'leased' AND lease_until < datetime('now')))
+                AND attempts < max_attempts
+                ORDER BY priority DESC, id
+                LIMIT 1
+            ''')
+            row = self.cursor.fetchone()
+            if row:
+                self.cursor.execute('''
+                    UPDATE scrape_jobs 
+                    SET status = 'leased', worker = ?, attempts = attempts + 1,
+                        lease_until = datetime('now', ?), updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                ''', (worker, f'{int(lease_seconds):+d} seconds', row['id']))
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        
+        return self.get_job(row['id']) if row else None
+    
+    def renew_lease(self, job_id: int, worker: str, lease_seconds: int = 900) -> bool:
+        """Prolonga a reserva; False se o job já não pertence ao worker"""
+        self.cursor.execute('''
+            UPDATE scrape_jobs 
+            SET lease_until = datetime('now', ?), updated_at = CURRENT_TIMESTAMP
+            WHERE id = ? AND worker = ? AND status = 'leased'
+        ''', (f'{int(lease_seconds):+d} seconds', job_id, worker))
+        self.conn.commit()
+        return self.cursor.rowcount > 0
+    
+    def complete_job(self, job_id: int, worker: str, result_count: int = 0):
+        """Marca um job como concluído"""
+        self.cursor.execute('''
+            UPDATE scrape_jobs 
+            SET status = 'done', result_count = ?, lease_until = NULL,
+                last_error = NULL, updated_at = CURRENT_TIMESTAMP
+            WHERE id = ? AND worker = ?
+        ''', (result_count, job_id, worker))
+        self.conn.commit()
+    
+    def fail_job(self, job_id: int, worker: str, error: str):
+        """Devolve o job à fila, ou marca-o como falhado se esgotou as tentativas"""
+        self.cursor.execute('''
+            UPDATE scrape_jobs 
+            SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'pending' END,
+                last_error = ?, lease_until = NULL, updated_at = CURRENT_TIMESTAMP
+            WHERE id = ? AND worker = ?
+        ''', (error, job_id, worker))
+        self.conn.commit()
+    
+    def get_job(self, job_id: int) -> Optional[Dict]:
+        """Obtém um job pelo ID"""
+        self.cursor.execute('SELECT * FROM scrape_jobs WHERE id = ?', (job_id,))
+        row = self.cursor.fetchone()
+        return dict(row) if row else None
+    
+    def get_job_stats(self) -> Dict[str, int]:
+        """Número de jobs por estado"""
+        self.cursor.execute('SELECT status, COUNT(*) as count FROM scrape_jobs GROUP BY status')
+        return {row['status']: row['count'] for row in self.cursor.fetchall()}
+    
+    def get_fetch_strategy(self, host: str) -> Optional[Dict]:
+        """Estratégia de fetch decidida para um site"""
+        self.cursor.execute('SELECT * FROM fetch_strategy WHERE host = ?', (host,))
+        row = self.cursor.fetchone()
+        return dict(row) if row else None
+    
+    def save_fetch_strategy(self, host: str, tier: str,
+                            http_ok: Optional[bool] = None,
+                            browser_ok: Optional[bool] = None):
+        """
+        Regista o resultado de um fetch e a estratégia a usar no site
+        
+        Args:
+            host: Host do site
+            tier: Estratégia a usar a seguir ('http' ou 'browser')
+            http_ok: Resultado da tentativa HTTP (None se não houve)
+            browser_ok: Resultado da tentativa com browser (None se não houve)
+        """
+        def counts(ok):
+            return (1, 0) if ok else (0, 1) if ok is not None else (0, 0)
+        
+        http_counts = counts(http_ok)
+        browser_counts = counts(browser_ok)
+        self.cursor.execute('''
+            INSERT INTO fetch_strategy 
+            (host, tier, http_ok, http_fail, browser_ok, browser_fail, last_http_check)
+            VALUES (?, ?, ?, ?, ?, ?, CASE WHEN ? THEN CURRENT_TIMESTAMP END)
+            ON CONFLICT(host) DO UPDATE SET
+                tier = excluded.tier,
+                http_ok = http_ok + excluded.http_ok,
+                http_fail = http_fail + excluded.http_fail,
+                browser_ok = browser_ok + excluded.browser_ok,
+                browser_fail = browser_fail + excluded.browser_fail,
+                last_http_check = COALESCE(excluded.last_http_check, last_http_check),
+                updated_at = CURRENT_TIMESTAMP
+        ''', (host, tier, *http_counts, *browser_counts, http_ok is not None))
+        self.conn.commit()
+    
+    def get_site_health(self, site: str) -> Optional[Dict]:
+        """Saúde e rendimento de um site (janelas já em listas)"""
+        self.cursor.execute('SELECT * FROM site_health WHERE site = ?', (site,))
+        row = self.cursor.fetchone()
+        return self._site_health_dict(row) if row else None
+    
+    def get_all_site_health(self) -> List[Dict]:
+        """Todos os sites, dos que rendem mais imóveis por página para os que rendem menos"""
+        self.cursor.execute('''
+            SELECT * FROM site_health 
+            ORDER BY listings_per_page IS NULL, listings_per_page DESC, success_rate DESC
+        ''')
+        return [self._site_health_dict(row) for row in self.cursor.fetchall()]
+    
+    @staticmethod
+    def _site_health_dict(row: sqlite3.Row) -> Dict:
+        result = dict(row)
+        result['recent'] = json.loads(result['recent'] or '[]')
+        result['recent_yields'] = json.loads(result['recent_yields'] or '[]')
+        return result
+    
+    def save_site_health(self, site: str, health: Dict):
+        """
+        Upsert do registo de um site
+        
+        Args:
+            site: Host
+            health: Colunas de site_health (recent/recent_yields como listas);
+                    last_success/last_attempt a True marcam o instante atual
+        """
+        self.cursor.execute('''
+            INSERT INTO site_health 
+            (site, technique, attempts, successes, success_rate, median_latency_ms,
+             listings_total, listings_per_page, recent, recent_yields, last_error,
+             last_success, last_attempt)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,
+                    CASE WHEN ? THEN CURRENT_TIMESTAMP END,
+                    CASE WHEN ? THEN CURRENT_TIMESTAMP END)
+            ON CONFLICT(site) DO UPDATE SET
+                technique = excluded.technique,
+                attempts = excluded.attempts,
+                successes = excluded.successes,
+                success_rate = excluded.success_rate,
+                median_latency_ms = excluded.median_latency_ms,
+                listings_total = excluded.listings_total,
+                listings_per_page = excluded.listings_per_page,
+                recent = excluded.recent,
+                recent_yields = excluded.recent_yields,
+                last_error = excluded.last_error,
+                last_success = COALESCE(excluded.last_success, last_success),
+                last_attempt = COALESCE(excluded.last_attempt, last_attempt),
+                updated_at = CURRENT_TIMESTAMP
+        ''', (
+            site, health.get('technique'), health.get('attempts', 0), health.get('successes', 0),
+            health.get('success_rate'), health.get('median_latency_ms'),
+            health.get('listings_total', 0), health.get('listings_per_page'),
+            json.dumps(health.get('recent') or []), json.dumps(health.get('recent_yields') or []),
+            health.get('last_error'), bool(health.get('last_success')), bool(health.get('last_attempt'))
+        ))
+        self.conn.commit()
+    
+    def get_breaker(self, site: str) -> Optional[Dict]:
+        """Circuit breaker de um site"""
+        self.cursor.execute('SELECT * FROM circuit_breakers WHERE site = ?', (site,))
+        row = self.cursor.fetchone()
+        return dict(row) if row else None
+    
+    def get_breakers(self, state: Optional[str] = None) -> List[Dict]:
+        """Todos os circuit breakers (opcionalmente só num estado)"""
+        if state:
+            self.cursor.execute('SELECT * FROM circuit_breakers WHERE state = ? ORDER BY site', (state,))
+        else:
+            self.cursor.execute('SELECT * FROM circuit_breakers ORDER BY site')
+        return [dict(row) for row in self.cursor.fetchall()]
+    
+    def save_breaker(self, site: str, url: str, state: str, failures: int,
+                     cooldown_s: float, open_until: Optional[str],
+                     status: Optional[int] = None, error: Optional[str] = None,
+                     latency_ms: Optional[float] = None):
+        """Grava o estado do circuit breaker após um health check"""
+        self.cursor.execute('''
+            INSERT INTO circuit_breakers 
+            (site, url, state, failures, cooldown_s, open_until,
+             last_status, last_error, last_latency_ms, last_checked)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(site) DO UPDATE SET
+                url = excluded.url,
+                state = excluded.state,
+                failures = excluded.failures,
+                cooldown_s = excluded.cooldown_s,
+                open_until = excluded.open_until,
+                last_status = excluded.last_status,
+                last_error = excluded.last_error,
+                last_latency_ms = excluded.last_latency_ms,
+                last_checked = CURRENT_TIMESTAMP,
+                updated_at = CURRENT_TIMESTAMP
+        ''', (site, url, state, failures, cooldown_s, open_until, status, error, latency_ms))
+        self.conn.commit()
+    
+    def enqueue_enrichment(self, items: List[Dict]) -> int:
+        """
+        Adiciona imóveis à fila de enrichment (ou atualiza a prioridade)
+        
+        Args:
+            items: Dicts com id, url e priority (score preliminar)
+            
+        Returns:
+            Número de imóveis na fila por enriquecer
+        """
+        self.cursor.executemany('''
+            INSERT INTO enrichment_queue (property_id, url, priority)
+            VALUES (?, ?, ?)
+            ON CONFLICT(property_id) DO UPDATE SET
+                url = excluded.url,
+                priority = excluded.priority,
+                updated_at = CURRENT_TIMESTAMP
+        ''', [(item['id'], item['url'], item.get('priority') or 0) for item in items])
+        self.conn.commit()
+        
+        self.cursor.execute("SELECT COUNT(*) FROM enrichment_queue WHERE status = 'pending'")
+        return self.cursor.fetchone()[0]
+    
+    def next_enrichment_batch(self, limit: int = 200, max_attempts: int = 3,
+                              refresh_days: int = 30) -> List[Dict]:
+        """
+        Próximos imóveis a enriquecer: maior score primeiro, depois os mais recentes
+        
+        Inclui imóveis enriquecidos há mais de refresh_days (o histórico de
+        preços muda).
+        """
+        self.cursor.execute('''
+            SELECT * FROM enrichment_queue 
+            WHERE (status = 'pending' AND attempts < ?)
+            OR (status = 'done' AND enriched_at < datetime('now', ?))
+            ORDER BY priority DESC, listed_at DESC
+            LIMIT ?
+        ''', (max_attempts, f'-{int(refresh_days)} days', limit))
+        return [dict(row) for row in self.cursor.fetchall()]
+    
+    def save_enrichment(self, prop_id: str, fields: Dict):
+        """
+        Junta os dados da página de detalhe ao imóvel e fecha o item da fila
+        
+        Args:
+            prop_id: ID do imóvel
+            fields: description, features, photos, price_history, days_on_market
+                    (ausentes ou vazios mantêm o valor atual)
+        """
+        values = []
+        for field in ('description', 'features', 'photos', 'price_history'):
+            val = fields.get(field) or None
+            if isinstance(val, (list, dict)):
+                val = json.dumps(val, ensure_ascii=False)
+            values.append(val)
+        
+        try:
+            self.cursor.execute('''
+                UPDATE properties SET 
+                    description = COALESCE(?, description),
+                    features = COALESCE(?, features),
+                    photos = COALESCE(?, photos),
+                    price_history = COALESCE(?, price_history),
+                    days_on_market = MAX(COALESCE(?, 0), COALESCE(days_on_market, 0)),
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', values + [fields.get('days_on_market'), prop_id])
+            self.cursor.execute('''
+                UPDATE enrichment_queue 
+                SET status = 'done', attempts = attempts + 1, last_error = NULL,
+                    enriched_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+                WHERE property_id = ?
+            ''', (prop_id,))
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+    
+    def fail_enrichment(self, prop_id: str, error: str, max_attempts: int = 3):
+        """Regista uma tentativa falhada (failed ao esgotar as tentativas)"""
+        self.cursor.execute('''
+            UPDATE enrichment_queue 
+            SET attempts = attempts + 1,
+                status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END,
+                last_error = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE property_id = ?
+        ''', (max_attempts, error, prop_id))
+        self.conn.commit()
+    
+    def get_enrichment_stats(self) -> Dict[str, int]:
+        """Número de imóveis na fila de enrichment por estado"""
+        self.cursor.execute('SELECT status, COUNT(*) as count FROM enrichment_queue GROUP BY status')
+        return {row['status']: row['count'] for row in self.cursor.fetchall()}
+    
+    def update_score(self, prop_id: str, score: int, category: str):
+        """Atualiza o score de oportunidade (ex.: após o enrichment)"""
+        self.cursor.execute('''
+            UPDATE properties SET opportunity_score = ?, opportunity_category = ?,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', (score, category, prop_id))
+        self.conn.commit()
+    
     def create_alert(self, prop_id: str, alert_type: str, message: str):
         """Cria um novo alerta"""
         self.cursor.execute('''
@@ -372,6 +1051,10 @@ class PropertyDatabase:
         self.cursor.execute('SELECT COUNT(*) FROM alerts WHERE is_read = 0')
         stats['unread_alerts'] = self.cursor.fetchone()[0]
         
+        # Fila de jobs
+        stats['jobs'] = self.get_job_stats()
+        stats['enrichment'] = self.get_enrichment_stats()
+        
         return stats
     
     def _row_to_dict(self, row: sqlite3.Row) -> Dict:
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Deduplicação - Lisboa Real Estate AI
+Resolução de entidades entre portais (o mesmo imóvel no Idealista, no
+Imovirtual, ...)
+
+O mesmo apartamento aparece com números ligeiramente diferentes em cada
+portal (250000 € / 84 m² num, 249900 € / 85 m² noutro) e apartamentos
+diferentes podem ter os mesmos números (frações iguais de um
+empreendimento). Em vez de uma chave exata:
+
+1. Blocking: só se comparam imóveis da mesma zona, tipologia e banda de
+   área; dentro do bloco, ordenados por preço, cada imóvel só é comparado
+   com os seguintes até sair da banda de preço (no máximo `window` vizinhos)
+2. Texto: título + descrição em shingles (palavras e pares de palavras),
+   assinatura MinHash de uma permutação (um hash por shingle) e LSH por
+   bandas, que encontra cópias do mesmo anúncio mesmo com o preço alterado
+3. Decisão por par: tolerâncias de preço e área, freguesia compatível e,
+   quando ambos têm descrição, semelhança mínima do texto
+4. Clusters com union-find; um cluster nunca junta dois imóveis do mesmo
+   portal (cada portal lista um imóvel uma vez)
+
+Custo O(n log n) (ordenação por bloco) mais O(n × window) comparações.
+
+Uso:
+    python dedup.py                  # clusters nos imóveis ativos da base de dados
+"""
+
+import re
+import sys
+import math
+import operator
+import zlib
+import logging
+import unicodedata
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Palavras de descrição mínimas para o texto contar como evidência (os
+# títulos são gerados por cada portal e não dizem se é o mesmo imóvel)
+MIN_DESCRIPTION_WORDS = 8
+# Palavras de título + descrição usadas (o início da descrição chega para
+# reconhecer o mesmo anúncio e limita o custo por imóvel)
+MAX_TOKENS = 200
+# Tolerâncias quando o texto é o mesmo anúncio (text_strong)
+STRONG_PRICE_TOL = 0.15
+STRONG_AREA_TOL = 0.10
+# Vizinhos (por preço) comparados com cada imóvel num bucket LSH
+LSH_NEIGHBOURS = 4
+# Área mínima considerada na largura das bandas de área (a tolerância em m²
+# pesa mais nas áreas pequenas)
+MIN_AREA_M2 = 30
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+_TYPOLOGY_RE = re.compile(r'\bt\s?(\d+)\b')
+_MAX_HASH = 1 << 32
+
+
+def normalize(text: Optional[str]) -> str:
+    """Minúsculas, sem acentos nem pontuação"""
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFKD', str(text).lower()).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(_TOKEN_RE.findall(text))
+
+
+def shingles(text: str) -> set:
+    """Palavras (2+ letras) e pares de palavras consecutivas (primeiras MAX_TOKENS palavras)"""
+    tokens = [t for t in text.split()[:MAX_TOKENS] if len(t) > 1]
+    return set(tokens) | {f"{a} {b}" for a, b in zip(tokens, tokens[1:])}
+
+
+def minhash(items: set, num_perm: int = 64) -> Optional[Tuple[int, ...]]:
+    """
+    Assinatura MinHash de uma permutação (one permutation hashing)
+
+    Cada shingle é calculado uma vez e cai num de num_perm bins (fica o
+    mínimo de cada bin); bins vazios copiam o bin seguinte não vazio
+    (densificação por rotação). Linear no número de shingles.
+    """
+    if not items:
+        return None
+    bins = [_MAX_HASH] * num_perm
+    for h in map(zlib.crc32, (item.encode('utf-8') for item in items)):
+        b = h % num_perm
+        if h < bins[b]:
+            bins[b] = h
+    # Densificação: bin vazio <- próximo bin preenchido (mais um offset por
+    # distância, para bins vazios diferentes não ficarem iguais)
+    if _MAX_HASH in bins:
+        last = max(i for i, v in enumerate(bins) if v != _MAX_HASH)
+        for i in range(last - 1, last - num_perm, -1):
+            if bins[i] == _MAX_HASH:
+                bins[i] = bins[i + 1] + _MAX_HASH
+    return tuple(bins)
+
+
+def similarity(a: Sequence[int], b: Sequence[int]) -> float:
+    """Jaccard estimado: fração de posições iguais das assinaturas"""
+    return sum(map(operator.eq, a, b)) / len(a)
+
+
+class _UnionFind:
+    """Union-find com os portais de cada cluster (no máximo um imóvel por portal)"""
+
+    def __init__(self, portals: List[str]):
+        self.parent = list(range(len(portals)))
+        self.portals = [{p} for p in portals]
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i: int, j: int) -> bool:
+        ri, rj = self.find(i), self.find(j)
+        if ri == rj or self.portals[ri] & self.portals[rj]:
+            return False
+        if len(self.portals[ri]) < len(self.portals[rj]):
+            ri, rj = rj, ri
+        self.parent[rj] = ri
+        self.portals[ri] |= self.portals[rj]
+        self.portals[rj] = set()
+        return True
+
+
+def _get(item, field: str):
+    return item.get(field) if isinstance(item, dict) else getattr(item, field, None)
+
+
+class ListingDeduplicator:
+    """
+    Deduplicação aproximada de imóveis entre portais
+
+    Args:
+        price_tol: Diferença relativa de preço aceite entre listagens do mesmo imóvel
+        area_tol: Diferença relativa de área aceite
+        area_tol_m2: Diferença absoluta de área aceite (arredondamentos dos portais)
+        text_min: Semelhança mínima do texto quando ambos têm descrição
+        text_strong: Semelhança a partir da qual o texto é o mesmo anúncio
+            (aceita STRONG_PRICE_TOL/STRONG_AREA_TOL e freguesias diferentes)
+        num_perm: Tamanho das assinaturas MinHash
+        bands: Bandas LSH (num_perm / bands linhas por banda)
+        window: Máximo de vizinhos por preço comparados com cada imóvel
+    """
+
+    def __init__(self, price_tol: float = 0.01, area_tol: float = 0.02, area_tol_m2: float = 1.5,
+                 text_min: float = 0.2, text_strong: float = 0.6, num_perm: int = 64,
+                 bands: int = 16, window: int = 32):
+        if num_perm % bands:
+            raise ValueError("num_perm tem de ser múltiplo de bands")
+        self.price_tol = price_tol
+        self.area_tol = area_tol
+        self.area_tol_m2 = area_tol_m2
+        self.text_min = text_min
+        self.text_strong = text_strong
+        self.num_perm = num_perm
+        self.bands = bands
+        self.window = window
+        self.last_stats: Dict[str, int] = {}
+
+    # ------------------------------------------------------------------
+    # Preparação
+    # ------------------------------------------------------------------
+
+    def _prepare(self, item) -> Dict:
+        title = normalize(_get(item, 'title'))
+        parish = normalize(_get(item, 'parish'))
+        typology = normalize(_get(item, 'typology')).replace(' ', '')
+        if not typology:
+            match = _TYPOLOGY_RE.search(title)
+            typology = f"t{match.group(1)}" if match else ''
+        zone = normalize(_get(item, 'municipality')) or parish or normalize(_get(item, 'location'))
+
+        description = normalize(_get(item, 'description'))
+        words = shingles(f"{title} {description}")
+        return {
+            'portal': _get(item, 'portal') or '',
+            'price': float(_get(item, 'price') or 0),
+            'area': float(_get(item, 'area_m2') or 0),
+            'parish': parish,
+            'block': (zone, typology),
+            'signature': minhash(words, self.num_perm),
+            'has_text': description.count(' ') + 1 >= MIN_DESCRIPTION_WORDS,
+        }
+
+    # ------------------------------------------------------------------
+    # Candidatos
+    # ------------------------------------------------------------------
+
+    def _price_candidates(self, records: List[Dict]) -> set:
+        """
+        Pares do mesmo bloco dentro da banda de preço (vizinhança ordenada)
+
+        Bloco = zona + tipologia + banda de área (logarítmica, da largura da
+        tolerância de área; cada imóvel entra na sua banda e na seguinte, por
+        isso áreas dentro da tolerância partilham sempre um bloco). Imóveis
+        sem preço ou sem área só são comparados pelo texto.
+        """
+        band_width = math.log1p(max(self.area_tol, self.area_tol_m2 / MIN_AREA_M2))
+        blocks: Dict[Tuple, List[int]] = defaultdict(list)
+        for i, r in enumerate(records):
+            if r['price'] > 0 and r['area'] > 0:
+                band = int(math.log(r['area']) / band_width)
+                blocks[(r['block'], band)].append(i)
+                blocks[(r['block'], band + 1)].append(i)
+
+        pairs = set()
+        for members in blocks.values():
+            members.sort(key=lambda i: records[i]['price'])
+            for pos, i in enumerate(members):
+                ceiling = records[i]['price'] * (1 + self.price_tol)
+                area = records[i]['area']
+                for j in members[pos + 1:pos + 1 + self.window]:
+                    if records[j]['price'] > ceiling:
+                        break
+                    # A banda é mais larga do que a tolerância: filtro barato antes de match_score
+                    other = records[j]['area']
+                    if abs(area - other) <= max(self.area_tol_m2, self.area_tol * max(area, other)):
+                        pairs.add((i, j) if i < j else (j, i))
+        return pairs
+
+    def _text_candidates(self, records: List[Dict]) -> set:
+        """
+        Pares do mesmo bloco (zona + tipologia) que partilham um bucket LSH
+
+        Só imóveis com descrição. Num bucket, cada imóvel é comparado com os
+        vizinhos por preço (não com todos): o custo fica linear mesmo com
+        descrições genéricas repetidas.
+        """
+        rows = self.num_perm // self.bands
+        buckets: Dict[Tuple, List[int]] = defaultdict(list)
+        for i, r in enumerate(records):
+            if not r['has_text']:
+                continue
+            sig = r['signature']
+            for band in range(self.bands):
+                buckets[(r['block'], band, sig[band * rows:(band + 1) * rows])].append(i)
+
+        pairs = set()
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            members.sort(key=lambda i: records[i]['price'])
+            for pos, i in enumerate(members):
+                for j in members[pos + 1:pos + 1 + LSH_NEIGHBOURS]:
+                    pairs.add((i, j) if i < j else (j, i))
+        return pairs
+
+    # ------------------------------------------------------------------
+    # Decisão
+    # ------------------------------------------------------------------
+
+    def match_score(self, a: Dict, b: Dict) -> Optional[float]:
+        """Pontuação do par (maior = mais provável), ou None se não é o mesmo imóvel"""
+        if a['portal'] == b['portal'] or not a['price'] or not b['price']:
+            return None
+
+        # Números primeiro (baratos), com as tolerâncias largas do texto forte
+        price_diff = abs(a['price'] - b['price']) / max(a['price'], b['price'])
+        if price_diff > STRONG_PRICE_TOL:
+            return None
+        area_diff = None
+        if a['area'] and b['area']:
+            area_diff = abs(a['area'] - b['area']) / max(a['area'], b['area'])
+            if area_diff > STRONG_AREA_TOL:
+                return None
+
+        both_text = a['has_text'] and b['has_text']
+        text = similarity(a['signature'], b['signature']) if a['signature'] and b['signature'] else 0.0
+        if both_text and text >= self.text_strong:
+            # O mesmo anúncio: preço revisto, área ou freguesia escritas de outra forma
+            return text + (1 - price_diff) + (1 - area_diff if area_diff is not None else 0.5)
+
+        if price_diff > self.price_tol or area_diff is None:
+            # Sem área dos dois lados os números não chegam
+            return None
+        if abs(a['area'] - b['area']) > max(self.area_tol_m2, self.area_tol * max(a['area'], b['area'])):
+            return None
+        if a['parish'] and b['parish'] and a['parish'] != b['parish']:
+            return None
+        if both_text and text < self.text_min:
+            # Descrições diferentes: imóveis diferentes com os mesmos números
+            return None
+        return text + (1 - price_diff) + (1 - area_diff)
+
+    # ------------------------------------------------------------------
+    # Clusters
+    # ------------------------------------------------------------------
+
+    def cluster(self, listings: Sequence) -> List[List[int]]:
+        """
+        Agrupa as listagens do mesmo imóvel
+
+        Args:
+            listings: ScrapedProperty (ou dicts com os mesmos campos)
+
+        Returns:
+            Clusters (índices em listings), pela ordem da primeira listagem de cada um
+        """
+        records = [self._prepare(item) for item in listings]
+        candidates = self._price_candidates(records) | self._text_candidates(records)
+
+        scored = []
+        for i, j in candidates:
+            score = self.match_score(records[i], records[j])
+            if score is not None:
+                scored.append((score, i, j))
+        # Os pares mais fortes primeiro: a restrição de um imóvel por portal
+        # fica com a melhor correspondência
+        scored.sort(reverse=True)
+
+        uf = _UnionFind([r['portal'] for r in records])
+        merged = sum(uf.union(i, j) for _, i, j in scored)
+
+        clusters: Dict[int, List[int]] = {}
+        for i in range(len(records)):
+            clusters.setdefault(uf.find(i), []).append(i)
+
+        self.last_stats = {
+            'listings': len(records),
+            'candidates': len(candidates),
+            'matches': len(scored),
+            'merged': merged,
+            'clusters': len(clusters),
+        }
+        return list(clusters.values())
+
+    @staticmethod
+    def _completeness(item) -> tuple:
+        return (
+            bool(_get(item, 'area_m2')),
+            len(_get(item, 'description') or ''),
+            len(_get(item, 'photos') or []),
+            len(_get(item, 'features') or []),
+        )
+
+    def deduplicate(self, listings: Sequence) -> List:
+        """
+        Uma listagem por imóvel (a mais completa de cada cluster)
+
+        Listagens com o mesmo ID (a mesma página vista duas vezes) são
+        sempre a mesma.
+        """
+        by_id: Dict = {}
+        for item in listings:
+            by_id.setdefault(_get(item, 'id') or id(item), item)
+        unique_ids = list(by_id.values())
+
+        result = [max((unique_ids[i] for i in members), key=self._completeness)
+                  for members in self.cluster(unique_ids)]
+
+        stats = self.last_stats
+        logger.info(f"Deduplicação: {len(listings)} listagens -> {len(result)} imóveis "
+                    f"({len(listings) - len(unique_ids)} repetidas, {stats['merged']} entre portais; "
+                    f"{stats['candidates']} pares comparados)")
+        return result
+
+
+def main():
+    """Clusters de duplicados nos imóveis ativos da base de dados"""
+    from database import PropertyDatabase
+
+    logging.basicConfig(level=logging.INFO)
+    with PropertyDatabase() as db:
+        rows = db.get_properties(status='active', limit=1_000_000)
+
+    deduplicator = ListingDeduplicator()
+    clusters = [c for c in deduplicator.cluster(rows) if len(c) > 1]
+    print(f"{len(rows)} imóveis, {len(clusters)} com listagens em vários portais")
+    for members in clusters[:50]:
+        print("-" * 60)
+        for i in members:
+            r = rows[i]
+            print(f"  {r['portal']:<12} {r['price'] or 0:>10.0f} € {r['area_m2'] or 0:>6.0f} m²  "
+                  f"{(r['title'] or '')[:50]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
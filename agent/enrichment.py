@@ -0,0 +1,187 @@
+"""
+Enrichment - Lisboa Real Estate AI
+Visita as páginas de detalhe dos imóveis, por ordem de prioridade
+
+As listagens só trazem título, preço, área e localização. Descrição,
+características, fotos, data de publicação e histórico de preços (que o
+score usa) estão na página de detalhe. Os imóveis encontrados entram numa
+fila em SQLite (enrichment_queue) com o score preliminar como prioridade;
+o enricher visita primeiro os de maior score e, no mesmo score, os mais
+recentes. Com o tempo de crawl limitado, os mais valiosos ficam completos.
+
+As páginas são obtidas pelo fetcher em camadas (cache HTTP, rate limit por
+host) e o parse corre no pool de processos (adapter 'detail_page').
+"""
+
+import time
+import asyncio
+import logging
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_for_enrichment(db, properties: List) -> int:
+    """
+    Adiciona imóveis analisados à fila de enrichment
+
+    Args:
+        db: PropertyDatabase
+        properties: Objetos com id, url e opportunity_score
+
+    Returns:
+        Número de imóveis na fila por enriquecer
+    """
+    pending = db.enqueue_enrichment([
+        {'id': prop.id, 'url': prop.url, 'priority': prop.opportunity_score}
+        for prop in properties if prop.url
+    ])
+    metrics.set_gauge('queue_depth', pending, queue='enrichment')
+    return pending
+
+
+def merge_fields(record: Dict, today: Optional[date] = None) -> Dict:
+    """
+    Registo do adapter detail_page -> campos da base de dados
+
+    O histórico de preços fica por ordem cronológica, com a variação (%)
+    face ao preço anterior em 'change' (o formato usado pelo score).
+    """
+    history = sorted(record.get('price_history') or [], key=lambda h: h.get('date') or '')
+    previous = None
+    for entry in history:
+        price = entry['price']
+        entry['change'] = round((price - previous) / previous * 100, 2) if previous else 0
+        previous = price
+
+    days_on_market = None
+    if record.get('published_at'):
+        published = datetime.fromisoformat(record['published_at']).date()
+        days_on_market = max(((today or date.today()) - published).days, 0)
+
+    return {
+        'description': record.get('description'),
+        'features': record.get('features'),
+        'photos': record.get('photos'),
+        'price_history': history,
+        'days_on_market': days_on_market,
+    }
+
+
+class DetailEnricher:
+    """
+    Enriquecimento concorrente das páginas de detalhe
+
+    Args:
+        db: PropertyDatabase (fila enrichment_queue e imóveis)
+        fetcher: TieredFetcher (criado com a mesma base de dados se omitido)
+        max_concurrency: Páginas de detalhe em simultâneo
+        per_host_limit: Máximo em simultâneo por host
+        max_attempts: Tentativas por imóvel antes de ficar 'failed'
+    """
+
+    def __init__(self, db, fetcher=None, max_concurrency: int = 6,
+                 per_host_limit: int = 2, max_attempts: int = 3):
+        self.db = db
+        self.fetcher = fetcher
+        self.max_concurrency = max_concurrency
+        self.per_host_limit = per_host_limit
+        self.max_attempts = max_attempts
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+
+    def _get_fetcher(self):
+        if self.fetcher is None:
+            from fetcher import TieredFetcher
+            self.fetcher = TieredFetcher(db=self.db)
+        return self.fetcher
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._hosts[host]
+
+    async def enrich_one(self, item: Dict) -> bool:
+        """Visita a página de detalhe de um item da fila e grava o resultado"""
+        prop_id, url = item['property_id'], item['url']
+
+        try:
+            # markers=(): páginas de detalhe não têm os marcadores de listagem
+            records = await self._get_fetcher().fetch_parsed(url, adapter='detail_page', markers=(),
+                                                             listing=False)
+        except Exception as e:
+            logger.warning(f"Enrichment {prop_id}: {e}")
+            records, error = None, str(e)
+        else:
+            error = "página não obtida" if records is None else "sem dados de detalhe"
+
+        if not records:
+            self.db.fail_enrichment(prop_id, error, self.max_attempts)
+            metrics.inc('enrichment_total', status='failed')
+            return False
+
+        try:
+            fields = merge_fields(records[0])
+        except (ValueError, TypeError, KeyError) as e:
+            # Registo mal formado (ex.: data inválida em cache): falha só este imóvel
+            logger.warning(f"Enrichment {prop_id}: dados de detalhe inválidos: {e}")
+            self.db.fail_enrichment(prop_id, f"dados inválidos: {e}", self.max_attempts)
+            metrics.inc('enrichment_total', status='failed')
+            return False
+
+        self.db.save_enrichment(prop_id, fields)
+        metrics.inc('enrichment_total', status='done')
+        return True
+
+    async def run(self, limit: int = 200, time_budget_s: Optional[float] = None,
+                  on_enriched: Optional[Callable[[str], None]] = None) -> Dict[str, int]:
+        """
+        Enriquece os próximos imóveis da fila
+
+        Args:
+            limit: Máximo de imóveis nesta execução
+            time_budget_s: Depois deste tempo não começa páginas novas
+                (as que estão a meio terminam)
+            on_enriched: Chamado com o ID de cada imóvel enriquecido
+
+        Returns:
+            Dict com enriquecidos, falhados e adiados (fora do tempo)
+        """
+        items = self.db.next_enrichment_batch(limit, self.max_attempts)
+        counts = {'enriched': 0, 'failed': 0, 'deferred': 0}
+        if not items:
+            return counts
+
+        # Já ordenados por prioridade: cada worker tira o próximo da fila
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in items:
+            queue.put_nowait(item)
+
+        deadline = time.monotonic() + time_budget_s if time_budget_s else None
+        self._hosts = {}
+        logger.info(f"Enrichment: {len(items)} páginas de detalhe "
+                    f"(máx. {self.max_concurrency} em paralelo, {self.per_host_limit} por host)")
+
+        async def worker():
+            while not queue.empty():
+                if deadline and time.monotonic() >= deadline:
+                    return
+                item = queue.get_nowait()
+                async with self._host_semaphore(item['url']):
+                    ok = await self.enrich_one(item)
+                counts['enriched' if ok else 'failed'] += 1
+                metrics.set_gauge('queue_depth', queue.qsize(), queue='enrichment')
+                if ok and on_enriched:
+                    on_enriched(item['property_id'])
+
+        with metrics.timer('stage_seconds', stage='enrich'):
+            await asyncio.gather(*(worker() for _ in range(min(self.max_concurrency, len(items)))))
+
+        counts['deferred'] = queue.qsize()
+        if counts['deferred']:
+            logger.info(f"Enrichment: tempo esgotado, {counts['deferred']} imóveis ficam para o próximo ciclo")
+        return counts
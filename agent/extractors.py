@@ -0,0 +1,222 @@
+"""
+Extractors - Lisboa Real Estate AI
+Extração de preço, área, tipologia e localização a partir de texto
+
+Padrões compilados uma vez e partilhados por todos os scrapers. Os números
+seguem o formato português:
+
+- "250.000 €", "1.250.000€", "€ 250 000" -> 250000
+- "250.000,50 €" -> 250000.5
+- "1,2 milhões €", "1,2 M€", "250 mil €" -> 1200000, 1200000, 250000
+- "85,5 m²", "120 m2", "90 metros quadrados" -> 85.5, 120, 90
+"""
+
+import re
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Número: grupos de milhares com o mesmo separador ('.' ou espaço) e decimal
+# opcional (','), ou dígitos seguidos com decimal opcional (',' ou '.' com
+# 1-2 casas). Separadores misturados não formam um número ("Piso 2 150.000€"
+# -> 150000). Começa num dígito que não segue letra, dígito, '.' ou ','
+# ("T2 199 900 €" -> 199900). O [0-9] inicial deixa o re saltar logo para o
+# dígito seguinte.
+_NUMBER = (r'[0-9](?<![\w.,][0-9])'
+           '(?:[0-9]{0,2}(?:(?:\\.[0-9]{3})+|(?:[ \u00a0\u202f][0-9]{3})+)(?:,[0-9]+)?'
+           r'|[0-9]*(?:,[0-9]+|\.[0-9]{1,2}(?![0-9]))?)')
+_MULTIPLIER = r'[Mm]il(?:h(?:ões|ão|oes|ao))?|M(?=\s*€)'
+# Depois da moeda o "M" já não é seguido de "€" ("€ 1.2M", "€ 1,2 M")
+_PREFIX_MULTIPLIER = r'[Mm]il(?:h(?:ões|ão|oes|ao))?|M\b'
+
+# Sem re.IGNORECASE (bastante mais lento em re): maiúsculas explícitas, e
+# tipologia/concelho procurados no texto em minúsculas
+PRICE_RE = re.compile(
+    rf'(?P<n>{_NUMBER})\s*(?:(?P<m>{_MULTIPLIER})\s*(?:de\s+)?)?(?:€|EUR\b|[Ee]uros?\b)'
+)
+# Moeda antes do número ("€ 250 000", "EUR 300.000")
+PRICE_PREFIX_RE = re.compile(
+    rf'(?:€|EUR\b|[Ee]ur\b)\s*(?P<n>{_NUMBER})(?:\s*(?P<m>{_PREFIX_MULTIPLIER}))?'
+)
+AREA_RE = re.compile(
+    rf'(?P<n>{_NUMBER})\s*(?:m²|[mM]2\b|m\s2\b|mts?2\b|[mM]etros(?:\s+quadrados)?\b)'
+)
+TYPOLOGY_RE = re.compile(
+    r'\bt\s?(?P<rooms>\d{1,2})(?:\s?\+\s?\d)?\b'
+    r'|\b(?P<studio>est[uú]dio)\b'
+    r'|\b(?P<kind>moradia|vivenda|apartamento|loja|armaz[ée]m|terreno|pr[ée]dio|quinta|escrit[óo]rio|garagem)\b'
+)
+
+# Nomes canónicos dos tipos de imóvel (chave sem acentos, minúsculas)
+_KINDS = {
+    'moradia': 'Moradia',
+    'vivenda': 'Moradia',
+    'apartamento': 'Apartamento',
+    'loja': 'Loja',
+    'armazem': 'Armazém',
+    'terreno': 'Terreno',
+    'predio': 'Prédio',
+    'quinta': 'Quinta',
+    'escritorio': 'Escritório',
+    'garagem': 'Garagem',
+}
+
+# Concelhos reconhecidos (Área Metropolitana de Lisboa e Porto)
+MUNICIPALITIES = (
+    'Lisboa', 'Oeiras', 'Cascais', 'Sintra', 'Amadora', 'Loures', 'Odivelas',
+    'Vila Franca de Xira', 'Mafra', 'Almada', 'Seixal', 'Barreiro', 'Moita',
+    'Montijo', 'Alcochete', 'Palmela', 'Setúbal', 'Sesimbra', 'Porto',
+)
+LOCATION_RE = re.compile(
+    r'\b(' + '|'.join(re.escape(m.lower()) for m in sorted(MUNICIPALITIES, key=len, reverse=True)) + r')\b'
+)
+_MUNICIPALITY_BY_KEY = {m.lower(): m for m in MUNICIPALITIES}
+
+_GROUPED_RE = re.compile(r'\d{1,3}(?:\.\d{3})+')
+_BARE_NUMBER_RE = re.compile(_NUMBER)
+_SPACES_RE = re.compile(r'[ \u00a0\u202f]')
+_ACCENTS = str.maketrans('áéíóúãõâêôç', 'aeiouaoaeoc')
+
+
+@dataclass
+class ExtractedFields:
+    """Campos extraídos de um texto (None quando não encontrados)"""
+    price: Optional[float] = None
+    area_m2: Optional[float] = None
+    typology: Optional[str] = None
+    location: Optional[str] = None
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+
+def parse_number(text: str) -> Optional[float]:
+    """
+    Converte um número em formato português
+
+    "250.000" -> 250000, "250 000" -> 250000, "85,5" -> 85.5, "1.5" -> 1.5
+    """
+    if not text:
+        return None
+    value = _SPACES_RE.sub('', text)
+    if ',' in value:
+        value = value.replace('.', '').replace(',', '.')
+    elif _GROUPED_RE.fullmatch(value):
+        value = value.replace('.', '')
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _apply_multiplier(value: Optional[float], multiplier: Optional[str]) -> Optional[float]:
+    if value is None or not multiplier:
+        return value
+    multiplier = multiplier.lower()
+    if multiplier == 'mil':
+        return value * 1_000
+    return value * 1_000_000  # milhões / milhão / M€
+
+
+def extract_price(text: str, require_currency: bool = True) -> Optional[float]:
+    """
+    Primeiro preço em euros do texto
+
+    Args:
+        text: Texto livre ou conteúdo do elemento de preço
+        require_currency: False aceita um número sem "€" (elemento só com o preço)
+    """
+    if not text:
+        return None
+
+    match = PRICE_RE.search(text)
+    # Moeda antes do número, só se aparecer antes do primeiro "<n> €"
+    prefixed = PRICE_PREFIX_RE.search(text, 0, match.start() if match else len(text))
+    match = prefixed or match
+    if match:
+        return _apply_multiplier(parse_number(match.group('n')), match.group('m'))
+
+    if require_currency:
+        return None
+    bare = _BARE_NUMBER_RE.search(text)
+    return parse_number(bare.group(0)) if bare else None
+
+
+def extract_area(text: str) -> Optional[float]:
+    """Primeira área em m² do texto"""
+    if not text:
+        return None
+    match = AREA_RE.search(text)
+    return parse_number(match.group('n')) if match else None
+
+
+def extract_typology(text: str) -> Optional[str]:
+    """
+    Tipologia (T0..Tn) ou tipo de imóvel
+
+    Uma tipologia T tem prioridade sobre o tipo ("Apartamento T2" -> "T2").
+    """
+    return _typology(text.lower()) if text else None
+
+
+def _typology(lower: str) -> Optional[str]:
+    kind = None
+    for match in TYPOLOGY_RE.finditer(lower):
+        if match.group('rooms') is not None:
+            return f"T{int(match.group('rooms'))}"
+        if match.group('studio'):
+            return 'T0'
+        if kind is None:
+            kind = _KINDS.get(match.group('kind').translate(_ACCENTS))
+    return kind
+
+
+def extract_location(text: str) -> Optional[str]:
+    """Primeiro concelho conhecido mencionado no texto"""
+    return _location(text.lower()) if text else None
+
+
+def _location(lower: str) -> Optional[str]:
+    match = LOCATION_RE.search(lower)
+    return _MUNICIPALITY_BY_KEY[match.group(1)] if match else None
+
+
+def split_location(location: str, default_municipality: str = "Lisboa") -> Tuple[str, str]:
+    """Separa "Freguesia, Concelho" em (freguesia, concelho)"""
+    parts = [p.strip() for p in (location or '').split(',') if p.strip()]
+    if len(parts) >= 2:
+        return parts[0], parts[-1]
+    location = (location or '').strip()
+    return location, extract_location(location) or default_municipality
+
+
+def extract(text: str) -> ExtractedFields:
+    """Todos os campos de um texto"""
+    return ExtractedFields(
+        price=extract_price(text),
+        area_m2=extract_area(text),
+        typology=extract_typology(text),
+        location=extract_location(text),
+    )
+
+
+def extract_fields(texts: Iterable[str]) -> List[ExtractedFields]:
+    """
+    Extração em lote (um resultado por texto, pela mesma ordem)
+
+    Args:
+        texts: Textos de cards/listagens
+
+    Returns:
+        Lista de ExtractedFields
+    """
+    results = []
+    for text in texts:
+        if not text:
+            results.append(ExtractedFields())
+            continue
+        # Minúsculas uma vez por texto, para a tipologia e o concelho
+        lower = text.lower()
+        results.append(ExtractedFields(
+            extract_price(text), extract_area(text), _typology(lower), _location(lower)
+        ))
+    return results
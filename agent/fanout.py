@@ -0,0 +1,210 @@
+"""
+Fan-out - Lisboa Real Estate AI
+Pesquisa concorrente numa matriz localização × tipologia × portal
+
+As pesquisas começam pelos portais que mais imóveis rendem e o número de
+páginas por portal segue o registo de saúde (site_registry): um portal que
+não devolve nada há várias páginas só é testado com uma.
+"""
+
+import asyncio
+import logging
+import time
+from typing import List, Dict, Optional, Callable
+from dataclasses import dataclass, field
+from itertools import product
+
+from metrics import metrics
+
+try:
+    from scrapers_v2 import MultiPortalScraper, ScrapedProperty, StealthScraper
+except ImportError:
+    from scrapers import MultiPortalScraper, ScrapedProperty
+    StealthScraper = None
+
+logger = logging.getLogger(__name__)
+
+# Concelhos da Grande Lisboa usados por omissão
+DEFAULT_LOCATIONS = ['lisboa', 'cascais', 'oeiras', 'sintra', 'amadora', 'loures', 'almada']
+
+
+@dataclass
+class CellResult:
+    """Resultado de uma célula da matriz (localização, tipologia, portal)"""
+    location: str
+    typology: str
+    portal: str
+    properties: List[ScrapedProperty] = field(default_factory=list)
+    latency_s: float = 0.0
+    error: Optional[str] = None
+    pages: int = 0  # páginas carregadas (0 = desconhecido)
+
+    @property
+    def key(self) -> str:
+        return f"{self.portal}|{self.location}|{self.typology or '*'}"
+
+
+class FanoutSearch:
+    """
+    Executa pesquisas em paralelo sobre várias localizações e tipologias
+
+    - Limite global de pesquisas simultâneas (max_concurrency)
+    - Limite por host (per_host_limit) para não sobrecarregar cada portal
+    - Resultados agregados à medida que cada célula termina
+    - Ordem e páginas por portal decididas pelo SiteRegistry
+    """
+
+    def __init__(self,
+                 scraper: Optional[MultiPortalScraper] = None,
+                 max_concurrency: int = 4,
+                 per_host_limit: int = 2,
+                 registry=None):
+        self.scraper = scraper or MultiPortalScraper()
+        self.registry = registry
+        self.max_concurrency = max_concurrency
+        self.per_host_limit = per_host_limit
+        self.cells: List[CellResult] = []
+        self._global = None
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+
+    def _get_registry(self):
+        if self.registry is None:
+            from site_registry import SiteRegistry
+            self.registry = SiteRegistry()
+        return self.registry
+
+    def _host_semaphore(self, portal: str) -> asyncio.Semaphore:
+        """Semáforo do host do portal (criado na primeira utilização)"""
+        host = self.scraper.host_for(portal)
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._hosts[host]
+
+    async def _run_cell(self, location: str, typology: str, portal: str,
+                        max_pages: int, search_kwargs: Dict) -> CellResult:
+        """Executa uma célula respeitando os limites global e por host"""
+        cell = CellResult(location=location, typology=typology, portal=portal)
+
+        # Host primeiro: células à espera de um portal saturado não ocupam vagas globais
+        async with self._host_semaphore(portal), self._global:
+            start = time.perf_counter()
+            try:
+                kwargs = {'location': location, 'typology': typology,
+                          'max_pages': max_pages, **search_kwargs}
+                # Cada célula tem o seu contexto (sessão) no browser partilhado do pool
+                stealth = None
+                if StealthScraper is not None and hasattr(self.scraper, 'stealth'):
+                    stealth = kwargs['stealth'] = StealthScraper()
+                cell.properties = await self.scraper.search_portal(portal, **kwargs)
+                if stealth is not None:
+                    cell.pages = stealth.pages_fetched
+            except Exception as e:
+                logger.error(f"Erro em {cell.key}: {e}")
+                cell.error = str(e)
+            cell.latency_s = time.perf_counter() - start
+
+        return cell
+
+    async def search_matrix(self,
+                            locations: List[str],
+                            typologies: Optional[List[str]] = None,
+                            portals: Optional[List[str]] = None,
+                            max_pages: int = 3,
+                            on_result: Optional[Callable[[CellResult], None]] = None,
+                            **search_kwargs) -> Dict[str, List[ScrapedProperty]]:
+        """
+        Pesquisa todas as combinações localização × tipologia × portal
+
+        Args:
+            locations: Localizações (ex: ["lisboa", "cascais"])
+            typologies: Tipologias (ex: ["t1", "t2"]); vazio = todas
+            portals: Portais a usar; por omissão todos os suportados
+            max_pages: Máximo de páginas por pesquisa (reduzido nos portais que não rendem)
+            on_result: Callback chamado por cada célula concluída
+            search_kwargs: Passados a search_portal (ex: checkpointer)
+
+        Returns:
+            Dict com resultados por portal (mesmo formato que search_all)
+        """
+        typologies = typologies or [""]
+        portals = portals or self.scraper.portals
+
+        self._global = asyncio.Semaphore(self.max_concurrency)
+        self._hosts = {}
+        self.cells = []
+
+        registry = self._get_registry()
+        pages = {portal: registry.page_budget(self.scraper.host_for(portal), max_pages)
+                 for portal in portals}
+        # Portais com mais imóveis por pesquisa primeiro (estável: mesma ordem nos empates)
+        cells = registry.order(product(locations, typologies, portals),
+                               lambda cell: self.scraper.host_for(cell[2]))
+
+        tasks = [
+            asyncio.ensure_future(self._run_cell(loc, typ, portal, pages[portal], search_kwargs))
+            for loc, typ, portal in cells
+        ]
+        logger.info(f"Fan-out: {len(tasks)} pesquisas "
+                    f"(máx. {self.max_concurrency} em paralelo, {self.per_host_limit} por host)")
+
+        results: Dict[str, List[ScrapedProperty]] = {portal: [] for portal in portals}
+        metrics.set_gauge('queue_depth', len(tasks), queue='fanout')
+
+        for next_done in asyncio.as_completed(tasks):
+            cell = await next_done
+            self.cells.append(cell)
+            results[cell.portal].extend(cell.properties)
+            metrics.set_gauge('queue_depth', len(tasks) - len(self.cells), queue='fanout')
+            if cell.error:
+                metrics.inc('errors_total', component='fanout', portal=cell.portal)
+
+            # Latência de uma pesquisa de várias páginas não é comparável à de uma página
+            host = self.scraper.host_for(cell.portal)
+            registry.record(host, cell.error is None, error=cell.error)
+            if cell.error is None:
+                # Por página de facto carregada (resultados que cabem numa página não
+                # contam como 1/N do rendimento); sem contagem, o orçamento de páginas
+                crawled = cell.pages or pages[cell.portal]
+                registry.record_listings(host, round(len(cell.properties) / crawled))
+
+            logger.info(f"{cell.key}: {len(cell.properties)} imóveis em {cell.latency_s:.1f}s")
+            if on_result:
+                on_result(cell)
+
+        return results
+
+    def latency_report(self) -> List[Dict]:
+        """Latência e contagem por célula, da mais lenta para a mais rápida"""
+        return [
+            {
+                'portal': cell.portal,
+                'location': cell.location,
+                'typology': cell.typology,
+                'properties': len(cell.properties),
+                'latency_s': round(cell.latency_s, 3),
+                'error': cell.error,
+            }
+            for cell in sorted(self.cells, key=lambda c: c.latency_s, reverse=True)
+        ]
+
+
+async def main():
+    """Teste do fan-out"""
+    logging.basicConfig(level=logging.INFO)
+
+    fanout = FanoutSearch(max_concurrency=4, per_host_limit=2)
+    results = await fanout.search_matrix(
+        locations=DEFAULT_LOCATIONS[:4],
+        typologies=['t1', 't2'],
+        max_pages=1
+    )
+
+    total = sum(len(props) for props in results.values())
+    logger.info(f"Total: {total} imóveis")
+
+    for row in fanout.latency_report():
+        print(f"{row['portal']:<12} {row['location']:<10} {row['typology'] or '*':<8} "
+              f"{row['properties']:>4} imóveis  {row['latency_s']:>7.2f}s")
+
+if __name__ == "__main__":
+    asyncio.run(main())
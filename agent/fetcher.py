@@ -0,0 +1,370 @@
+"""
+Fetcher - Lisboa Real Estate AI
+Fetch em camadas: HTTP simples primeiro, browser só quando é preciso
+
+Cada página é pedida primeiro com um GET HTTP (barato) e a resposta é
+validada com os marcadores de listagem do site. Se a resposta não serve
+(bloqueio, captcha, conteúdo gerado por JavaScript), o pedido passa para o
+browser partilhado (browser_pool). A decisão fica gravada por site na base
+de dados: sites que precisam de browser vão diretos ao browser, com uma
+nova tentativa HTTP de tempos a tempos (os sites mudam).
+
+As respostas passam pela cache em disco (http_cache): pedidos HTTP são
+condicionais e uma página idêntica à anterior reutiliza os imóveis já
+extraídos (fetch_parsed).
+
+Cada fetch fica no registo de saúde dos sites (site_registry): técnica,
+sucesso, latência e imóveis por página. O timeout HTTP de cada site segue a
+latência registada (sites rápidos não esperam 20s por um pedido pendurado).
+"""
+
+import time
+import random
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+from urllib.parse import urlparse
+
+from metrics import metrics
+from ratelimit import THROTTLE_STATUSES, host_limiter, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+TIER_HTTP = 'http'
+TIER_BROWSER = 'browser'
+
+# Marcadores de uma página de listagem válida, por host (basta um)
+SITE_MARKERS: Dict[str, Sequence[str]] = {
+    'www.idealista.pt': ('item-link', 'item-price'),
+    'www.imovirtual.pt': ('data-cy="listing-item"',),
+    'casa.sapo.pt': ('property-info',),
+    'www.supercasa.pt': ('property',),
+    'www.leilosoc.com': ('property', 'imovel', 'leilao'),
+}
+
+# Páginas de bloqueio / desafio anti-bot
+BLOCK_MARKERS = (
+    'geo.captcha-delivery.com',
+    'cf-browser-verification',
+    'challenge-platform',
+    'Attention Required! | Cloudflare',
+    'px-captcha',
+    'Access Denied',
+)
+
+# Sem marcadores do site: abaixo disto é uma página vazia ou de erro
+MIN_HTML_BYTES = 2048
+
+
+@dataclass
+class FetchResult:
+    """Resultado de um fetch"""
+    url: str
+    html: Optional[str]
+    status: Optional[int]
+    tier: str
+    elapsed_s: float = 0.0
+    ok: bool = False
+    body_hash: Optional[str] = None
+    unchanged: bool = False
+    retry_after: Optional[float] = None
+
+
+def looks_valid(html: Optional[str], url: str,
+                markers: Optional[Sequence[str]] = None) -> bool:
+    """
+    Verifica se o HTML é uma página de listagem utilizável
+
+    Args:
+        html: Conteúdo da resposta
+        url: URL pedido (escolhe os marcadores do site)
+        markers: Marcadores explícitos (por omissão os do site)
+
+    Returns:
+        True se não há sinais de bloqueio e existe um marcador do site
+    """
+    if not html:
+        return False
+    if any(marker in html for marker in BLOCK_MARKERS):
+        return False
+
+    markers = markers if markers is not None else SITE_MARKERS.get(urlparse(url).netloc)
+    if markers:
+        return any(marker in html for marker in markers)
+    return len(html) >= MIN_HTML_BYTES
+
+
+class TieredFetcher:
+    """
+    Fetch HTTP com escalada para o browser, decidida e memorizada por site
+
+    Args:
+        db: PropertyDatabase (tabela fetch_strategy); criada se omitida
+        session: Sessão aiohttp (por omissão a do processo, http_client)
+        min_interval: Intervalo mínimo entre pedidos ao mesmo host
+        recheck_hours: Sites em modo browser voltam a testar HTTP após este tempo
+        timeout_s: Timeout do pedido HTTP
+        cache: HttpCache (por omissão a global; use_cache=False para desligar)
+        registry: SiteRegistry (por omissão sobre a mesma base de dados)
+    """
+
+    def __init__(self, db=None, session=None, min_interval: float = 1.0,
+                 recheck_hours: float = 168, timeout_s: float = 20,
+                 cache=None, use_cache: bool = True, registry=None):
+        self.db = db
+        self.registry = registry
+        self.session = session
+        self.min_interval = min_interval
+        self.recheck_hours = recheck_hours
+        self.timeout_s = timeout_s
+        if cache is None and use_cache:
+            from http_cache import get_http_cache
+            cache = get_http_cache()
+        self.cache = cache
+        self._own_db = db is None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def close(self):
+        """Fecha a base de dados, se foi criada aqui (a sessão é partilhada)"""
+        if self._own_db and self.db is not None:
+            self.db.close()
+            self.db = None
+
+    def _get_db(self):
+        if self.db is None:
+            from database import PropertyDatabase
+            self.db = PropertyDatabase()
+        return self.db
+
+    def _get_registry(self):
+        if self.registry is None:
+            from site_registry import SiteRegistry
+            self.registry = SiteRegistry(db=self._get_db())
+        return self.registry
+
+    def _get_session(self):
+        if self.session is not None:
+            return self.session
+        from http_client import get_http_session
+        return get_http_session()
+
+    # ------------------------------------------------------------------
+    # Estratégia por site
+    # ------------------------------------------------------------------
+
+    def _should_try_http(self, host: str) -> bool:
+        """HTTP primeiro, exceto em sites já marcados como browser (até ao recheck)"""
+        strategy = self._get_db().get_fetch_strategy(host)
+        if strategy is None or strategy['tier'] == TIER_HTTP:
+            return True
+        if not strategy['last_http_check']:
+            return True
+        last_check = datetime.fromisoformat(strategy['last_http_check'])
+        return datetime.utcnow() - last_check >= timedelta(hours=self.recheck_hours)
+
+    # ------------------------------------------------------------------
+    # Fetch
+    # ------------------------------------------------------------------
+
+    async def fetch(self, url: str, markers: Optional[Sequence[str]] = None) -> FetchResult:
+        """
+        Obtém o HTML de uma página pela camada mais barata que funciona
+
+        Args:
+            url: URL a carregar
+            markers: Marcadores de conteúdo válido (por omissão os do site)
+
+        Returns:
+            FetchResult (html None se nenhuma camada funcionou)
+        """
+        host = urlparse(url).netloc
+        # Vaga e ritmo adaptativos do host (AIMD, ver ratelimit); min_interval é o ritmo inicial
+        async with host_limiter.slot(url, min_interval=self.min_interval):
+            result = await self._fetch_tiered(url, host, markers)
+        self._get_registry().record(
+            host, result.ok, result.elapsed_s, technique=result.tier,
+            error=None if result.ok else f"{result.tier}: status {result.status}"
+        )
+        return result
+
+    async def _fetch_tiered(self, url: str, host: str,
+                            markers: Optional[Sequence[str]]) -> FetchResult:
+        db = self._get_db()
+
+        if self._should_try_http(host):
+            result = await self._fetch_http(url, markers)
+            if result.ok:
+                db.save_fetch_strategy(host, TIER_HTTP, http_ok=True)
+                return result
+            if result.status in THROTTLE_STATUSES or result.retry_after is not None:
+                # O site pediu para abrandar: não é falha do HTTP nem motivo para
+                # mudar de camada; o bloqueio AIMD (Retry-After) atrasa a nova tentativa
+                logger.info(f"{host}: status {result.status}, a respeitar o Retry-After")
+                return result
+
+            logger.info(f"{host}: HTTP insuficiente (status {result.status}), a usar browser")
+            metrics.inc('fetch_escalations_total', host=host)
+            result = await self._fetch_browser(url, markers)
+            db.save_fetch_strategy(host, TIER_BROWSER if result.ok else TIER_HTTP,
+                                   http_ok=False, browser_ok=result.ok)
+            return result
+
+        result = await self._fetch_browser(url, markers)
+        db.save_fetch_strategy(host, TIER_BROWSER, browser_ok=result.ok)
+        return result
+
+    async def fetch_parsed(self, url: str, adapter: str,
+                           markers: Optional[Sequence[str]] = None,
+                           listing: bool = True, **context) -> Optional[List[Dict]]:
+        """
+        Obtém a página e extrai os imóveis, saltando o parse se não mudou
+
+        O parse corre no pool de processos (parse_pool), fora do event loop.
+
+        Args:
+            url: URL a carregar
+            adapter: Nome do adapter do site (site_adapters)
+            markers: Ver fetch
+            listing: Página de listagem (conta para os imóveis por página do site)
+            context: Argumentos extra do adapter
+
+        Returns:
+            Lista de dicts, ou None se a página não foi obtida
+        """
+        from parse_pool import get_parse_pool
+        from site_adapters import get_adapter
+
+        cache_key = get_adapter(adapter).cache_key
+        result = await self.fetch(url, markers)
+        if not result.ok:
+            return None
+
+        items = None
+        if self.cache is not None and result.unchanged:
+            items = self.cache.get_parsed(result.body_hash, cache_key)
+            if items is not None:
+                logger.debug(f"{url}: página sem alterações, {len(items)} imóveis da cache")
+
+        if items is None:
+            items = await get_parse_pool().parse(adapter, result.html, **context)
+            if self.cache is not None and result.body_hash:
+                self.cache.put_parsed(result.body_hash, cache_key, items)
+
+        if listing:
+            self._get_registry().record_listings(urlparse(url).netloc, len(items))
+        return items
+
+    async def _fetch_http(self, url: str, markers: Optional[Sequence[str]],
+                          revalidate: bool = True) -> FetchResult:
+        """GET simples com headers de browser (condicional se a página está em cache)"""
+        import aiohttp
+        from fixtures import RECORD, fixture_mode, record_response, replay_url
+        from scrapers_v2 import USER_AGENTS
+
+        headers = {
+            'User-Agent': random.choice(USER_AGENTS),
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'pt-PT,pt;q=0.9,en-US;q=0.8,en;q=0.7',
+            'Referer': 'https://www.google.com/',
+        }
+        # A gravar fixtures: pedido completo (um 304 não deixa corpo para o replay)
+        if self.cache is not None and revalidate and fixture_mode() != RECORD:
+            headers.update(self.cache.conditional_headers(url))
+
+        host = urlparse(url).netloc
+        timeout_s = self._get_registry().timeout_for(host, self.timeout_s)
+        start = time.perf_counter()
+        status, html, validators, retry_after = None, None, {}, None
+        try:
+            with metrics.timer('page_fetch_seconds', host=host, tier=TIER_HTTP):
+                async with self._get_session().get(
+                    await replay_url(url),
+                    headers=headers,
+                    timeout=aiohttp.ClientTimeout(total=timeout_s)
+                ) as response:
+                    status = response.status
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                    if status == 200:
+                        html = await response.text()
+                        validators = {
+                            'etag': response.headers.get('ETag'),
+                            'last_modified': response.headers.get('Last-Modified'),
+                        }
+                    if status != 304:
+                        record_response(url, status, response.headers, html or '')
+        except Exception as e:
+            logger.debug(f"HTTP falhou em {url}: {e}")
+        host_limiter.feedback(host, status, time.perf_counter() - start, retry_after)
+
+        if status == 304:
+            html = self.cache.revalidated(url)
+            if html is None:
+                # Corpo desapareceu da cache: pedido completo
+                return await self._fetch_http(url, markers, revalidate=False)
+            return self._result(url, html, 200, TIER_HTTP, start, markers, not_modified=True)
+
+        return self._result(url, html, status, TIER_HTTP, start, markers,
+                            retry_after=retry_after, **validators)
+
+    async def _fetch_browser(self, url: str, markers: Optional[Sequence[str]]) -> FetchResult:
+        """Página no browser partilhado, à espera do conteúdo do site"""
+        from browser_pool import get_browser_pool
+        from readiness import goto_ready
+        from scrapers_v2 import USER_AGENTS, STEALTH_JS
+
+        host = urlparse(url).netloc
+        start = time.perf_counter()
+        status, html = None, None
+        try:
+            with metrics.timer('page_fetch_seconds', host=host, tier=TIER_BROWSER):
+                async with get_browser_pool().page(
+                    init_script=STEALTH_JS,
+                    user_agent=random.choice(USER_AGENTS),
+                    locale='pt-PT'
+                ) as page:
+                    response = await goto_ready(page, url)
+                    status = response.status if response else None
+                    html = await page.content()
+        except Exception as e:
+            logger.error(f"Browser falhou em {url}: {e}")
+        # Latência do browser não é comparável com a do HTTP no mesmo host: só o status
+        host_limiter.feedback(host, status or (200 if html is not None else None))
+
+        return self._result(url, html, status, TIER_BROWSER, start, markers)
+
+    def _result(self, url: str, html: Optional[str], status: Optional[int], tier: str,
+                start: float, markers: Optional[Sequence[str]], not_modified: bool = False,
+                etag: Optional[str] = None, last_modified: Optional[str] = None,
+                retry_after: Optional[float] = None) -> FetchResult:
+        host = urlparse(url).netloc
+        ok = (status is None or status < 400) and looks_valid(html, url, markers)
+        digest, unchanged = None, False
+        if ok:
+            metrics.inc('pages_total', host=host, tier=tier)
+            if not not_modified:
+                metrics.inc('bytes_total', len(html), host=host, tier=tier)
+
+            if self.cache is not None:
+                from http_cache import body_hash
+                digest = body_hash(html)
+                unchanged = not_modified or self.cache.store(url, html, etag, last_modified)
+        else:
+            metrics.inc('errors_total', component='fetch', host=host, tier=tier)
+
+        return FetchResult(
+            url=url,
+            html=html if ok else None,
+            status=status,
+            tier=tier,
+            elapsed_s=time.perf_counter() - start,
+            ok=ok,
+            body_hash=digest,
+            unchanged=unchanged,
+            retry_after=retry_after
+        )
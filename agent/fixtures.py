@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Fixtures - Lisboa Real Estate AI
+Gravação e reprodução de pedidos HTTP para correr os scrapers offline
+
+LRE_FIXTURES=record  grava cada resposta (HTML, JSON, scripts, headers) em
+                     ../data/fixtures/<host>/, vinda do fetcher HTTP ou do
+                     browser partilhado
+LRE_FIXTURES=replay  serve só o que foi gravado: os pedidos HTTP do fetcher
+                     vão para um servidor local (FixtureServer) e as páginas
+                     do browser são respondidas pelo route handler; pedidos
+                     sem fixture falham (404 / abort), nunca saem para a rede
+
+Em replay o rate limit por host é desligado: scrapers, parsers e o pipeline
+inteiro podem ser medidos de forma determinística (bench_parsers, profiler).
+
+Uso:
+    LRE_FIXTURES=record python main.py --search lisboa
+    LRE_FIXTURES=replay python main.py --search lisboa
+    python fixtures.py                       # fixtures por host
+    python fixtures.py serve --port 8765     # servidor local (GET /replay?url=...)
+"""
+
+import os
+import sys
+import json
+import base64
+import asyncio
+import hashlib
+import logging
+import argparse
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, Optional, TYPE_CHECKING
+from urllib.parse import quote, urlparse
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page, Response, Route
+
+logger = logging.getLogger(__name__)
+
+RECORD = 'record'
+REPLAY = 'replay'
+
+DEFAULT_DIR = "../data/fixtures"
+
+# Headers guardados com cada resposta (o resto depende do momento do pedido)
+KEPT_HEADERS = ('content-type', 'etag', 'last-modified', 'retry-after', 'location')
+
+# Pedidos do browser gravados (imagens, fontes e media não interessam ao parse)
+RECORDED_RESOURCES = ('document', 'xhr', 'fetch', 'script')
+
+
+def fixture_mode() -> Optional[str]:
+    """'record', 'replay' ou None (variável LRE_FIXTURES)"""
+    mode = os.environ.get('LRE_FIXTURES', '').strip().lower()
+    return mode if mode in (RECORD, REPLAY) else None
+
+
+def replaying() -> bool:
+    return fixture_mode() == REPLAY
+
+
+class FixtureStore:
+    """
+    Pares pedido/resposta em disco, um ficheiro JSON por pedido
+
+    Args:
+        root: Diretório das fixtures (por omissão LRE_FIXTURES_DIR ou ../data/fixtures)
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root or os.environ.get('LRE_FIXTURES_DIR', DEFAULT_DIR))
+
+    def path_for(self, url: str, method: str = 'GET', post_data: Optional[str] = None) -> Path:
+        key = hashlib.sha1(f"{method.upper()} {url}\n{post_data or ''}".encode('utf-8')).hexdigest()[:20]
+        return self.root / (urlparse(url).netloc or '_') / f"{key}.json"
+
+    def save(self, url: str, status: int, headers: Dict[str, str], body,
+             method: str = 'GET', post_data: Optional[str] = None) -> Path:
+        """
+        Grava uma resposta
+
+        Args:
+            url: URL pedido
+            status: Status HTTP
+            headers: Headers da resposta (só KEPT_HEADERS são guardados)
+            body: Corpo (str ou bytes)
+            method: Método HTTP
+            post_data: Corpo do pedido (pedidos POST de APIs)
+        """
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        entry = {
+            'url': url,
+            'method': method.upper(),
+            'status': status,
+            'headers': {k.lower(): v for k, v in headers.items() if k.lower() in KEPT_HEADERS},
+            'recorded_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        try:
+            entry['body'] = (body or b'').decode('utf-8')
+        except UnicodeDecodeError:
+            entry['body_b64'] = base64.b64encode(body).decode('ascii')
+
+        path = self.path_for(url, method, post_data)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        tmp.replace(path)
+        return path
+
+    def load(self, url: str, method: str = 'GET', post_data: Optional[str] = None) -> Optional[Dict]:
+        """Resposta gravada (corpo em 'body' como bytes), ou None"""
+        path = self.path_for(url, method, post_data)
+        if not path.exists():
+            return None
+        with open(path, encoding='utf-8') as f:
+            entry = json.load(f)
+        entry['body'] = (base64.b64decode(entry.pop('body_b64')) if 'body_b64' in entry
+                         else entry.get('body', '').encode('utf-8'))
+        return entry
+
+    def entries(self, host: Optional[str] = None) -> Iterator[Dict]:
+        """Metadados de todas as fixtures (ou de um host), sem descodificar o corpo"""
+        pattern = f"{host}/*.json" if host else "*/*.json"
+        for path in sorted(self.root.glob(pattern)):
+            with open(path, encoding='utf-8') as f:
+                entry = json.load(f)
+            body = entry.pop('body', None)
+            body_b64 = entry.pop('body_b64', None)
+            entry['bytes'] = len(body.encode('utf-8')) if body is not None else len(body_b64 or '') * 3 // 4
+            entry['host'] = path.parent.name
+            yield entry
+
+
+# ----------------------------------------------------------------------
+# Gravação
+# ----------------------------------------------------------------------
+
+def record_response(url: str, status: Optional[int], headers: Dict[str, str], body,
+                    method: str = 'GET'):
+    """Grava a resposta se LRE_FIXTURES=record (sem efeito nos outros modos)"""
+    if fixture_mode() != RECORD or status is None or body is None:
+        return
+    try:
+        get_fixture_store().save(url, status, dict(headers), body, method)
+    except OSError as e:
+        logger.warning(f"Fixture não gravada ({url}): {e}")
+
+
+async def _record_browser_response(response: 'Response'):
+    request = response.request
+    if request.resource_type not in RECORDED_RESOURCES or 300 <= response.status < 400:
+        return
+    try:
+        body = await response.body()
+    except Exception as e:
+        # Páginas fechadas ou respostas sem corpo (ex.: redirects seguidos)
+        logger.debug(f"Fixture sem corpo ({response.url}): {e}")
+        return
+    try:
+        get_fixture_store().save(response.url, response.status, response.headers, body,
+                                 request.method, request.post_data)
+    except OSError as e:
+        logger.warning(f"Fixture não gravada ({response.url}): {e}")
+
+
+async def _replay_route(route: 'Route'):
+    request = route.request
+    entry = get_fixture_store().load(request.url, request.method, request.post_data)
+    if entry is None:
+        logger.debug(f"Sem fixture: {request.method} {request.url}")
+        await route.abort('internetdisconnected')
+        return
+    await route.fulfill(status=entry['status'], headers=entry['headers'], body=entry['body'])
+
+
+async def install_on_page(page: 'Page'):
+    """
+    Liga a página às fixtures (gravação ou reprodução, conforme LRE_FIXTURES)
+
+    Em replay o handler é registado por último e por isso responde antes
+    da política de recursos: a rede nunca é usada.
+    """
+    mode = fixture_mode()
+    if mode == RECORD:
+        page.on('response', lambda response: asyncio.ensure_future(_record_browser_response(response)))
+    elif mode == REPLAY:
+        await page.route('**/*', _replay_route)
+
+
+# ----------------------------------------------------------------------
+# Reprodução HTTP: servidor local
+# ----------------------------------------------------------------------
+
+class FixtureServer:
+    """
+    Servidor HTTP local que responde com as fixtures
+
+    GET /replay?url=<url original> devolve o status, os headers e o corpo
+    gravados (304 se o If-None-Match coincidir com o ETag), ou 404 com
+    X-Fixture-Missing quando não há fixture.
+
+    Args:
+        store: FixtureStore (por omissão o global)
+        host: Interface de escuta
+        port: Porta (0 = livre)
+    """
+
+    def __init__(self, store: Optional[FixtureStore] = None, host: str = '127.0.0.1', port: int = 0):
+        self.store = store or get_fixture_store()
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self.misses = 0
+        self._runner = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def url_for(self, url: str) -> str:
+        """URL do servidor local para um URL original"""
+        return f"{self.base_url}/replay?url={quote(url, safe='')}"
+
+    async def _handle(self, request):
+        from aiohttp import web
+
+        self.requests += 1
+        url = request.query.get('url', '')
+        entry = self.store.load(url, request.method)
+        if entry is None:
+            self.misses += 1
+            return web.Response(status=404, text=f"Sem fixture para {url}",
+                                headers={'X-Fixture-Missing': '1'})
+
+        etag = entry['headers'].get('etag')
+        if etag and request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304, headers={'ETag': etag})
+        headers = {k.title(): v for k, v in entry['headers'].items() if k != 'content-type'}
+        return web.Response(status=entry['status'], body=entry['body'], headers=headers,
+                            content_type=entry['headers'].get('content-type', 'text/html').split(';')[0],
+                            charset='utf-8')
+
+    async def start(self) -> 'FixtureServer':
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_route('*', '/replay', self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        logger.info(f"Fixtures: servidor local em {self.base_url} ({self.store.root})")
+        return self
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+# Store e servidor globais (o servidor é um por event loop)
+_store: Optional[FixtureStore] = None
+_server: Optional[FixtureServer] = None
+_server_loop = None
+
+
+def get_fixture_store() -> FixtureStore:
+    global _store
+
+    if _store is None:
+        _store = FixtureStore()
+    return _store
+
+
+async def get_fixture_server() -> FixtureServer:
+    """Servidor local do processo (arranca no primeiro pedido)"""
+    global _server, _server_loop
+
+    loop = asyncio.get_running_loop()
+    if _server is None or _server_loop is not loop:
+        _server = await FixtureServer().start()
+        _server_loop = loop
+    return _server
+
+
+async def close_fixture_server():
+    """Pára o servidor global, se chegou a arrancar"""
+    global _server, _server_loop
+
+    if _server is not None:
+        logger.info(f"Fixtures: {_server.requests} pedidos servidos, {_server.misses} sem fixture")
+        await _server.close()
+    _server = None
+    _server_loop = None
+
+
+async def replay_url(url: str) -> str:
+    """URL a pedir: o do servidor local em replay, o original nos outros modos"""
+    if not replaying():
+        return url
+    return (await get_fixture_server()).url_for(url)
+
+
+# ----------------------------------------------------------------------
+# CLI
+# ----------------------------------------------------------------------
+
+async def _serve(port: int):
+    server = await FixtureServer(port=port).start()
+    print(f"🎞️  Fixtures em {server.base_url}/replay?url=... (Ctrl+C para parar)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fixtures de pedidos HTTP (gravação/reprodução)')
+    parser.add_argument('command', nargs='?', default='list', choices=('list', 'serve'))
+    parser.add_argument('--host', help='Só as fixtures deste host')
+    parser.add_argument('--port', type=int, default=8765, help='Porta do servidor (serve)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == 'serve':
+        try:
+            asyncio.run(_serve(args.port))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    by_host: Dict[str, Dict] = {}
+    for entry in get_fixture_store().entries(args.host):
+        stats = by_host.setdefault(entry['host'], {'requests': 0, 'bytes': 0, 'latest': ''})
+        stats['requests'] += 1
+        stats['bytes'] += entry['bytes']
+        stats['latest'] = max(stats['latest'], entry['recorded_at'])
+
+    if not by_host:
+        print(f"Sem fixtures em {get_fixture_store().root} (grave com LRE_FIXTURES=record)")
+        return 0
+    print(f"{'host':<32} {'pedidos':>8} {'KiB':>9}  gravado em")
+    for host, stats in sorted(by_host.items()):
+        print(f"{host:<32} {stats['requests']:>8} {stats['bytes'] / 1024:>9.0f}  {stats['latest']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
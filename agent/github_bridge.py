@@ -11,10 +11,7 @@ from datetime import datetime
 from typing import Dict, List, Optional
 from pathlib import Path
 
-try:
-    import requests
-except ImportError:
-    pass
+from metrics import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -96,6 +93,17 @@ class GitHubBridge:
             logger.error("GitHub token não configurado")
             return False
         
+        with metrics.timer('github_sync_seconds'):
+            ok = self._commit_file(filepath, commit_message)
+        
+        if not ok:
+            metrics.inc('errors_total', component='github')
+        return ok
+    
+    def _commit_file(self, filepath: str, commit_message: Optional[str]) -> bool:
+        """PUT do ficheiro na API de conteúdos do GitHub"""
+        import requests
+        
         try:
             # Ler conteúdo do ficheiro
             with open(filepath, 'rb') as f:
@@ -175,6 +183,8 @@ class GitHubBridge:
             logger.error("GitHub token não configurado")
             return None
         
+        import requests
+        
         try:
             # Buscar properties_latest.json
             url = f"{self.api_base}/repos/{self.repo}/contents/data/properties_latest.json"
@@ -203,6 +213,8 @@ class GitHubBridge:
         if not self.token:
             return False
         
+        import requests
+        
         try:
             url = f"{self.api_base}/repos/{self.repo}/actions/workflows/{workflow_name}/dispatches"
             data = {'ref': 'main'}
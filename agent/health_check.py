@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Health check - Lisboa Real Estate AI
+Verificação concorrente dos sites de leilões, com circuit breakers
+
+Todos os sites são testados em paralelo (limite global de pedidos em
+simultâneo) com um timeout curto. Cada site tem um circuit breaker gravado
+na base de dados:
+
+- closed: o site é testado normalmente
+- open: falhou várias vezes seguidas; é saltado até ao fim do cooldown
+- half_open: o cooldown terminou; um teste decide se fecha (sucesso) ou
+  volta a abrir com o cooldown em dobro (falha)
+
+Sites mortos ou que bloqueiam deixam de custar um timeout em cada execução.
+
+Uso:
+    python health_check.py                  # todos os tiers de LEILAO_SITES
+    python health_check.py --tier safe --tier medium --json health.json
+"""
+
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Bytes lidos por teste: chega para ver bloqueios sem descarregar a página toda
+PROBE_BYTES = 65_536
+
+
+@dataclass
+class HealthResult:
+    """Resultado do health check de um site"""
+    name: str
+    url: str
+    ok: bool
+    state: str
+    status: Optional[int] = None
+    latency_s: float = 0.0
+    error: Optional[str] = None
+    skipped: bool = False  # circuit aberto: não testado
+
+
+def _timestamp(moment: datetime) -> str:
+    """Formato dos TIMESTAMP do SQLite (UTC), comparável com CURRENT_TIMESTAMP"""
+    return moment.isoformat(sep=' ', timespec='seconds')
+
+
+class SiteHealthChecker:
+    """
+    Health checks concorrentes com circuit breaker por site
+
+    Args:
+        db: PropertyDatabase (tabela circuit_breakers); criada se omitida
+        max_concurrency: Testes em simultâneo
+        timeout_s: Timeout total de cada teste
+        failure_threshold: Falhas seguidas até abrir o circuito
+        cooldown_s: Primeiro cooldown de um circuito aberto
+        max_cooldown_s: Limite do cooldown (duplica a cada falha em half_open)
+    """
+
+    def __init__(self, db=None, max_concurrency: int = 10, timeout_s: float = 8,
+                 failure_threshold: int = 2, cooldown_s: float = 1800,
+                 max_cooldown_s: float = 86400):
+        self.db = db
+        self.max_concurrency = max_concurrency
+        self.timeout_s = timeout_s
+        self.failure_threshold = failure_threshold
+        self.cooldown_s = cooldown_s
+        self.max_cooldown_s = max_cooldown_s
+        self._own_db = db is None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """Fecha a base de dados, se foi criada aqui"""
+        if self._own_db and self.db is not None:
+            self.db.close()
+            self.db = None
+
+    def _get_db(self):
+        if self.db is None:
+            from database import PropertyDatabase
+            self.db = PropertyDatabase()
+        return self.db
+
+    # ------------------------------------------------------------------
+    # Circuit breaker
+    # ------------------------------------------------------------------
+
+    def state(self, name: str) -> str:
+        """Estado atual do circuito (um circuito aberto passa a half_open no fim do cooldown)"""
+        breaker = self._get_db().get_breaker(name)
+        if breaker is None or breaker['state'] == CLOSED:
+            return CLOSED
+        if breaker['state'] == OPEN and breaker['open_until'] \
+                and _timestamp(datetime.utcnow()) < breaker['open_until']:
+            return OPEN
+        return HALF_OPEN
+
+    def allows(self, name: str) -> bool:
+        """O site pode ser testado/usado agora"""
+        return self.state(name) != OPEN
+
+    def record(self, result: HealthResult):
+        """Atualiza o circuit breaker com o resultado de um teste"""
+        db = self._get_db()
+        breaker = db.get_breaker(result.name) or {}
+        failures = breaker.get('failures') or 0
+        cooldown = breaker.get('cooldown_s') or 0
+        open_until = None
+
+        if result.ok:
+            state, failures, cooldown = CLOSED, 0, 0
+        elif result.state == HALF_OPEN:
+            # Teste de recuperação falhou: volta a abrir, com cooldown maior
+            state, failures = OPEN, failures + 1
+            cooldown = min(max(cooldown, self.cooldown_s) * 2, self.max_cooldown_s)
+        else:
+            failures += 1
+            state = OPEN if failures >= self.failure_threshold else CLOSED
+            cooldown = self.cooldown_s if state == OPEN else 0
+
+        if state == OPEN:
+            open_until = _timestamp(datetime.utcnow() + timedelta(seconds=cooldown))
+            logger.warning(f"🔌 {result.name}: circuito aberto durante {cooldown / 60:.0f} min "
+                           f"({failures} falhas seguidas)")
+
+        result.state = state
+        db.save_breaker(
+            result.name, result.url, state, failures, cooldown, open_until,
+            status=result.status, error=result.error,
+            latency_ms=round(result.latency_s * 1000, 1)
+        )
+
+    # ------------------------------------------------------------------
+    # Health checks
+    # ------------------------------------------------------------------
+
+    async def _probe(self, url: str) -> Tuple[Optional[int], Optional[str]]:
+        """GET com timeout curto; devolve (status, erro)"""
+        import aiohttp
+        from fetcher import BLOCK_MARKERS
+        from fixtures import replay_url
+        from http_client import get_http_session
+
+        timeout = aiohttp.ClientTimeout(total=self.timeout_s, connect=min(self.timeout_s, 4))
+        async with get_http_session().get(await replay_url(url), timeout=timeout) as response:
+            if response.status != 200:
+                return response.status, f"Status {response.status}"
+            body = (await response.content.read(PROBE_BYTES)).decode('utf-8', errors='replace')
+            if any(marker in body for marker in BLOCK_MARKERS):
+                return response.status, "Página de bloqueio"
+            return response.status, None
+
+    async def check_site(self, name: str, url: str) -> HealthResult:
+        """
+        Testa um site, respeitando o circuit breaker
+
+        Returns:
+            HealthResult (skipped=True se o circuito está aberto)
+        """
+        state = self.state(name)
+        if state == OPEN:
+            metrics.inc('health_checks_total', result='skipped')
+            return HealthResult(name, url, ok=False, state=OPEN, skipped=True,
+                                error="Circuito aberto")
+
+        result = HealthResult(name, url, ok=False, state=state)
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with self._semaphore:
+            start = time.perf_counter()
+            try:
+                result.status, result.error = await self._probe(url)
+                result.ok = result.error is None
+            except asyncio.TimeoutError:
+                result.error = f"Timeout ({self.timeout_s:.0f}s)"
+            except ImportError:
+                # Falta de dependência não é falha do site (não abre circuitos)
+                raise
+            except Exception as e:
+                result.error = str(e)[:120] or type(e).__name__
+            result.latency_s = time.perf_counter() - start
+
+        self.record(result)
+        metrics.inc('health_checks_total', result='ok' if result.ok else 'fail')
+        return result
+
+    async def check_all(self, sites: Iterable[Tuple[str, str]]) -> List[HealthResult]:
+        """
+        Testa todos os sites em paralelo
+
+        Args:
+            sites: Pares (nome, url)
+
+        Returns:
+            Resultados pela ordem dos sites
+        """
+        sites = list(sites)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        start = time.perf_counter()
+
+        results = await asyncio.gather(*(self.check_site(name, url) for name, url in sites))
+
+        ok = sum(r.ok for r in results)
+        skipped = sum(r.skipped for r in results)
+        metrics.set_gauge('circuit_breakers_open', sum(r.state == OPEN for r in results))
+        logger.info(f"Health check: {ok}/{len(sites)} sites OK, {skipped} saltados (circuito aberto) "
+                    f"em {time.perf_counter() - start:.1f}s")
+        return list(results)
+
+
+def sites_from_tiers(tiers: Optional[List[str]] = None) -> List[Tuple[str, str]]:
+    """Sites de leilao_scraper.LEILAO_SITES dos tiers pedidos (por omissão todos)"""
+    from leilao_scraper import LEILAO_SITES
+
+    return [site for tier in (tiers or LEILAO_SITES) for site in LEILAO_SITES[tier]]
+
+
+async def main():
+    """Health check dos sites de leilões"""
+    from http_client import close_http_session
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description='Health check dos sites de leilões')
+    parser.add_argument('--tier', action='append', choices=('safe', 'medium', 'aggressive'),
+                        help='Tier de LEILAO_SITES (repetível; por omissão todos)')
+    parser.add_argument('--concurrency', type=int, default=10, help='Testes em simultâneo')
+    parser.add_argument('--timeout', type=float, default=8, help='Timeout por site (segundos)')
+    parser.add_argument('--json', help='Guardar resultados em JSON')
+    args = parser.parse_args()
+
+    try:
+        async with SiteHealthChecker(max_concurrency=args.concurrency, timeout_s=args.timeout) as checker:
+            results = await checker.check_all(sites_from_tiers(args.tier))
+    finally:
+        await close_http_session()
+
+    print("=" * 60)
+    print(f"🩺 HEALTH CHECK - {len(results)} sites")
+    print("=" * 60)
+    for r in results:
+        icon = '✅' if r.ok else '⏭️ ' if r.skipped else '❌'
+        detail = f"{r.latency_s * 1000:.0f}ms" if r.ok else r.error
+        print(f"{icon} {r.name:<30} {r.state:<10} {detail}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump([asdict(r) for r in results], f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Guardado em {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
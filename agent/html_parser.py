@@ -0,0 +1,254 @@
+"""
+HTML parser - Lisboa Real Estate AI
+Parse de HTML com seletores CSS, independente da biblioteca
+
+Backends, do mais rápido para o mais lento:
+- selectolax (Lexbor, em C)
+- lxml (+ cssselect; seletores compilados para XPath)
+- BeautifulSoup (fallback; usa o parser lxml se existir, senão html.parser)
+
+Todos expõem a mesma API (css, css_first, text, attr). Os seletores são
+compilados uma vez por backend e reutilizados em todas as páginas.
+"""
+
+import os
+import logging
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('selectolax', 'lxml', 'bs4')
+
+# Seletores por site (compilados na primeira utilização)
+SITE_SELECTORS: Dict[str, Dict[str, str]] = {
+    'leilosoc': {
+        'card': 'div[class*="property" i], div[class*="imovel" i], div[class*="leilao" i]',
+        'title': 'h2, h3, h4, a',
+        'link': 'a[href]',
+    },
+    # Listagens dos portais (adapter portal_cards). Sem seletor de um campo,
+    # o campo é extraído do texto do card
+    'idealista': {
+        'items': 'article.item',
+        'title': '.item-link',
+        'price': '.item-price',
+        'details': '.item-detail-char',
+        'location': '.item-detail-char .ellipsis',
+    },
+    'imovirtual': {
+        'items': '[data-cy="listing-item"]',
+        'title': 'a[href]',
+    },
+    'casasapo': {
+        'items': '.property-info',
+        'title': 'a[href]',
+    },
+    'supercasa': {
+        'items': '.property',
+        'title': 'a[href]',
+    },
+    # Sites sem estrutura conhecida: primeiro seletor com resultados
+    'generic': {
+        'cards': '.property|.imovel|.leilao|.card|article|.col-md-4|.item',
+        'link': 'a[href]',
+    },
+    # Página de detalhe de um imóvel (enrichment); alternativas separadas por '|'
+    'detail': {
+        'description': '[itemprop="description"]|[class*="description" i]|[class*="descricao" i]|.comment',
+        'meta_description': 'meta[property="og:description"], meta[name="description"]',
+        'features': '[class*="feature" i] li|[class*="caracteristica" i] li|[class*="details" i] li',
+        'photos': 'meta[property="og:image"]',
+        'gallery': '[class*="gallery" i] img|[class*="galeria" i] img|[class*="photo" i] img|[class*="foto" i] img',
+        'published': 'meta[property="article:published_time"], meta[itemprop="datePosted"]',
+        'price_history': '[class*="price-history" i] li|[class*="historico" i] li|[class*="pricehistory" i] li',
+    },
+}
+
+
+def site_selectors(site: str) -> Dict[str, str]:
+    """Seletores do site (os genéricos se não houver específicos)"""
+    return SITE_SELECTORS.get(site, SITE_SELECTORS['generic'])
+
+
+# ----------------------------------------------------------------------
+# Nós
+# ----------------------------------------------------------------------
+
+class Node:
+    """Elemento HTML (API comum a todos os backends)"""
+
+    backend = ''
+
+    def __init__(self, node):
+        self.node = node
+
+    def css(self, selector: str) -> List['Node']:
+        """Todos os elementos que satisfazem o seletor, por ordem do documento"""
+        raise NotImplementedError
+
+    def css_first(self, selector: str) -> Optional['Node']:
+        """Primeiro elemento que satisfaz o seletor"""
+        found = self.css(selector)
+        return found[0] if found else None
+
+    def text(self, separator: str = '', strip: bool = True) -> str:
+        """Texto do elemento e descendentes (strip: cada bloco de texto é limpo)"""
+        raise NotImplementedError
+
+    def attr(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        """Valor de um atributo"""
+        raise NotImplementedError
+
+
+class SelectolaxNode(Node):
+    backend = 'selectolax'
+
+    def css(self, selector: str) -> List[Node]:
+        return [SelectolaxNode(n) for n in self.node.css(selector)]
+
+    def css_first(self, selector: str) -> Optional[Node]:
+        found = self.node.css_first(selector)
+        return SelectolaxNode(found) if found is not None else None
+
+    def text(self, separator: str = '', strip: bool = True) -> str:
+        return self.node.text(separator=separator, strip=strip)
+
+    def attr(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        value = self.node.attributes.get(name)
+        return default if value is None else value
+
+
+class LxmlNode(Node):
+    backend = 'lxml'
+
+    def css(self, selector: str) -> List[Node]:
+        return [LxmlNode(n) for n in _compile('lxml', selector)(self.node)]
+
+    def text(self, separator: str = '', strip: bool = True) -> str:
+        chunks = self.node.itertext()
+        if strip:
+            return separator.join(c.strip() for c in chunks if c.strip())
+        return separator.join(chunks)
+
+    def attr(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        return self.node.get(name, default)
+
+
+class SoupNode(Node):
+    backend = 'bs4'
+
+    def css(self, selector: str) -> List[Node]:
+        return [SoupNode(n) for n in _compile('bs4', selector).select(self.node)]
+
+    def css_first(self, selector: str) -> Optional[Node]:
+        found = _compile('bs4', selector).select_one(self.node)
+        return SoupNode(found) if found is not None else None
+
+    def text(self, separator: str = '', strip: bool = True) -> str:
+        return self.node.get_text(separator, strip=strip)
+
+    def attr(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        value = self.node.get(name)
+        return default if value is None else value
+
+
+# ----------------------------------------------------------------------
+# Backends
+# ----------------------------------------------------------------------
+
+@lru_cache(maxsize=None)
+def _compile(backend: str, selector: str):
+    """Seletor compilado (um por backend e seletor, reutilizado entre páginas)"""
+    if backend == 'lxml':
+        from lxml.cssselect import CSSSelector
+        return CSSSelector(selector)
+    if backend == 'bs4':
+        import soupsieve
+        return soupsieve.compile(selector)
+    return selector
+
+
+@lru_cache(maxsize=None)
+def backend_available(backend: str) -> bool:
+    """A biblioteca do backend está instalada"""
+    try:
+        if backend == 'selectolax':
+            import selectolax.lexbor  # noqa: F401
+        elif backend == 'lxml':
+            import lxml.html  # noqa: F401
+            import lxml.cssselect  # noqa: F401
+        elif backend == 'bs4':
+            import bs4  # noqa: F401
+        else:
+            return False
+    except ImportError:
+        return False
+    return True
+
+
+def available_backends() -> Tuple[str, ...]:
+    return tuple(b for b in BACKENDS if backend_available(b))
+
+
+def default_backend() -> str:
+    """Backend mais rápido instalado (LRE_HTML_PARSER força um backend)"""
+    forced = os.environ.get('LRE_HTML_PARSER')
+    if forced:
+        return forced
+
+    for backend in BACKENDS:
+        if backend_available(backend):
+            return backend
+    raise ImportError("Nenhum parser HTML instalado (selectolax, lxml ou beautifulsoup4)")
+
+
+def parse_html(html: str, backend: Optional[str] = None) -> Node:
+    """
+    Faz parse de uma página
+
+    Args:
+        html: Conteúdo HTML
+        backend: 'selectolax', 'lxml' ou 'bs4' (por omissão o mais rápido instalado)
+
+    Returns:
+        Nó raiz do documento
+    """
+    backend = backend or default_backend()
+
+    if backend == 'selectolax':
+        from selectolax.lexbor import LexborHTMLParser
+        return SelectolaxNode(LexborHTMLParser(html))
+
+    if backend == 'lxml':
+        import lxml.html
+        try:
+            root = lxml.html.document_fromstring(html)
+        except ValueError:
+            # Strings com declaração de encoding só são aceites em bytes
+            root = lxml.html.document_fromstring(html.encode('utf-8'))
+        return LxmlNode(root)
+
+    if backend == 'bs4':
+        from bs4 import BeautifulSoup
+        features = 'lxml' if backend_available('lxml') else 'html.parser'
+        return SoupNode(BeautifulSoup(html, features))
+
+    raise ValueError(f"Backend de parse desconhecido: {backend}")
+
+
+def select_cards(doc: Node, selectors: str, limit: Optional[int] = None) -> List[Node]:
+    """
+    Cards de uma página
+
+    Args:
+        doc: Nó raiz
+        selectors: Alternativas separadas por '|', usadas por ordem: a primeira
+                   com resultados ganha
+        limit: Máximo de cards
+    """
+    for selector in selectors.split('|'):
+        cards = doc.css(selector)
+        if cards:
+            return cards[:limit] if limit else cards
+    return []
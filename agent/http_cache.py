@@ -0,0 +1,246 @@
+"""
+HTTP cache - Lisboa Real Estate AI
+Cache em disco das respostas, com pedidos condicionais
+
+- Corpos guardados por hash do conteúdo (bodies/<sha256>.html.gz)
+- Índice por URL com ETag, Last-Modified e hash do último corpo
+- Pedidos seguintes enviam If-None-Match / If-Modified-Since; um 304
+  reutiliza o corpo em disco sem o descarregar
+- Quando o corpo é idêntico ao anterior, os imóveis extraídos da última vez
+  (parsed/<sha256>.<parser>.json) são reutilizados e o parse é saltado
+
+Escritas atómicas (ficheiro temporário + os.replace): vários workers podem
+partilhar a mesma diretoria.
+"""
+
+import os
+import gzip
+import json
+import hashlib
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def body_hash(body: str) -> str:
+    """Hash do conteúdo (identifica o corpo na cache)"""
+    return hashlib.sha256(body.encode('utf-8', errors='replace')).hexdigest()
+
+
+@dataclass
+class CacheEntry:
+    """Entrada do índice de um URL"""
+    url: str
+    body_hash: str
+    size: int
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fetched_at: Optional[str] = None
+
+
+class HttpCache:
+    """
+    Cache de respostas HTTP em disco
+
+    Args:
+        cache_dir: Diretoria da cache
+    """
+
+    def __init__(self, cache_dir: str = "../data/http_cache"):
+        self.cache_dir = Path(cache_dir)
+        self.stats: Dict[str, int] = {}
+        self.reset_stats()
+
+    # ------------------------------------------------------------------
+    # Ficheiros
+    # ------------------------------------------------------------------
+
+    def _index_path(self, url: str) -> Path:
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return self.cache_dir / 'index' / key[:2] / f"{key}.json"
+
+    def _body_path(self, digest: str) -> Path:
+        return self.cache_dir / 'bodies' / digest[:2] / f"{digest}.html.gz"
+
+    def _parsed_path(self, digest: str, parser: str) -> Path:
+        return self.cache_dir / 'parsed' / digest[:2] / f"{digest}.{parser}.json"
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    # ------------------------------------------------------------------
+    # Índice e corpos
+    # ------------------------------------------------------------------
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        """Última resposta guardada do URL"""
+        try:
+            with open(self._index_path(url), encoding='utf-8') as f:
+                return CacheEntry(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def load_body(self, entry: CacheEntry) -> Optional[str]:
+        """Corpo guardado da entrada (None se já não existir)"""
+        try:
+            with gzip.open(self._body_path(entry.body_hash), 'rt', encoding='utf-8') as f:
+                return f.read()
+        except (OSError, EOFError):
+            return None
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """Headers de revalidação para o URL (vazio se não houver cache)"""
+        entry = self.lookup(url)
+        if entry is None or not self._body_path(entry.body_hash).exists():
+            return {}
+
+        headers = {}
+        if entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def store(self, url: str, body: str, etag: Optional[str] = None,
+              last_modified: Optional[str] = None) -> bool:
+        """
+        Guarda a resposta do URL
+
+        Returns:
+            True se o corpo é idêntico ao da última resposta
+        """
+        digest = body_hash(body)
+        previous = self.lookup(url)
+        unchanged = previous is not None and previous.body_hash == digest
+
+        body_path = self._body_path(digest)
+        if not body_path.exists():
+            self._write_atomic(body_path, gzip.compress(body.encode('utf-8')))
+
+        entry = CacheEntry(
+            url=url,
+            body_hash=digest,
+            size=len(body),
+            etag=etag,
+            last_modified=last_modified,
+            fetched_at=datetime.now().isoformat(),
+        )
+        self._write_atomic(self._index_path(url),
+                           json.dumps(entry.__dict__, ensure_ascii=False).encode('utf-8'))
+
+        if previous is not None and not unchanged:
+            self._discard(previous.body_hash)
+
+        self._count('unchanged' if unchanged else ('changed' if previous else 'new'))
+        return unchanged
+
+    def revalidated(self, url: str) -> Optional[str]:
+        """Resposta 304: corpo guardado (None se a cache o perdeu)"""
+        entry = self.lookup(url)
+        body = self.load_body(entry) if entry else None
+        if body is None:
+            return None
+
+        self._count('revalidated')
+        self.stats['bytes_avoided'] += entry.size
+        metrics.inc('http_cache_bytes_avoided_total', entry.size)
+        return body
+
+    def _discard(self, digest: str):
+        """Remove um corpo substituído e os imóveis extraídos dele"""
+        paths = [self._body_path(digest)]
+        parsed_dir = self._parsed_path(digest, 'x').parent
+        if parsed_dir.exists():
+            paths.extend(parsed_dir.glob(f"{digest}.*.json"))
+        for path in paths:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    # ------------------------------------------------------------------
+    # Imóveis extraídos
+    # ------------------------------------------------------------------
+
+    def get_parsed(self, digest: str, parser: str) -> Optional[List[Dict]]:
+        """Imóveis extraídos de um corpo por um parser (None se não houver)"""
+        try:
+            with open(self._parsed_path(digest, parser), encoding='utf-8') as f:
+                items = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        self.stats['parse_skipped'] += 1
+        metrics.inc('http_cache_parse_skipped_total', parser=parser)
+        return items
+
+    def put_parsed(self, digest: str, parser: str, items: List[Dict]):
+        """Guarda os imóveis extraídos de um corpo"""
+        data = json.dumps(items, ensure_ascii=False, default=str).encode('utf-8')
+        self._write_atomic(self._parsed_path(digest, parser), data)
+
+    # ------------------------------------------------------------------
+    # Estatísticas
+    # ------------------------------------------------------------------
+
+    def _count(self, result: str):
+        self.stats[result] += 1
+        metrics.inc('http_cache_requests_total', result=result)
+
+    def reset_stats(self):
+        self.stats = {
+            'new': 0,
+            'changed': 0,
+            'unchanged': 0,
+            'revalidated': 0,
+            'bytes_avoided': 0,
+            'parse_skipped': 0,
+        }
+
+    def report(self) -> Dict:
+        """Resumo do ciclo: rácio de hits (304 ou corpo idêntico) e bytes evitados"""
+        hits = self.stats['revalidated'] + self.stats['unchanged']
+        total = hits + self.stats['new'] + self.stats['changed']
+        return {
+            **self.stats,
+            'requests': total,
+            'hit_ratio': round(hits / total, 4) if total else 0.0,
+        }
+
+
+# Cache global do processo
+_cache: Optional[HttpCache] = None
+
+
+def get_http_cache() -> HttpCache:
+    """Cache partilhada por todos os fetchers do processo"""
+    global _cache
+
+    if _cache is None:
+        _cache = HttpCache()
+    return _cache
+
+
+def report_run() -> Optional[Dict]:
+    """Regista o resumo do ciclo (log e gauge) e recomeça a contagem"""
+    if _cache is None:
+        return None
+
+    report = _cache.report()
+    if report['requests']:
+        metrics.set_gauge('http_cache_hit_ratio', report['hit_ratio'])
+        logger.info(f"Cache HTTP: {report['hit_ratio']:.0%} hits em {report['requests']} pedidos, "
+                    f"{report['bytes_avoided'] / 1024:.0f} KiB evitados, "
+                    f"{report['parse_skipped']} parses saltados")
+    _cache.reset_stats()
+    return report
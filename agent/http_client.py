@@ -0,0 +1,98 @@
+"""
+HTTP client - Lisboa Real Estate AI
+Sessão aiohttp partilhada por todos os scrapers assíncronos
+
+- Um connector por processo: keep-alive, cache de DNS e sessões TLS
+  reaproveitados entre pedidos, scrapers e ciclos do daemon
+- Limite de ligações total e por host
+- Timeouts e headers comuns, com compressão (gzip/deflate) ativa
+"""
+
+import asyncio
+import logging
+from typing import Dict, Optional, TYPE_CHECKING
+
+# aiohttp é importado apenas no primeiro pedido (arranque rápido do CLI)
+if TYPE_CHECKING:
+    import aiohttp
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'pt-PT,pt;q=0.9,en-US;q=0.8,en;q=0.7',
+    'Accept-Encoding': 'gzip, deflate',
+}
+
+# Opções do connector e timeouts (segundos)
+DEFAULT_OPTIONS = {
+    'limit': 64,               # ligações abertas no total
+    'limit_per_host': 8,       # ligações por host
+    'ttl_dns_cache': 600,      # cache de DNS
+    'keepalive_timeout': 60,   # ligações inativas mantidas abertas
+    'total_timeout': 30,
+    'connect_timeout': 10,
+    'read_timeout': 20,
+}
+
+
+def create_session(headers: Optional[Dict[str, str]] = None, **options) -> 'aiohttp.ClientSession':
+    """
+    Cria uma sessão com o connector afinado
+
+    Args:
+        headers: Headers por omissão (acrescentados a DEFAULT_HEADERS)
+        options: Sobrepõem DEFAULT_OPTIONS
+
+    Returns:
+        ClientSession (fechar com close)
+    """
+    import aiohttp
+
+    opts = {**DEFAULT_OPTIONS, **options}
+    connector = aiohttp.TCPConnector(
+        limit=opts['limit'],
+        limit_per_host=opts['limit_per_host'],
+        ttl_dns_cache=opts['ttl_dns_cache'],
+        use_dns_cache=True,
+        keepalive_timeout=opts['keepalive_timeout'],
+        enable_cleanup_closed=True,
+    )
+    timeout = aiohttp.ClientTimeout(
+        total=opts['total_timeout'],
+        sock_connect=opts['connect_timeout'],
+        sock_read=opts['read_timeout'],
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=timeout,
+        headers={**DEFAULT_HEADERS, **(headers or {})},
+        auto_decompress=True,
+    )
+
+
+# Sessão global (uma por event loop)
+_session: Optional['aiohttp.ClientSession'] = None
+_session_loop = None
+
+
+def get_http_session(**options) -> 'aiohttp.ClientSession':
+    """Sessão partilhada do processo; as opções só contam na criação"""
+    global _session, _session_loop
+
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        _session = create_session(**options)
+        _session_loop = loop
+    return _session
+
+
+async def close_http_session():
+    """Fecha a sessão global, se chegou a ser criada"""
+    global _session, _session_loop
+
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+    _session_loop = None
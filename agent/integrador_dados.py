@@ -4,9 +4,13 @@ Integrador de Dados - Extrai e integra dados dos 6 sites OK
 
 import asyncio
 import json
-import re
+import time
 from datetime import datetime
-from playwright.async_api import async_playwright
+from browser_pool import get_browser_pool, close_browser_pool
+from ratelimit import host_limiter, parse_retry_after
+from readiness import goto_ready
+from extractors import extract_area, extract_price, extract_typology
+from parse_pool import get_parse_pool, shutdown_parse_pool
 
 SITES_OK = [
     {"nome": "leilosoc.com", "url": "https://www.leilosoc.com/pt/leiloes/?categoria=imoveis", "tipo": "leiloes"},
@@ -17,48 +21,6 @@ SITES_OK = [
     {"nome": "capital-leiloeira.pt", "url": "https://www.capital-leiloeira.pt/", "tipo": "leiloes"},
 ]
 
-def extrair_preco(texto):
-    """Extrai preço do texto"""
-    padroes = [
-        r'(\d+[\s\.]?\d+)\s*€',
-        r'€\s*(\d+[\s\.]?\d+)',
-        r'(\d+)\.?\d{0,3}\s*,?\d{0,2}\s*€'
-    ]
-    for padrao in padroes:
-        match = re.search(padrao, texto)
-        if match:
-            try:
-                preco_str = match.group(1).replace('.', '').replace(' ', '').replace(',', '.')
-                return float(preco_str)
-            except:
-                continue
-    return None
-
-def extrair_area(texto):
-    """Extrai área do texto"""
-    padroes = [
-        r'(\d+)\s*m2',
-        r'(\d+)\s*m²',
-        r'(\d+)\s*metros',
-        r'(\d+)\s*m\s*2'
-    ]
-    for padrao in padroes:
-        match = re.search(padrao, texto.lower())
-        if match:
-            try:
-                return float(match.group(1))
-            except:
-                continue
-    return None
-
-def extrair_tipologia(texto):
-    """Extrai tipologia do texto"""
-    tipos = ['T0', 'T1', 'T2', 'T3', 'T4', 'T5', 'T6', 'Moradia', 'Loja', 'Armazém', 'Terreno']
-    for tipo in tipos:
-        if tipo.lower() in texto.lower():
-            return tipo
-    return "Desconhecido"
-
 async def scrape_leilosoc(page):
     """Scraper específico para leilosoc.com"""
     imoveis = []
@@ -79,13 +41,13 @@ async def scrape_leilosoc(page):
                 # Extrair preço
                 preco_elem = await card.query_selector('.price, .value, .amount, strong')
                 preco_texto = await preco_elem.inner_text() if preco_elem else ""
-                preco = extrair_preco(preco_texto) or extrair_preco(titulo) or 0
+                preco = extract_price(preco_texto, require_currency=False) or extract_price(titulo) or 0
                 
                 # Extrair área
-                area = extrair_area(titulo) or extrair_area(await card.inner_text())
+                area = extract_area(titulo) or extract_area(await card.inner_text())
                 
                 # Extrair tipologia
-                tipo = extrair_tipologia(titulo)
+                tipo = extract_typology(titulo) or "Desconhecido"
                 
                 # Extrair link
                 link_elem = await card.query_selector('a')
@@ -114,67 +76,13 @@ async def scrape_leilosoc(page):
     return imoveis
 
 async def scrape_generico(page, site):
-    """Scraper genérico para outros sites"""
+    """Scraper genérico para outros sites (adapter generic_cards sobre o HTML da página)"""
     imoveis = []
     
     try:
-        # Aguardar conteúdo carregar
-        await page.wait_for_load_state("domcontentloaded")
-        await asyncio.sleep(3)  # Esperar JS executar
-        
-        # Procurar por cards
-        seletores = [
-            '.property', '.imovel', '.leilao', '.item', '.card',
-            'article', '.col-md-4', '.col-lg-4', '.col-sm-6'
-        ]
-        
-        cards = []
-        for seletor in seletores:
-            cards = await page.query_selector_all(seletor)
-            if len(cards) > 0:
-                break
-        
-        # Se não encontrou cards, procurar todos os links
-        if not cards:
-            cards = await page.query_selector_all('a')
-        
-        for card in cards[:15]:
-            try:
-                texto = await card.inner_text()
-                texto = texto.strip()
-                
-                # Filtrar apenas elementos relevantes
-                if len(texto) < 30:
-                    continue
-                    
-                keywords = ['t1', 't2', 't3', 'apartamento', 'moradia', 'loja', '€', 'euro', 'm2', 'metro']
-                if not any(kw in texto.lower() for kw in keywords):
-                    continue
-                
-                preco = extrair_preco(texto)
-                area = extrair_area(texto)
-                tipo = extrair_tipologia(texto)
-                
-                href = await card.get_attribute('href')
-                if href and not href.startswith('http'):
-                    href = f"https://{site['nome']}{href}"
-                elif not href:
-                    href = site['url']
-                
-                imoveis.append({
-                    "id": f"{site['nome'].split('.')[0]}_{len(imoveis)}",
-                    "fonte": site['nome'],
-                    "titulo": texto[:150],
-                    "tipo": tipo,
-                    "preco": preco or 0,
-                    "area_m2": area,
-                    "preco_m2": round(preco / area, 2) if area and preco else None,
-                    "url": href,
-                    "data_extracao": datetime.now().isoformat()
-                })
-            except:
-                continue
-                
+        # Um só pedido ao browser; o parse corre no pool de processos
+        html = await page.content()
+        imoveis = await get_parse_pool().parse('generic_cards', html, fonte=site['nome'])
     except Exception as e:
         print(f"Erro genérico {site['nome']}: {e}")
     
@@ -188,37 +96,39 @@ async def integrar_dados():
     
     todos_imoveis = []
     
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        
+    # Browser partilhado (browser_pool): um contexto por site
+    pool = get_browser_pool()
+    try:
         for i, site in enumerate(SITES_OK, 1):
             print(f"\n📌 [{i}/6] A processar {site['nome']}...")
             
             try:
-                context = await browser.new_context(
+                async with pool.page(
                     user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                )
-                page = await context.new_page()
-                
-                # Navegar para o site
-                await page.goto(site['url'], timeout=45000)
-                
-                # Scraper específico ou genérico
-                if site['nome'] == 'leilosoc.com':
-                    imoveis = await scrape_leilosoc(page)
-                else:
-                    imoveis = await scrape_generico(page, site)
+                ) as page:
+                    # Navegar para o site, com a vaga e o ritmo adaptativos do host
+                    async with host_limiter.slot(site['url']):
+                        start = time.perf_counter()
+                        response = await goto_ready(page, site['url'], timeout_ms=45000)
+                        host_limiter.feedback(
+                            site['url'], response.status if response else 200, time.perf_counter() - start,
+                            parse_retry_after(response.headers.get('retry-after')) if response else None
+                        )
+                    
+                    # Scraper específico ou genérico
+                    if site['nome'] == 'leilosoc.com':
+                        imoveis = await scrape_leilosoc(page)
+                    else:
+                        imoveis = await scrape_generico(page, site)
                 
                 print(f"✅ {site['nome']}: {len(imoveis)} imóveis extraídos")
                 todos_imoveis.extend(imoveis)
                 
-                await context.close()
-                await asyncio.sleep(2)  # Delay entre sites
-                
             except Exception as e:
                 print(f"❌ {site['nome']}: {str(e)[:80]}")
-        
-        await browser.close()
+    finally:
+        await close_browser_pool()
+        shutdown_parse_pool()
     
     # Guardar resultados
     resultado = {
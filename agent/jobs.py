@@ -0,0 +1,146 @@
+"""
+Jobs - Lisboa Real Estate AI
+Fila de pesquisas em SQLite partilhada por vários workers
+
+Cada job é uma pesquisa (portal, localização, tipologia). Os workers reservam
+jobs de forma atómica com um lease; se um worker morrer, o lease expira e o
+job volta à fila. Vários processos (ou máquinas com a base de dados num
+mount partilhado) podem correr workers em simultâneo.
+"""
+
+import os
+import socket
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_searches(db, portals: List[str], locations: List[str],
+                     typologies: Optional[List[str]] = None,
+                     max_pages: int = 3, priority: int = 0,
+                     host_for: Optional[Callable[[str], str]] = None) -> int:
+    """
+    Adiciona à fila todas as combinações portal × localização × tipologia
+
+    Com host_for (portal -> host), os portais que mais imóveis rendem no
+    registo de saúde (site_registry) ganham prioridade (+1 por nível de
+    rendimento acima do pior) e os que não rendem recebem menos páginas.
+
+    Returns:
+        Número de jobs novos (pesquisas já em fila são ignoradas)
+    """
+    priorities = {portal: priority for portal in portals}
+    pages = {portal: max_pages for portal in portals}
+    if host_for is not None:
+        from site_registry import SiteRegistry
+
+        registry = SiteRegistry(db)
+        scores = {portal: registry.yield_score(host_for(portal)) for portal in portals}
+        levels = sorted(set(scores.values()))
+        for portal in portals:
+            priorities[portal] += levels.index(scores[portal])
+            pages[portal] = registry.page_budget(host_for(portal), max_pages)
+
+    added = 0
+    for portal in portals:
+        for location in locations:
+            for typology in typologies or ['']:
+                if db.enqueue_job(portal, location, typology,
+                                  max_pages=pages[portal], priority=priorities[portal]):
+                    added += 1
+
+    logger.info(f"{added} jobs adicionados à fila")
+    return added
+
+
+class ScrapeWorker:
+    """
+    Worker que consome a fila de jobs
+
+    Args:
+        app: LisboaRealEstateAI (scraping, análise e gravação em bloco)
+        worker_id: Identificador único (por omissão host:pid)
+        lease_seconds: Duração da reserva de um job (renovada enquanto corre)
+        poll_interval: Espera entre consultas quando a fila está vazia
+    """
+
+    def __init__(self, app, worker_id: Optional[str] = None,
+                 lease_seconds: int = 900, poll_interval: float = 10):
+        self.app = app
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.processed = 0
+
+    async def _heartbeat(self, job_id: int):
+        """Renova o lease enquanto o job corre"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            if not self.app.db.renew_lease(job_id, self.worker_id, self.lease_seconds):
+                logger.warning(f"Job {job_id}: lease perdido")
+                return
+
+    async def run_job(self, job: Dict) -> bool:
+        """Executa um job; True se concluído com sucesso"""
+        label = f"{job['portal']}|{job['location']}|{job['typology'] or '*'}"
+        logger.info(f"[{self.worker_id}] Job {job['id']} ({label}), tentativa {job['attempts']}")
+
+        heartbeat = asyncio.ensure_future(self._heartbeat(job['id']))
+        try:
+            properties = await self.app.scrape_and_analyze(
+                location=job['location'],
+                typology=job['typology'],
+                max_pages=job['max_pages'],
+                portals=[job['portal']],
+                # Erros da pesquisa contam como falha do job (tentativas, fail_job)
+                raise_on_error=True
+            )
+        except Exception as e:
+            logger.error(f"Job {job['id']} falhou: {e}")
+            self.app.db.fail_job(job['id'], self.worker_id, str(e))
+            metrics.inc('jobs_total', status='failed', portal=job['portal'])
+            return False
+        finally:
+            heartbeat.cancel()
+
+        self.app.db.complete_job(job['id'], self.worker_id, len(properties))
+        metrics.inc('jobs_total', status='done', portal=job['portal'])
+        logger.info(f"Job {job['id']} concluído: {len(properties)} imóveis")
+        return True
+
+    async def run(self, drain: bool = False, max_jobs: Optional[int] = None) -> int:
+        """
+        Consome jobs até a fila esvaziar (drain) ou indefinidamente
+
+        Args:
+            drain: Terminar quando não houver jobs disponíveis
+            max_jobs: Terminar após N jobs
+
+        Returns:
+            Número de jobs processados
+        """
+        logger.info(f"Worker {self.worker_id} iniciado")
+
+        while max_jobs is None or self.processed < max_jobs:
+            job = self.app.db.lease_job(self.worker_id, self.lease_seconds)
+            metrics.set_gauge('queue_depth', self.app.db.get_job_stats().get('pending', 0), queue='jobs')
+
+            if job is None:
+                if drain:
+                    break
+                await asyncio.sleep(self.poll_interval)
+                continue
+
+            metrics.start_run()
+            try:
+                await self.run_job(job)
+            finally:
+                self.app.export_metrics(f"../data/metrics/workers/{self.worker_id.replace(':', '_')}")
+            self.processed += 1
+
+        logger.info(f"Worker {self.worker_id} terminado ({self.processed} jobs)")
+        return self.processed
@@ -9,7 +9,6 @@ from typing import List, Dict, Optional
 from dataclasses import dataclass
 from datetime import datetime
 import json
-import re
 
 logger = logging.getLogger(__name__)
 
@@ -94,87 +93,60 @@ class LeilaoScraper:
         
     async def test_site_simple(self, name: str, url: str) -> bool:
         """Testa um site de forma simples (apenas verifica se responde)"""
-        try:
-            import aiohttp
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, timeout=10, headers={
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                }) as response:
-                    if response.status == 200:
-                        logger.info(f"✅ {name}: OK (Status {response.status})")
-                        self.success_sites.append(name)
-                        return True
-                    else:
-                        logger.warning(f"⚠️ {name}: Status {response.status}")
-                        self.failed_sites.append(f"{name} (Status {response.status})")
-                        return False
-        except Exception as e:
-            logger.error(f"❌ {name}: {str(e)}")
-            self.failed_sites.append(f"{name} ({str(e)[:50]})")
-            return False
+        from health_check import SiteHealthChecker
+        
+        async with SiteHealthChecker(timeout_s=10) as checker:
+            result = await checker.check_site(name, url)
+        return self._register(result)
+    
+    def _register(self, result) -> bool:
+        """Regista o resultado de um health check nas listas de sites"""
+        if result.ok:
+            logger.info(f"✅ {result.name}: OK (Status {result.status})")
+            self.success_sites.append(result.name)
+        else:
+            logger.warning(f"⚠️ {result.name}: {result.error}")
+            self.failed_sites.append(f"{result.name} ({result.error[:50]})")
+        return result.ok
+    
+    async def run_health_checks(self, tiers: Optional[List[str]] = None) -> Dict:
+        """
+        Testa em paralelo os sites dos tiers pedidos (por omissão todos)
+        
+        Sites com o circuit breaker aberto são saltados (health_check.py).
+        """
+        from health_check import SiteHealthChecker, sites_from_tiers
+        
+        async with SiteHealthChecker() as checker:
+            for result in await checker.check_all(sites_from_tiers(tiers)):
+                self._register(result)
+        
+        logger.info(f"\n✅ Sites OK: {len(self.success_sites)}")
+        logger.info(f"❌ Sites falhados: {len(self.failed_sites)}")
+        
+        return {
+            "success": self.success_sites,
+            "failed": self.failed_sites
+        }
     
     async def scrape_leilosoc(self) -> List[LeilaoProperty]:
         """Scraper específico para leilosoc.com"""
         properties = []
         try:
-            import aiohttp
-            from bs4 import BeautifulSoup
+            from fetcher import TieredFetcher
+            
+            # URL de leilões imobiliários
+            url = "https://www.leilosoc.com/pt/leiloes/?categoria=imoveis"
+            
+            # HTTP simples (condicional, com cache); browser só se o site o exigir.
+            # Parse no pool de processos; página igual à anterior: sem parse
+            async with TieredFetcher() as fetcher:
+                items = await fetcher.fetch_parsed(url, adapter='leilosoc')
+            if not items:
+                return properties
+            
+            properties = [LeilaoProperty(**item) for item in items]
             
-            async with aiohttp.ClientSession() as session:
-                # URL de leilões imobiliários
-                url = "https://www.leilosoc.com/pt/leiloes/?categoria=imoveis"
-                
-                async with session.get(url, headers={
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                }) as response:
-                    if response.status != 200:
-                        return properties
-                    
-                    html = await response.text()
-                    soup = BeautifulSoup(html, 'html.parser')
-                    
-                    # Procurar cards de imóveis (estrutura típica)
-                    cards = soup.find_all('div', class_=re.compile('property|imovel|leilao', re.I))
-                    
-                    for card in cards[:10]:  # Limitar a 10 para teste
-                        try:
-                            # Extrair dados básicos
-                            titulo = card.find(['h2', 'h3', 'h4', 'a'])
-                            titulo = titulo.get_text(strip=True) if titulo else "Sem título"
-                            
-                            preco_elem = card.find(text=re.compile(r'\d+[\.\d]*\s*€'))
-                            preco = 0
-                            if preco_elem:
-                                match = re.search(r'(\d+[\.\d]*)\s*€', preco_elem)
-                                if match:
-                                    preco = float(match.group(1).replace('.', ''))
-                            
-                            link_elem = card.find('a', href=True)
-                            link = link_elem['href'] if link_elem else ""
-                            if link and not link.startswith('http'):
-                                link = f"https://www.leilosoc.com{link}"
-                            
-                            prop = LeilaoProperty(
-                                id=f"leilosoc_{len(properties)}",
-                                titulo=titulo,
-                                localizacao="Lisboa",
-                                descricao="",
-                                preco_base=preco,
-                                preco_avaliacao=None,
-                                data_leilao=None,
-                                tipo="Apartamento",
-                                area=None,
-                                url=link,
-                                fonte="leilosoc.com",
-                                imagens=[],
-                                estado="aberto"
-                            )
-                            properties.append(prop)
-                            
-                        except Exception as e:
-                            logger.warning(f"Erro ao extrair card: {e}")
-                            continue
-                            
         except Exception as e:
             logger.error(f"Erro no scraper leilosoc: {e}")
         
@@ -183,20 +155,7 @@ class LeilaoScraper:
     async def run_safe_tests(self):
         """Executa testes nos sites mais seguros"""
         logger.info("🧪 Iniciando testes em sites seguros (Tier 1)...")
-        
-        tasks = []
-        for name, url in LEILAO_SITES["safe"]:
-            tasks.append(self.test_site_simple(name, url))
-        
-        await asyncio.gather(*tasks, return_exceptions=True)
-        
-        logger.info(f"\n✅ Sites OK: {len(self.success_sites)}")
-        logger.info(f"❌ Sites falhados: {len(self.failed_sites)}")
-        
-        return {
-            "success": self.success_sites,
-            "failed": self.failed_sites
-        }
+        return await self.run_health_checks(["safe"])
     
     async def scrape_all_safe(self) -> List[LeilaoProperty]:
         """Tenta fazer scraping nos sites que funcionaram"""
@@ -271,7 +230,16 @@ async def main():
     
     # Tentar scraping nos que funcionaram
     print("\n🔍 Tentando extrair dados dos sites OK...")
-    properties = await scraper.scrape_all_safe()
+    try:
+        properties = await scraper.scrape_all_safe()
+    finally:
+        # Browser só é lançado se algum site precisou dele
+        from browser_pool import close_browser_pool
+        from http_client import close_http_session
+        from parse_pool import shutdown_parse_pool
+        await close_browser_pool()
+        await close_http_session()
+        shutdown_parse_pool()
     
     print(f"\n📊 Total de imóveis encontrados: {len(properties)}")
     
@@ -7,25 +7,20 @@ Integração completa: scraping + análise + GitHub sync
 import os
 import sys
 import json
-import asyncio
 import argparse
 import logging
+import time
 from datetime import datetime
+from functools import cached_property
 from pathlib import Path
 
 # Adicionar diretório do agente ao path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from bot import RealEstateBot, Property
-from analyzer import MarketAnalyzer
-from database import PropertyDatabase
-from github_bridge import GitHubBridge, LocalDataStore
-
-# Scrapers (com fallback)
-try:
-    from scrapers_v2 import MultiPortalScraper, ScrapedProperty
-except ImportError:
-    from scrapers import MultiPortalScraper, ScrapedProperty
+# Módulos pesados (scrapers, playwright, aiohttp, requests, ...) são importados
+# na primeira utilização: comandos só de leitura como --stats arrancam rápido
+from metrics import metrics
+from profiler import PROFILE_MODES, mark_stage
 
 logging.basicConfig(
     level=logging.INFO,
@@ -37,93 +32,334 @@ logger = logging.getLogger(__name__)
 class LisboaRealEstateAI:
     """Sistema completo de análise imobiliária"""
     
-    def __init__(self):
-        self.bot = RealEstateBot()
-        self.analyzer = MarketAnalyzer()
-        self.db = PropertyDatabase()
-        self.github = GitHubBridge()
-        self.local_store = LocalDataStore()
-        self.scraper = MultiPortalScraper()
+    def __init__(self, max_concurrency: int = 4, per_host_limit: int = 2):
+        self.max_concurrency = max_concurrency
+        self.per_host_limit = per_host_limit
+        self.last_latency_report = []
+    
+    # Componentes construídos na primeira utilização
+    
+    @cached_property
+    def bot(self):
+        from bot import RealEstateBot
+        return RealEstateBot()
+    
+    @cached_property
+    def analyzer(self):
+        from analyzer import MarketAnalyzer
+        return MarketAnalyzer()
+    
+    @cached_property
+    def db(self):
+        from database import PropertyDatabase
+        return PropertyDatabase()
+    
+    @cached_property
+    def github(self):
+        from github_bridge import GitHubBridge
+        return GitHubBridge()
+    
+    @cached_property
+    def local_store(self):
+        from github_bridge import LocalDataStore
+        return LocalDataStore()
+    
+    @cached_property
+    def scraper(self):
+        # Scrapers (com fallback)
+        try:
+            from scrapers_v2 import MultiPortalScraper
+        except ImportError:
+            from scrapers import MultiPortalScraper
+        return MultiPortalScraper()
     
     async def scrape_and_analyze(self, 
                                   location: str = "lisboa",
                                   typology: str = "",
-                                  max_pages: int = 3) -> list:
+                                  max_pages: int = 3,
+                                  portals: list = None,
+                                  resume: bool = True,
+                                  enrich: bool = False,
+                                  enrich_budget_s: float = 300,
+                                  raise_on_error: bool = False) -> list:
         """
         Executa scraping e análise completa
         
+        Args:
+            location: Localização ou lista separada por vírgulas ("lisboa,cascais")
+            typology: Tipologia ou lista separada por vírgulas ("t1,t2")
+            portals: Portais a usar (por omissão todos)
+            resume: Guardar página a página e retomar pesquisas interrompidas
+            enrich: Visitar as páginas de detalhe (maior score primeiro) e recalcular o score
+            enrich_budget_s: Tempo máximo do enrichment
+            raise_on_error: Lançar RuntimeError se alguma pesquisa falhou
+                (por omissão os erros ficam só no log e em latency_report)
+        
         Returns:
             Lista de propriedades analisadas
         """
-        logger.info(f"Iniciando busca em {location}...")
+        from fanout import FanoutSearch
+        from site_registry import SiteRegistry
+        from checkpoints import CrawlCheckpointer
         
-        # 1. Scraping
-        raw_results = await self.scraper.search_all(
-            location=location,
-            typology=typology,
-            max_pages=max_pages
-        )
+        locations = split_values(location) or ["lisboa"]
+        typologies = split_values(typology) or [""]
+        logger.info(f"Iniciando busca em {', '.join(locations)}...")
+        
+        # Imóveis analisados e guardados durante o crawl (por página)
+        analyzed_by_id = {}
+        
+        def persist_page(items: list) -> list:
+            props, rows, unchanged = self._analyze_changed(items)
+            for prop in props:
+                analyzed_by_id[prop.id] = prop
+            if unchanged:
+                self.db.touch_properties(unchanged)
+            return rows
+        
+        checkpointer = CrawlCheckpointer(self.db, persist_page) if resume else None
+        
+        # 1. Scraping (fan-out concorrente quando há várias combinações)
+        with metrics.timer('stage_seconds', stage='scrape'):
+            if len(locations) > 1 or len(typologies) > 1 or portals:
+                fanout = FanoutSearch(
+                    self.scraper,
+                    max_concurrency=self.max_concurrency,
+                    per_host_limit=self.per_host_limit,
+                    registry=SiteRegistry(self.db)
+                )
+                raw_results = await fanout.search_matrix(
+                    locations=locations,
+                    typologies=typologies,
+                    portals=portals,
+                    max_pages=max_pages,
+                    checkpointer=checkpointer
+                )
+                self.last_latency_report = fanout.latency_report()
+                errors = [f"{cell.key}: {cell.error}" for cell in fanout.cells if cell.error]
+                if errors and raise_on_error:
+                    raise RuntimeError('; '.join(errors))
+            else:
+                raw_results = await self.scraper.search_all(
+                    location=locations[0],
+                    typology=typologies[0],
+                    max_pages=max_pages,
+                    checkpointer=checkpointer
+                )
+        mark_stage('scrape')
         
         # 2. Deduplicar
-        unique_properties = self.scraper.deduplicate(raw_results)
+        with metrics.timer('stage_seconds', stage='dedup'):
+            unique_properties = self.scraper.deduplicate(raw_results)
+        mark_stage('dedup')
         logger.info(f"{len(unique_properties)} imóveis únicos encontrados")
         
-        # 3. Converter para formato interno
-        analyzed_properties = []
-        
-        for scraped in unique_properties:
-            # Converter ScrapedProperty -> Property
-            prop = Property(
-                id=scraped.id,
-                portal=scraped.portal,
-                url=scraped.url,
-                title=scraped.title,
-                price=scraped.price,
-                price_history=[],
-                area_m2=scraped.area_m2,
-                typology=scraped.typology,
-                location=scraped.location,
-                parish=scraped.parish,
-                municipality=scraped.municipality,
-                description=scraped.description,
-                features=scraped.features,
-                photos=scraped.photos,
-                days_on_market=scraped.created_at and 
-                    (datetime.now() - scraped.created_at).days or 0
-            )
-            
-            # 4. Calcular score de oportunidade
-            # Buscar dados de mercado da zona
-            market_data = self.db.get_market_data(scraped.parish, scraped.typology) or {}
-            
-            metrics = self.bot.calculate_opportunity_score(prop, market_data)
-            prop.opportunity_score = metrics.score
-            prop.opportunity_category = metrics.category
+        # Páginas guardadas durante o crawl têm os duplicados que a deduplicação juntou
+        if analyzed_by_id:
+            kept = {scraped.id for scraped in unique_properties}
+            duplicates = [prop_id for prop_id in analyzed_by_id if prop_id not in kept]
+            if duplicates:
+                marked = self.db.mark_duplicates(duplicates)
+                logger.info(f"{marked} imóveis guardados durante o crawl marcados como duplicados")
+        
+        # 3. Analisar e guardar o que não foi guardado durante o crawl
+        analyze_start = time.perf_counter()
+        
+        pending = [scraped for scraped in unique_properties if scraped.id not in analyzed_by_id]
+        props, pending_rows, unchanged = self._analyze_changed(pending)
+        analyzed_by_id.update((prop.id, prop) for prop in props)
+        analyzed_properties = [analyzed_by_id[scraped.id] for scraped in unique_properties
+                               if scraped.id in analyzed_by_id]
+        
+        if pending_rows:
+            self.db.save_properties(pending_rows)
+        if unchanged:
+            self.db.touch_properties(unchanged)
+        logger.info(f"{len(pending_rows)} imóveis novos/alterados, {len(unchanged)} sem alterações")
+        
+        # Páginas guardadas por uma execução anterior que foi retomada
+        if checkpointer:
+            seen = {prop.id for prop in analyzed_properties}
+            for prop_id in checkpointer.resumed_ids - seen:
+                row = self.db.get_property(prop_id)
+                if row and row['status'] != 'duplicate':
+                    analyzed_properties.append(self._from_row(row))
+        
+        metrics.observe('stage_seconds', time.perf_counter() - analyze_start, stage='analyze')
+        mark_stage('analyze')
+        
+        # 4. Páginas de detalhe: todos entram na fila; com enrich, os de maior score são visitados já
+        from enrichment import enqueue_for_enrichment
+        
+        enqueue_for_enrichment(self.db, analyzed_properties)
+        if enrich:
+            position = {prop.id: i for i, prop in enumerate(analyzed_properties)}
             
-            analyzed_properties.append(prop)
+            def replace(prop):
+                if prop.id in position:
+                    analyzed_properties[position[prop.id]] = prop
             
-            # 5. Guardar na base de dados
-            self.db.save_property({
-                'id': prop.id,
-                'portal': prop.portal,
-                'url': prop.url,
-                'title': prop.title,
-                'price': prop.price,
-                'area_m2': prop.area_m2,
-                'typology': prop.typology,
-                'location': prop.location,
-                'parish': prop.parish,
-                'municipality': prop.municipality,
-                'opportunity_score': prop.opportunity_score,
-                'opportunity_category': prop.opportunity_category,
-                'days_on_market': prop.days_on_market,
-            })
+            await self.enrich_details(time_budget_s=enrich_budget_s, on_enriched=replace)
+            mark_stage('enrich')
         
         # Ordenar por score
         analyzed_properties.sort(key=lambda x: x.opportunity_score, reverse=True)
         
         return analyzed_properties
     
+    async def enrich_details(self, limit: int = 200, time_budget_s: float = None,
+                             on_enriched=None) -> dict:
+        """
+        Enriquece imóveis da fila com a página de detalhe e recalcula o score
+        
+        Args:
+            limit: Máximo de imóveis
+            time_budget_s: Tempo máximo (os de maior score vão primeiro)
+            on_enriched: Chamado com cada Property reanalisada
+            
+        Returns:
+            Dict com enriquecidos, falhados e adiados
+        """
+        from enrichment import DetailEnricher
+        
+        def rescore(prop_id: str):
+            prop = self._rescore(prop_id)
+            if prop and on_enriched:
+                on_enriched(prop)
+        
+        enricher = DetailEnricher(
+            self.db,
+            max_concurrency=self.max_concurrency,
+            per_host_limit=self.per_host_limit
+        )
+        counts = await enricher.run(limit=limit, time_budget_s=time_budget_s, on_enriched=rescore)
+        logger.info(f"Enrichment: {counts}")
+        return counts
+    
+    def _rescore(self, prop_id: str):
+        """Recalcula o score de um imóvel guardado (com os dados de detalhe)"""
+        row = self.db.get_property(prop_id)
+        if not row:
+            return None
+        
+        prop = self._from_row(row)
+        market_data = self.db.get_market_data(prop.parish, prop.typology) or {}
+        with metrics.timer('score_seconds'):
+            opportunity = self.bot.calculate_opportunity_score(prop, market_data)
+        prop.opportunity_score = opportunity.score
+        prop.opportunity_category = opportunity.category
+        self.db.update_score(prop.id, prop.opportunity_score, prop.opportunity_category)
+        return prop
+    
+    def _analyze_changed(self, items: list) -> tuple:
+        """
+        Analisa só as listagens novas ou alteradas (fingerprint diferente)
+        
+        As que não mudaram desde a última gravação são lidas da base de
+        dados tal como estão: sem score nem reescrita da linha.
+        
+        Returns:
+            (Properties, linhas a gravar, IDs sem alterações para touch_properties)
+        """
+        from database import listing_fingerprint
+        
+        fingerprints = {scraped.id: listing_fingerprint(vars(scraped)) for scraped in items}
+        stored = self.db.get_fingerprints(list(fingerprints))
+        unchanged = [prop_id for prop_id, fp in fingerprints.items() if stored.get(prop_id) == fp]
+        
+        props, rows = [], []
+        for scraped in items:
+            if stored.get(scraped.id) == fingerprints[scraped.id]:
+                continue
+            prop = self._analyze(scraped)
+            row = self._to_row(prop)
+            row['fingerprint'] = fingerprints[scraped.id]
+            props.append(prop)
+            rows.append(row)
+        
+        props.extend(self._from_row(row) for row in self.db.get_properties_by_ids(unchanged))
+        return props, rows, unchanged
+    
+    def _analyze(self, scraped):
+        """Converte ScrapedProperty -> Property e calcula o score de oportunidade"""
+        from bot import Property
+        
+        prop = Property(
+            id=scraped.id,
+            portal=scraped.portal,
+            url=scraped.url,
+            title=scraped.title,
+            price=scraped.price,
+            price_history=[],
+            area_m2=scraped.area_m2,
+            typology=scraped.typology,
+            location=scraped.location,
+            parish=scraped.parish,
+            municipality=scraped.municipality,
+            description=scraped.description,
+            features=scraped.features,
+            photos=scraped.photos,
+            days_on_market=scraped.created_at and 
+                (datetime.now() - scraped.created_at).days or 0
+        )
+        
+        # Buscar dados de mercado da zona
+        market_data = self.db.get_market_data(scraped.parish, scraped.typology) or {}
+        
+        with metrics.timer('score_seconds'):
+            opportunity = self.bot.calculate_opportunity_score(prop, market_data)
+        prop.opportunity_score = opportunity.score
+        prop.opportunity_category = opportunity.category
+        
+        return prop
+    
+    @staticmethod
+    def _to_row(prop) -> dict:
+        """Property -> dict para a base de dados"""
+        return {
+            'id': prop.id,
+            'portal': prop.portal,
+            'url': prop.url,
+            'title': prop.title,
+            'price': prop.price,
+            'area_m2': prop.area_m2,
+            'typology': prop.typology,
+            'location': prop.location,
+            'parish': prop.parish,
+            'municipality': prop.municipality,
+            'opportunity_score': prop.opportunity_score,
+            'opportunity_category': prop.opportunity_category,
+            'days_on_market': prop.days_on_market,
+            # Listagem vista agora (um 'duplicate' anterior volta a ativo)
+            'status': 'active',
+        }
+    
+    @staticmethod
+    def _from_row(row: dict):
+        """Linha da base de dados -> Property (imóveis já analisados)"""
+        from bot import Property
+        
+        prop = Property(
+            id=row['id'],
+            portal=row['portal'],
+            url=row['url'],
+            title=row['title'] or "",
+            price=row['price'] or 0,
+            price_history=row.get('price_history') or [],
+            area_m2=row['area_m2'],
+            typology=row['typology'] or "",
+            location=row['location'] or "",
+            parish=row['parish'] or "",
+            municipality=row['municipality'] or "",
+            description=row.get('description') or "",
+            features=row.get('features') or [],
+            photos=row.get('photos') or [],
+            days_on_market=row['days_on_market'] or 0
+        )
+        prop.opportunity_score = row['opportunity_score'] or 0
+        prop.opportunity_category = row['opportunity_category'] or ""
+        return prop
+    
     def filter_opportunities(self, 
                             properties: list,
                             min_score: int = 40,
@@ -197,27 +433,81 @@ class LisboaRealEstateAI:
         
         return {'local': True}
     
+    def export_metrics(self, metrics_dir: str = None) -> dict:
+        """Escreve o textfile Prometheus e o resumo JSON do ciclo"""
+        from http_cache import report_run
+        
+        report_run()
+        return metrics.export(metrics_dir) if metrics_dir else metrics.export()
+    
+    def enqueue(self, location: str = "lisboa", typology: str = "",
+                max_pages: int = 3, portals: list = None, priority: int = 0) -> int:
+        """
+        Adiciona pesquisas à fila de jobs (consumida por --worker)
+        
+        Args:
+            location: Localização ou várias separadas por vírgula
+            typology: Tipologia ou várias separadas por vírgula
+            portals: Portais a usar (por omissão todos)
+            priority: Jobs de maior prioridade são reservados primeiro
+            
+        Returns:
+            Número de jobs novos
+        """
+        from jobs import enqueue_searches
+        
+        return enqueue_searches(
+            self.db,
+            portals=portals or self.scraper.portals,
+            locations=split_values(location) or ["lisboa"],
+            typologies=split_values(typology) or [""],
+            max_pages=max_pages,
+            priority=priority,
+            host_for=self.scraper.host_for
+        )
+    
     def get_stats(self) -> dict:
         """Obtém estatísticas da base de dados"""
         return self.db.get_stats()
     
     def close(self):
-        """Fecha recursos"""
-        self.db.close()
+        """Fecha recursos (apenas os que chegaram a ser criados)"""
+        if 'db' in self.__dict__:
+            self.db.close()
 
 
-async def main():
-    """Função principal CLI"""
+def split_values(value: str) -> list:
+    """Divide um argumento separado por vírgulas ("lisboa,cascais")"""
+    return [v.strip() for v in (value or "").split(',') if v.strip()]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Argumentos do CLI"""
     parser = argparse.ArgumentParser(
         description='Lisboa Real Estate AI - Análise de Oportunidades Imobiliárias'
     )
     
     parser.add_argument('--search', '-s', 
-                       help='Localização para busca (ex: lisboa, cascais)')
+                       help='Localização para busca (ex: lisboa ou lisboa,cascais,oeiras)')
     parser.add_argument('--typology', '-t',
-                       help='Tipologia (t0, t1, t2, t3, t4, moradia)')
+                       help='Tipologia (t0, t1, t2, t3, t4, moradia; várias separadas por vírgula)')
+    parser.add_argument('--portals',
+                       help='Portais a usar, separados por vírgula (por omissão todos)')
+    parser.add_argument('--concurrency', type=int, default=4,
+                       help='Máximo de pesquisas em paralelo')
+    parser.add_argument('--per-host', type=int, default=2,
+                       help='Máximo de pesquisas em paralelo por portal')
     parser.add_argument('--max-pages', '-p', type=int, default=3,
                        help='Máximo de páginas a scrapear')
+    parser.add_argument('--no-resume', action='store_true',
+                       help='Ignorar checkpoints e recomeçar pesquisas da primeira página')
+    parser.add_argument('--enrich', action='store_true',
+                       help='Visitar páginas de detalhe (maior score primeiro); sem --search, '
+                            'processa só a fila de enrichment')
+    parser.add_argument('--enrich-limit', type=int, default=200,
+                       help='Máximo de páginas de detalhe por execução')
+    parser.add_argument('--enrich-budget', type=float, default=300,
+                       help='Tempo máximo do enrichment (segundos)')
     parser.add_argument('--min-score', type=int, default=40,
                        help='Score mínimo de oportunidade')
     parser.add_argument('--category', '-c',
@@ -236,11 +526,110 @@ async def main():
                        help='Modo daemon (execução contínua)')
     parser.add_argument('--interval', '-i', type=int, default=3600,
                        help='Intervalo entre execuções (segundos)')
+    parser.add_argument('--profile', nargs='?', const='cpu', choices=PROFILE_MODES,
+                       help='Perfil da execução (cpu, wall ou mem) em ../data/profiles/')
+    parser.add_argument('--profile-cycles', type=int, default=1,
+                       help='Ciclos do daemon a perfilar antes de terminar')
+    parser.add_argument('--enqueue', action='store_true',
+                       help='Adicionar as pesquisas (--search/--typology/--portals) à fila de jobs; '
+                            'com --daemon, a cada intervalo')
+    parser.add_argument('--priority', type=int, default=0,
+                       help='Prioridade dos jobs adicionados com --enqueue')
+    parser.add_argument('--worker', action='store_true',
+                       help='Consumir jobs da fila')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Número de processos worker')
+    parser.add_argument('--drain', action='store_true',
+                       help='Worker termina quando a fila estiver vazia')
+    parser.add_argument('--lease', type=int, default=900,
+                       help='Duração do lease de um job (segundos)')
+    parser.add_argument('--fixtures', choices=('record', 'replay'),
+                       help='Gravar as respostas em ../data/fixtures/ ou reproduzi-las offline')
     
-    args = parser.parse_args()
+    return parser
+
+
+def run_worker(args: argparse.Namespace) -> int:
+    """Processo worker: consome a fila até terminar (ou para sempre)"""
+    import asyncio
+    from jobs import ScrapeWorker
+    from browser_pool import close_browser_pool
+    from http_client import close_http_session
+    from fixtures import close_fixture_server
+    from parse_pool import shutdown_parse_pool
     
-    # Inicializar sistema
+    async def work():
+        app = LisboaRealEstateAI(
+            max_concurrency=args.concurrency,
+            per_host_limit=args.per_host
+        )
+        try:
+            worker = ScrapeWorker(app, lease_seconds=args.lease)
+            return await worker.run(drain=args.drain)
+        finally:
+            app.close()
+            await close_browser_pool()
+            await close_http_session()
+            await close_fixture_server()
+            shutdown_parse_pool()
+    
+    return asyncio.run(work())
+
+
+def run_workers(args: argparse.Namespace):
+    """--worker: um worker neste processo ou N processos (--workers)"""
+    if args.workers <= 1:
+        run_worker(args)
+        return
+    
+    import multiprocessing
+    
+    # spawn: cada processo abre a sua ligação SQLite e o seu browser
+    context = multiprocessing.get_context('spawn')
+    processes = [
+        context.Process(target=run_worker, args=(args,), name=f"worker-{i}")
+        for i in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    logger.info(f"{len(processes)} workers iniciados")
+    
+    for process in processes:
+        process.join()
+
+
+def show_stats():
+    """--stats: só abre a base de dados (sem asyncio nem scrapers)"""
     app = LisboaRealEstateAI()
+    try:
+        print(json.dumps(app.get_stats(), indent=2))
+    finally:
+        app.close()
+
+
+async def main(args: argparse.Namespace = None):
+    """Função principal CLI"""
+    import asyncio
+    from profiler import RunProfiler
+    from browser_pool import close_browser_pool
+    from http_client import close_http_session
+    from fixtures import close_fixture_server
+    from parse_pool import shutdown_parse_pool
+    
+    parser = build_parser()
+    if args is None:
+        args = parser.parse_args()
+    
+    # Profiling de uma execução completa (o daemon perfila por ciclo)
+    profiler = None
+    if args.profile and not args.daemon:
+        profiler = RunProfiler(args.profile, label='search' if args.search else 'cli').start()
+    
+    # Inicializar sistema
+    app = LisboaRealEstateAI(
+        max_concurrency=args.concurrency,
+        per_host_limit=args.per_host
+    )
     
     try:
         if args.stats:
@@ -248,12 +637,34 @@ async def main():
             print(json.dumps(stats, indent=2))
             return
         
+        if args.enqueue:
+            # Produtor de jobs (consumidos por --worker); com --daemon a cada intervalo
+            if args.daemon:
+                logger.info(f"Daemon produtor iniciado (intervalo: {args.interval}s)")
+            while True:
+                added = app.enqueue(
+                    location=args.search or "lisboa",
+                    typology=args.typology or "",
+                    max_pages=args.max_pages,
+                    portals=split_values(args.portals) or None,
+                    priority=args.priority
+                )
+                print(f"{added} jobs adicionados à fila")
+                print(json.dumps(app.db.get_job_stats(), indent=2))
+                if not args.daemon:
+                    return
+                await asyncio.sleep(args.interval)
+        
         if args.search:
             # Executar scraping e análise
             properties = await app.scrape_and_analyze(
                 location=args.search,
                 typology=args.typology or "",
-                max_pages=args.max_pages
+                max_pages=args.max_pages,
+                portals=split_values(args.portals) or None,
+                resume=not args.no_resume,
+                enrich=args.enrich,
+                enrich_budget_s=args.enrich_budget
             )
             
             # Filtrar
@@ -268,6 +679,15 @@ async def main():
             print(f"RESULTADOS: {len(filtered)} oportunidades encontradas")
             print(f"{'='*60}\n")
             
+            # Latência por pesquisa (apenas em fan-out)
+            if app.last_latency_report:
+                print("Latência por pesquisa:")
+                for row in app.last_latency_report:
+                    status = f"erro: {row['error']}" if row['error'] else f"{row['properties']} imóveis"
+                    print(f"   {row['portal']} | {row['location']} | {row['typology'] or '*'}: "
+                          f"{row['latency_s']:.1f}s ({status})")
+                print()
+            
             # Mostrar top 10
             for i, prop in enumerate(filtered[:10], 1):
                 cat_emoji = {'A': '🔴', 'B': '🟡', 'C': '🟢', 'D': '🔵'}.get(prop.opportunity_category, '⚪')
@@ -285,29 +705,70 @@ async def main():
             if args.sync:
                 results = app.sync_to_dashboard(filtered)
                 print(f"\nSync: {results}")
+            
+            app.export_metrics()
+        
+        elif args.enrich and not args.daemon:
+            # Só a fila de enrichment (imóveis de pesquisas anteriores)
+            counts = await app.enrich_details(limit=args.enrich_limit, time_budget_s=args.enrich_budget)
+            print(json.dumps(counts, indent=2))
+            app.export_metrics()
         
         elif args.daemon:
-            # Modo daemon
-            import schedule
-            import time
-            
-            def job():
+            # Modo daemon (já dentro do event loop: não usar asyncio.run)
+            async def job():
                 logger.info("Executando atualização programada...")
-                asyncio.run(app.scrape_and_analyze())
+                metrics.start_run()
+                try:
+                    await app.scrape_and_analyze(enrich=args.enrich, enrich_budget_s=args.enrich_budget)
+                finally:
+                    app.export_metrics()
             
-            schedule.every(args.interval).seconds.do(job)
+            if args.profile:
+                # Ciclos seguidos, cada um com o seu perfil, e terminar
+                for cycle in range(1, args.profile_cycles + 1):
+                    with RunProfiler(args.profile, label=f"daemon_cycle{cycle}"):
+                        await job()
+                return
             
             logger.info(f"Daemon iniciado (intervalo: {args.interval}s)")
             while True:
-                schedule.run_pending()
-                time.sleep(1)
+                await asyncio.sleep(args.interval)
+                await job()
         
         else:
             parser.print_help()
     
     finally:
         app.close()
+        # Browser e sessão HTTP ficam quentes entre ciclos do daemon; fecham só aqui
+        await close_browser_pool()
+        await close_http_session()
+        await close_fixture_server()
+        shutdown_parse_pool()
+        if profiler:
+            profiler.stop()
+
+
+def cli():
+    """Ponto de entrada: comandos só de leitura não arrancam o event loop"""
+    args = build_parser().parse_args()
+    
+    if args.fixtures:
+        # Variável de ambiente: chega também aos processos worker e ao pool de parse
+        os.environ['LRE_FIXTURES'] = args.fixtures
+    
+    if args.stats and not args.profile:
+        show_stats()
+        return
+    
+    if args.worker:
+        run_workers(args)
+        return
+    
+    import asyncio
+    asyncio.run(main(args))
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    cli()
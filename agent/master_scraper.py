@@ -3,12 +3,14 @@ Scraper Master - Lisboa Real Estate AI
 Testa 9 sites de leilões com Apify e técnicas avançadas
 """
 
+import time
 import asyncio
 import json
 import logging
 from datetime import datetime
 from typing import List, Dict, Optional
 from dataclasses import dataclass, asdict
+from urllib.parse import urlparse
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -57,29 +59,21 @@ class MasterScraper:
         self.sites_ok: List[Dict] = []
         self.sites_falhados: List[Dict] = []
         self.imoveis_por_site: Dict[str, List[LeilaoImovel]] = {}
+        # Técnica que extraiu os imóveis de cada site (api ou browser)
+        self.tecnica_por_site: Dict[str, str] = {}
         
     async def testar_site_simples(self, site: Dict) -> bool:
-        """Testa se site responde (método mais seguro)"""
-        import aiohttp
+        """Testa se site responde (health check com circuit breaker)"""
+        from health_check import SiteHealthChecker
         
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    site["url"], 
-                    timeout=15,
-                    headers={
-                        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                    }
-                ) as response:
-                    if response.status == 200:
-                        logger.info(f"✅ {site['nome']}: OK (Status {response.status})")
-                        return True
-                    else:
-                        logger.warning(f"⚠️ {site['nome']}: Status {response.status}")
-                        return False
-        except Exception as e:
-            logger.error(f"❌ {site['nome']}: {str(e)[:60]}")
-            return False
+        async with SiteHealthChecker(timeout_s=15) as checker:
+            resultado = await checker.check_site(site["nome"], site["url"])
+        
+        if resultado.ok:
+            logger.info(f"✅ {site['nome']}: OK (Status {resultado.status})")
+        else:
+            logger.warning(f"⚠️ {site['nome']}: {resultado.error}")
+        return resultado.ok
     
     async def scrape_com_apify(self, site: Dict) -> List[LeilaoImovel]:
         """Usa Apify para fazer scraping (método avançado)"""
@@ -117,25 +111,25 @@ class MasterScraper:
             logger.error(f"Erro Apify em {site['nome']}: {e}")
             return await self.scrape_com_playwright(site)
         
+        self.tecnica_por_site[site["nome"]] = 'api'
         return imoveis
     
     async def scrape_com_playwright(self, site: Dict) -> List[LeilaoImovel]:
         """Usa Playwright para scraping (método intermédio)"""
         imoveis = []
+        self.tecnica_por_site[site["nome"]] = 'browser'
         
         try:
-            from playwright.async_api import async_playwright
+            from browser_pool import get_browser_pool
+            from readiness import goto_ready
             
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=True)
-                context = await browser.new_context(
-                    user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                )
-                page = await context.new_page()
+            # Browser partilhado entre sites (browser_pool)
+            async with get_browser_pool().page(
+                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+            ) as page:
                 
                 # Navegar para o site
-                await page.goto(site["url"], timeout=30000)
-                await page.wait_for_load_state("networkidle")
+                await goto_ready(page, site["url"], timeout_ms=30000)
                 
                 # Extrair dados (lógica específica por site)
                 if "leilosoc" in site["nome"]:
@@ -146,8 +140,6 @@ class MasterScraper:
                     # Método genérico
                     imoveis = await self._scrape_generico(page, site)
                 
-                await browser.close()
-                
         except Exception as e:
             logger.error(f"Erro Playwright em {site['nome']}: {e}")
         
@@ -277,23 +269,40 @@ class MasterScraper:
         logger.info("🚀 INICIANDO TESTES NOS 9 SITES DE LEILÕES")
         logger.info("=" * 80)
         
-        for i, site in enumerate(SITES_TESTE, 1):
-            logger.info(f"\n📌 [{i}/9] Testando {site['nome']}...")
-            
-            # Teste 1: Verificar se site responde
-            responde = await self.testar_site_simples(site)
+        # Teste 1: todos os sites em paralelo; circuitos abertos são saltados
+        from health_check import SiteHealthChecker
+        from site_registry import SiteRegistry
+        
+        # Sites com mais imóveis nas execuções anteriores primeiro
+        registo = SiteRegistry()
+        sites = registo.order(SITES_TESTE, lambda site: urlparse(site['url']).netloc)
+        
+        async with SiteHealthChecker() as checker:
+            saude = await checker.check_all((site['nome'], site['url']) for site in sites)
+        
+        for i, (site, resultado) in enumerate(zip(sites, saude), 1):
+            logger.info(f"\n📌 [{i}/{len(sites)}] {site['nome']}...")
+            host = urlparse(site['url']).netloc
             
-            if not responde:
+            if not resultado.ok:
+                motivo = ("Circuito aberto (falhas recentes)" if resultado.skipped
+                          else f"Não responde ou bloqueado ({resultado.error})")
                 self.sites_falhados.append({
                     **site,
-                    "motivo": "Não responde ou bloqueado",
+                    "motivo": motivo,
                     "imoveis": 0
                 })
+                if not resultado.skipped:
+                    registo.record(host, False, error=motivo)
                 continue
             
             # Teste 2: Tentar extrair dados
             try:
+                inicio = time.perf_counter()
                 imoveis = await self.scrape_com_apify(site)
+                registo.record(host, bool(imoveis), time.perf_counter() - inicio,
+                               technique=self.tecnica_por_site.get(site["nome"]),
+                               error=None if imoveis else "Sem imóveis", listings=len(imoveis))
                 
                 if imoveis:
                     self.sites_ok.append({
@@ -318,10 +327,10 @@ class MasterScraper:
                     "motivo": f"Erro: {str(e)[:80]}",
                     "imoveis": 0
                 })
+                registo.record(host, False, error=str(e)[:120])
                 logger.error(f"❌ {site['nome']}: Erro - {e}")
-            
-            # Delay entre sites para não sobrecarregar
-            await asyncio.sleep(2)
+        
+        registo.close()
         
         # Resumo final
         logger.info("\n" + "=" * 80)
@@ -358,8 +367,15 @@ class MasterScraper:
 
 async def main():
     """Função principal"""
+    from browser_pool import close_browser_pool
+    from http_client import close_http_session
+    
     scraper = MasterScraper()
-    resultados = await scraper.executar_testes()
+    try:
+        resultados = await scraper.executar_testes()
+    finally:
+        await close_browser_pool()
+        await close_http_session()
     scraper.guardar_resultados()
     
     # Mostrar resumo
@@ -0,0 +1,273 @@
+"""
+Métricas - Lisboa Real Estate AI
+Registo de contadores, gauges e histogramas por etapa do pipeline
+Exporta em formato de texto Prometheus (textfile collector) e resumo JSON
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Limites dos histogramas de latência (segundos)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Métricas conhecidas: nome -> (tipo, descrição)
+METRICS = {
+    'page_fetch_seconds': ('histogram', 'Tempo de carregamento de uma página'),
+    'page_ready_seconds': ('histogram', 'Tempo até o conteúdo da página estar pronto (readiness)'),
+    'page_parse_seconds': ('histogram', 'Tempo de extração dos imóveis de uma página'),
+    'parse_wait_seconds': ('histogram', 'Espera do event loop por um parse (pool de processos ou em linha)'),
+    'score_seconds': ('histogram', 'Tempo de cálculo do score de um imóvel'),
+    'db_save_seconds': ('histogram', 'Tempo de escrita de um imóvel na base de dados'),
+    'github_sync_seconds': ('histogram', 'Tempo de um commit para o GitHub'),
+    'stage_seconds': ('histogram', 'Duração de cada etapa de scrape_and_analyze'),
+    'pages_total': ('counter', 'Páginas carregadas'),
+    'listings_total': ('counter', 'Imóveis extraídos'),
+    'bytes_total': ('counter', 'Bytes descarregados'),
+    'fetch_escalations_total': ('counter', 'Pedidos que passaram de HTTP simples para o browser'),
+    'http_cache_requests_total': ('counter', 'Respostas HTTP por resultado da cache (new, changed, unchanged, revalidated)'),
+    'http_cache_bytes_avoided_total': ('counter', 'Bytes não descarregados graças a respostas 304'),
+    'http_cache_parse_skipped_total': ('counter', 'Páginas idênticas à anterior cujo parse foi saltado'),
+    'http_cache_hit_ratio': ('gauge', 'Rácio de hits da cache HTTP no último ciclo'),
+    'requests_blocked_total': ('counter', 'Pedidos do browser bloqueados pela política de recursos'),
+    'bytes_saved_total': ('counter', 'Bytes poupados por pedidos bloqueados (estimativa)'),
+    'errors_total': ('counter', 'Erros por componente'),
+    'db_writes_total': ('counter', 'Escritas na base de dados (insert/update; touch = só last_seen, listagem sem alterações)'),
+    'parse_jobs_total': ('counter', 'Parses por adapter e modo (pool ou inline)'),
+    'queue_depth': ('gauge', 'Trabalho pendente por fila'),
+    'jobs_total': ('counter', 'Jobs da fila processados por estado'),
+    'health_checks_total': ('counter', 'Health checks de sites por resultado (ok, fail, skipped)'),
+    'circuit_breakers_open': ('gauge', 'Sites com o circuit breaker aberto no último health check'),
+    'enrichment_total': ('counter', 'Páginas de detalhe processadas por estado (done, failed)'),
+    'host_concurrency_limit': ('gauge', 'Pedidos em simultâneo permitidos por host (controlador AIMD)'),
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Dict] = None) -> str:
+    pairs = list(key) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    body = ','.join(f'{k}="{str(v)}"' for k, v in pairs)
+    return '{' + body + '}'
+
+
+class _Histogram:
+    """Histograma cumulativo com limites fixos"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+
+class MetricsRegistry:
+    """Registo de métricas partilhado por todos os componentes"""
+
+    def __init__(self, prefix: str = "lisboa_re"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, _Histogram]] = {}
+        self._run_started = time.time()
+        self._baseline: Dict = {}
+
+    # ------------------------------------------------------------------
+    # Registo
+    # ------------------------------------------------------------------
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Incrementa um contador"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        """Define o valor de um gauge"""
+        with self._lock:
+            self._gauges.setdefault(name, {})[_label_key(labels)] = value
+
+    def observe(self, name: str, value: float, **labels):
+        """Regista uma observação num histograma"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = _Histogram()
+            series[key].observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Mede a duração do bloco e regista-a no histograma `name`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    # ------------------------------------------------------------------
+    # Ciclos (daemon)
+    # ------------------------------------------------------------------
+
+    def start_run(self):
+        """Marca o início de um ciclo; o resumo JSON conta a partir daqui"""
+        with self._lock:
+            self._run_started = time.time()
+            self._baseline = {
+                'counters': {n: dict(s) for n, s in self._counters.items()},
+                'histograms': {
+                    n: {k: (h.count, h.sum) for k, h in s.items()}
+                    for n, s in self._histograms.items()
+                },
+            }
+            for series in self._histograms.values():
+                for hist in series.values():
+                    hist.max = 0.0
+
+    def run_summary(self) -> Dict:
+        """Resumo do ciclo atual (diferença face a start_run)"""
+        base_counters = self._baseline.get('counters', {})
+        base_hists = self._baseline.get('histograms', {})
+
+        with self._lock:
+            counters = {}
+            for name, series in self._counters.items():
+                for key, value in series.items():
+                    delta = value - base_counters.get(name, {}).get(key, 0)
+                    counters[f"{name}{_format_labels(key)}"] = delta
+
+            gauges = {
+                f"{name}{_format_labels(key)}": value
+                for name, series in self._gauges.items()
+                for key, value in series.items()
+            }
+
+            histograms = {}
+            for name, series in self._histograms.items():
+                for key, hist in series.items():
+                    base_count, base_sum = base_hists.get(name, {}).get(key, (0, 0.0))
+                    count = hist.count - base_count
+                    if not count:
+                        continue
+                    total = hist.sum - base_sum
+                    histograms[f"{name}{_format_labels(key)}"] = {
+                        'count': count,
+                        'sum': round(total, 6),
+                        'avg': round(total / count, 6),
+                        'max': round(hist.max, 6),
+                    }
+
+        finished = time.time()
+        return {
+            'started_at': datetime.fromtimestamp(self._run_started).isoformat(),
+            'finished_at': datetime.fromtimestamp(finished).isoformat(),
+            'duration_s': round(finished - self._run_started, 3),
+            'counters': counters,
+            'gauges': gauges,
+            'histograms': histograms,
+        }
+
+    # ------------------------------------------------------------------
+    # Exportação
+    # ------------------------------------------------------------------
+
+    def to_prometheus(self) -> str:
+        """Formato de texto Prometheus (valores cumulativos)"""
+        lines = []
+
+        def header(name: str, kind: str):
+            full = f"{self.prefix}_{name}"
+            help_text = METRICS.get(name, (kind, name))[1]
+            lines.append(f"# HELP {full} {help_text}")
+            lines.append(f"# TYPE {full} {kind}")
+            return full
+
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                full = header(name, 'counter')
+                for key, value in series.items():
+                    lines.append(f"{full}{_format_labels(key)} {value:g}")
+
+            for name, series in sorted(self._gauges.items()):
+                full = header(name, 'gauge')
+                for key, value in series.items():
+                    lines.append(f"{full}{_format_labels(key)} {value:g}")
+
+            for name, series in sorted(self._histograms.items()):
+                full = header(name, 'histogram')
+                for key, hist in series.items():
+                    cumulative = 0
+                    for bound, count in zip(hist.buckets, hist.counts):
+                        cumulative += count
+                        lines.append(f"{full}_bucket{_format_labels(key, {'le': f'{bound:g}'})} {cumulative}")
+                    lines.append(f"{full}_bucket{_format_labels(key, {'le': '+Inf'})} {hist.count}")
+                    lines.append(f"{full}_sum{_format_labels(key)} {hist.sum:.6f}")
+                    lines.append(f"{full}_count{_format_labels(key)} {hist.count}")
+
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, filepath: str) -> str:
+        """Escreve o ficheiro .prom de forma atómica (para o node_exporter)"""
+        path = Path(filepath)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + '.tmp')
+        tmp.write_text(self.to_prometheus(), encoding='utf-8')
+        os.replace(tmp, path)
+        return str(path)
+
+    def write_summary(self, filepath: str) -> str:
+        """Escreve o resumo JSON do ciclo atual"""
+        path = Path(filepath)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.run_summary(), f, ensure_ascii=False, indent=2)
+        return str(path)
+
+    def export(self, metrics_dir: str = "../data/metrics") -> Dict[str, str]:
+        """Exporta textfile Prometheus e resumo JSON do ciclo"""
+        directory = Path(metrics_dir)
+        files = {
+            'prometheus': self.write_textfile(directory / "agent.prom"),
+            'summary': self.write_summary(directory / "run_summary.json"),
+        }
+        logger.info(f"Métricas exportadas para {directory}")
+        return files
+
+    def reset(self):
+        """Limpa todas as métricas"""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+            self._baseline = {}
+            self._run_started = time.time()
+
+
+# Instância global
+metrics = MetricsRegistry()
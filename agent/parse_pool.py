@@ -0,0 +1,122 @@
+"""
+Parse pool - Lisboa Real Estate AI
+Parse de HTML num pool de processos, fora do event loop
+
+Um parse grande (árvore HTML, regex sobre a página inteira) bloqueia o
+event loop e atrasa todos os pedidos em curso. Os jobs de parse (HTML +
+nome do adapter do site) são enviados para um ProcessPoolExecutor com
+run_in_executor e voltam como registos compactos (listas de dicts).
+
+Páginas pequenas são processadas no próprio processo: copiar o HTML para
+outro processo custaria mais do que o parse.
+"""
+
+import os
+import time
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_job(adapter: str, html: str, context: Dict) -> Tuple[List[Dict], float]:
+    """Corre no processo do pool: extração + tempo de CPU gasto"""
+    from site_adapters import run_adapter
+
+    start = time.perf_counter()
+    items = run_adapter(adapter, html, **context)
+    return items, time.perf_counter() - start
+
+
+class ParsePool:
+    """
+    Pool de processos para parse de HTML
+
+    Args:
+        max_workers: Processos do pool (por omissão os cores menos um, para o event loop)
+        min_offload_bytes: Páginas mais pequenas são processadas em linha
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, min_offload_bytes: int = 32_000):
+        self.max_workers = max_workers or max((os.cpu_count() or 2) - 1, 1)
+        self.min_offload_bytes = min_offload_bytes
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: os workers não herdam o event loop, sockets nem o browser
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            logger.info(f"Pool de parse iniciado ({self.max_workers} processos)")
+        return self._executor
+
+    async def parse(self, adapter: str, html: str, **context) -> List[Dict]:
+        """
+        Extrai os imóveis do HTML com o adapter do site
+
+        Args:
+            adapter: Nome do adapter (site_adapters.ADAPTERS)
+            html: Página
+            context: Argumentos extra do adapter (fonte, base_url, ...)
+
+        Returns:
+            Lista de dicts
+        """
+        start = time.perf_counter()
+
+        if len(html) < self.min_offload_bytes or self.max_workers < 1:
+            items, cpu_s = _parse_job(adapter, html, context)
+            mode = 'inline'
+        else:
+            loop = asyncio.get_running_loop()
+            try:
+                items, cpu_s = await loop.run_in_executor(
+                    self._get_executor(), _parse_job, adapter, html, context
+                )
+                mode = 'pool'
+            except BrokenProcessPool:
+                # Processo do pool morreu: recomeçar o pool e fazer este parse aqui
+                logger.warning("Pool de parse interrompido, a reiniciar")
+                self.shutdown(wait=False)
+                items, cpu_s = _parse_job(adapter, html, context)
+                mode = 'inline'
+
+        metrics.observe('page_parse_seconds', cpu_s, portal=adapter)
+        metrics.observe('parse_wait_seconds', time.perf_counter() - start, mode=mode)
+        metrics.inc('parse_jobs_total', adapter=adapter, mode=mode)
+        return items
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=not wait)
+            self._executor = None
+
+
+# Pool global do processo
+_pool: Optional[ParsePool] = None
+
+
+def get_parse_pool(**options) -> ParsePool:
+    """Pool partilhado; as opções só contam na criação"""
+    global _pool
+
+    if _pool is None:
+        _pool = ParsePool(**options)
+    return _pool
+
+
+def shutdown_parse_pool():
+    """Termina os processos do pool, se chegou a ser criado"""
+    global _pool
+
+    if _pool is not None:
+        _pool.shutdown()
+    _pool = None
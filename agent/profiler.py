@@ -0,0 +1,233 @@
+"""
+Profiler - Lisboa Real Estate AI
+Perfis repetíveis de uma execução completa ou de ciclos do daemon
+
+Modos:
+- cpu:  cProfile (ficheiro .pstats + resumo em texto)
+- wall: amostragem periódica da stack (formato collapsed para flamegraphs)
+- mem:  snapshots tracemalloc nas fronteiras de etapa (top de alocações)
+"""
+
+import io
+import sys
+import time
+import logging
+import threading
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ('cpu', 'wall', 'mem')
+
+# Profiler ativo (usado por mark_stage)
+_active: Optional['RunProfiler'] = None
+
+
+def mark_stage(stage: str):
+    """Marca uma fronteira de etapa no profiler ativo (no-op se não houver)"""
+    if _active is not None:
+        _active.mark(stage)
+
+
+class _StackSampler(threading.Thread):
+    """Amostra a stack de uma thread a intervalos fixos (tempo real)"""
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        super().__init__(name="profiler-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{Path(code.co_filename).name}:{code.co_name}")
+                frame = frame.f_back
+            self.samples[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class RunProfiler:
+    """
+    Perfil de uma execução
+
+    Usar como context manager:
+        with RunProfiler('cpu', label='search'):
+            ...
+    """
+
+    def __init__(self,
+                 mode: str = 'cpu',
+                 output_dir: str = "../data/profiles",
+                 label: str = "run",
+                 interval: float = 0.005,
+                 top: int = 40):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Modo de profiling inválido: {mode} (usar {', '.join(PROFILE_MODES)})")
+
+        self.mode = mode
+        self.output_dir = Path(output_dir)
+        self.label = label
+        self.interval = interval
+        self.top = top
+
+        self._profile = None
+        self._sampler: Optional[_StackSampler] = None
+        self._snapshots: List[Tuple[str, 'tracemalloc.Snapshot']] = []
+        self._stages: List[Tuple[str, float]] = []
+        self._started = 0.0
+
+    # ------------------------------------------------------------------
+
+    def start(self):
+        global _active
+
+        self._started = time.perf_counter()
+        self._stages = [('start', self._started)]
+
+        if self.mode == 'cpu':
+            import cProfile
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        elif self.mode == 'wall':
+            self._sampler = _StackSampler(threading.get_ident(), self.interval)
+            self._sampler.start()
+        elif self.mode == 'mem':
+            import tracemalloc
+            tracemalloc.start(25)
+            self._snapshots = [('start', tracemalloc.take_snapshot())]
+
+        _active = self
+        logger.info(f"Profiling ({self.mode}) iniciado: {self.label}")
+        return self
+
+    def mark(self, stage: str):
+        """Fronteira de etapa: regista o tempo e, em modo mem, um snapshot"""
+        self._stages.append((stage, time.perf_counter()))
+        if self.mode == 'mem':
+            import tracemalloc
+            if tracemalloc.is_tracing():
+                self._snapshots.append((stage, tracemalloc.take_snapshot()))
+
+    def stop(self) -> Dict[str, str]:
+        """Termina o profiling e escreve os relatórios"""
+        global _active
+
+        if _active is self:
+            _active = None
+        self.mark('end')
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        base = self.output_dir / f"{datetime.now():%Y%m%d_%H%M%S}_{self.label}_{self.mode}"
+
+        if self.mode == 'cpu':
+            self._profile.disable()
+            files = self._write_cpu(base)
+        elif self.mode == 'wall':
+            self._sampler.stop()
+            files = self._write_wall(base)
+        else:
+            import tracemalloc
+            files = self._write_mem(base)
+            tracemalloc.stop()
+
+        files['stages'] = self._write_stages(base)
+        logger.info(f"Profiling ({self.mode}) concluído: {', '.join(files.values())}")
+        return files
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    # ------------------------------------------------------------------
+    # Relatórios
+    # ------------------------------------------------------------------
+
+    def _write_stages(self, base: Path) -> str:
+        """Duração de cada etapa marcada"""
+        path = base.with_suffix('.stages.txt')
+        lines = [f"# {self.label} ({self.mode})"]
+        for (_, previous), (stage, current) in zip(self._stages, self._stages[1:]):
+            lines.append(f"{stage:<20} {current - previous:>10.3f}s")
+        lines.append(f"{'total':<20} {self._stages[-1][1] - self._started:>10.3f}s")
+        path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+        return str(path)
+
+    def _write_cpu(self, base: Path) -> Dict[str, str]:
+        import pstats
+
+        pstats_path = base.with_suffix('.pstats')
+        self._profile.dump_stats(str(pstats_path))
+
+        buffer = io.StringIO()
+        stats = pstats.Stats(self._profile, stream=buffer)
+        stats.sort_stats('cumulative').print_stats(self.top)
+        stats.sort_stats('tottime').print_stats(self.top)
+        text_path = base.with_suffix('.txt')
+        text_path.write_text(buffer.getvalue(), encoding='utf-8')
+
+        return {'pstats': str(pstats_path), 'report': str(text_path)}
+
+    def _write_wall(self, base: Path) -> Dict[str, str]:
+        samples = self._sampler.samples
+
+        # Formato collapsed (flamegraph.pl / speedscope)
+        folded_path = base.with_suffix('.folded')
+        with open(folded_path, 'w', encoding='utf-8') as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+        # Top por tempo próprio (frame no topo da stack)
+        total = sum(samples.values()) or 1
+        self_time: Counter = Counter()
+        for stack, count in samples.items():
+            self_time[stack.rsplit(';', 1)[-1]] += count
+
+        lines = [f"# {total} amostras a cada {self.interval * 1000:.1f}ms", ""]
+        for frame, count in self_time.most_common(self.top):
+            lines.append(f"{count / total:>7.1%}  {count:>7}  {frame}")
+        text_path = base.with_suffix('.txt')
+        text_path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+        return {'collapsed': str(folded_path), 'report': str(text_path)}
+
+    def _write_mem(self, base: Path) -> Dict[str, str]:
+        lines = []
+
+        # Crescimento entre etapas
+        for (_, previous), (stage, current) in zip(self._snapshots, self._snapshots[1:]):
+            diff = current.compare_to(previous, 'lineno')
+            growth = sum(stat.size_diff for stat in diff)
+            lines.append(f"## {stage}: {growth / 1024:+.1f} KiB")
+            for stat in diff[:10]:
+                lines.append(f"   {stat}")
+            lines.append("")
+
+        # Top de alocações vivas no fim
+        final = self._snapshots[-1][1]
+        lines.append(f"## Top {self.top} alocações (fim)")
+        for stat in final.statistics('lineno')[:self.top]:
+            lines.append(f"   {stat}")
+
+        import tracemalloc
+        current, peak = tracemalloc.get_traced_memory()
+        lines.append("")
+        lines.append(f"Atual: {current / 1024 / 1024:.1f} MiB | Pico: {peak / 1024 / 1024:.1f} MiB")
+
+        text_path = base.with_suffix('.txt')
+        text_path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+        return {'allocations': str(text_path)}
@@ -0,0 +1,310 @@
+"""
+Rate limiting - Lisboa Real Estate AI
+Token bucket por host, partilhado por todos os scrapers do processo
+
+Substitui as pausas fixas entre pedidos: pesquisas concorrentes em portais
+diferentes não esperam umas pelas outras, e pedidos ao mesmo host continuam
+espaçados (mesmo vindos de scrapers ou células de fan-out diferentes).
+
+Cada host tem também um controlador AIMD (slot + feedback): enquanto as
+respostas chegam sem erros e sem picos de latência, a concorrência e o
+ritmo do host sobem de forma aditiva; um 429/503, um pedido sem resposta
+ou um pico de latência cortam-nos para metade, e um Retry-After suspende
+o host até ao fim do prazo. O intervalo configurado (delay_ms dos
+scrapers) é só o ponto de partida.
+"""
+
+import asyncio
+import random
+import time
+import logging
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from fixtures import replaying
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Respostas que pedem para abrandar
+THROTTLE_STATUSES = (429, 503)
+
+# Peso de cada latência na média móvel da latência base (os picos pesam menos:
+# só uma lentidão persistente muda a base)
+BASELINE_WEIGHT = 0.2
+SPIKE_BASELINE_WEIGHT = 0.05
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Segundos pedidos num header Retry-After
+
+    Aceita segundos ("120") ou uma data HTTP ("Wed, 21 Oct 2026 07:28:00 GMT").
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return max((moment - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class TokenBucket:
+    """
+    Token bucket assíncrono
+
+    Args:
+        rate: Tokens repostos por segundo (pedidos/s em regime contínuo)
+        capacity: Máximo de tokens acumulados (rajada permitida)
+        jitter: Atraso aleatório extra, em fração do intervalo (0.5 = até +50%)
+    """
+
+    def __init__(self, rate: float, capacity: float = 1, jitter: float = 0.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.jitter = jitter
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, tokens: float = 1) -> float:
+        """
+        Espera até haver tokens disponíveis
+
+        Returns:
+            Tempo esperado (segundos)
+        """
+        waited = 0.0
+        # Lock: quem chega primeiro é servido primeiro
+        async with self._lock:
+            self._refill()
+            while self.tokens < tokens:
+                delay = (tokens - self.tokens) / self.rate
+                if self.jitter:
+                    delay += random.uniform(0, self.jitter / self.rate)
+                await asyncio.sleep(delay)
+                waited += delay
+                self._refill()
+            self.tokens -= tokens
+        return waited
+
+
+class AimdLimit:
+    """
+    Concorrência adaptativa de um host (additive increase, multiplicative decrease)
+
+    Args:
+        initial: Pedidos em simultâneo no arranque
+        min_limit: Mínimo após cortes
+        max_limit: Máximo (teto de cortesia, mesmo com o site rápido)
+        increase: Aumento por "janela" de respostas saudáveis (+increase/limit por resposta)
+        decrease: Fator de corte
+        latency_factor: Latência acima de latency_factor × a latência base é um pico
+        min_samples: Respostas saudáveis antes de detetar picos
+    """
+
+    def __init__(self, initial: float = 1, min_limit: float = 1, max_limit: float = 6,
+                 increase: float = 1, decrease: float = 0.5, latency_factor: float = 2.5,
+                 min_samples: int = 5):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.min_samples = min_samples
+        self.inflight = 0
+        self.baseline: Optional[float] = None  # média móvel da latência
+        self.samples = 0
+        self.blocked_until = 0.0
+        self._last_cut = 0.0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self):
+        """Espera por uma vaga (e pelo fim de um Retry-After)"""
+        async with self._cond:
+            while True:
+                pause = self.blocked_until - time.monotonic()
+                if pause > 0:
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), pause)
+                    except asyncio.TimeoutError:
+                        pass
+                elif self.inflight < int(self.limit):
+                    self.inflight += 1
+                    return
+                else:
+                    await self._cond.wait()
+
+    async def release(self):
+        async with self._cond:
+            self.inflight -= 1
+            self._cond.notify_all()
+
+    def on_response(self, latency_s: Optional[float] = None, throttled: bool = False,
+                    retry_after: Optional[float] = None) -> bool:
+        """
+        Ajusta o limite com o resultado de um pedido
+
+        Args:
+            latency_s: Duração do pedido (None se não for comparável)
+            throttled: 429/503 ou pedido sem resposta
+            retry_after: Segundos pedidos pelo servidor
+
+        Returns:
+            True se o limite foi cortado
+        """
+        now = time.monotonic()
+        if retry_after:
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+
+        spike = (latency_s is not None and self.baseline is not None
+                 and self.samples >= self.min_samples
+                 and latency_s > self.latency_factor * self.baseline)
+        if latency_s is not None and not throttled:
+            # Os picos também entram na base, devagar: um site que fica mais lento
+            # de vez passa a ter essa latência como normal (e volta a crescer)
+            alpha = SPIKE_BASELINE_WEIGHT if spike else BASELINE_WEIGHT
+            self.baseline = latency_s if self.baseline is None else \
+                (1 - alpha) * self.baseline + alpha * latency_s
+            self.samples += 1
+
+        if throttled or spike or retry_after:
+            # Um corte por janela: as respostas que já vinham a caminho são da mesma congestão
+            if now - self._last_cut < max(self.baseline or 0, 1.0):
+                return False
+            self.limit = max(self.min_limit, self.limit * self.decrease)
+            self._last_cut = now
+            return True
+
+        self.limit = min(self.max_limit, self.limit + self.increase / self.limit)
+        return False
+
+
+class HostRateLimiter:
+    """
+    Um token bucket por host
+
+    Args:
+        min_interval: Intervalo mínimo por omissão entre pedidos ao mesmo host
+        burst: Pedidos seguidos permitidos antes de começar a espaçar
+        jitter: Ver TokenBucket
+        max_concurrency: Teto do controlador AIMD de cada host
+    """
+
+    def __init__(self, min_interval: float = 1.0, burst: float = 1, jitter: float = 0.0,
+                 max_concurrency: float = 6):
+        self.min_interval = min_interval
+        self.burst = burst
+        self.jitter = jitter
+        self.max_concurrency = max_concurrency
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._base_rates: Dict[str, float] = {}
+        self._limits: Dict[str, AimdLimit] = {}
+        self._loop = None
+
+    def bucket(self, host: str, min_interval: Optional[float] = None,
+               jitter: Optional[float] = None) -> TokenBucket:
+        """Bucket do host (criado na primeira utilização)"""
+        # Os locks pertencem ao event loop: um novo asyncio.run recomeça
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._buckets = {}
+            self._limits = {}
+
+        if host not in self._buckets:
+            interval = min_interval if min_interval is not None else self.min_interval
+            self._base_rates[host] = 1 / max(interval, 1e-6)
+            self._buckets[host] = TokenBucket(
+                rate=self._base_rates[host] * self.limit(host).limit,
+                capacity=self.burst,
+                jitter=self.jitter if jitter is None else jitter
+            )
+        return self._buckets[host]
+
+    def limit(self, host: str) -> AimdLimit:
+        """Controlador AIMD do host (criado na primeira utilização)"""
+        if host not in self._limits:
+            self._limits[host] = AimdLimit(max_limit=self.max_concurrency)
+        return self._limits[host]
+
+    @asynccontextmanager
+    async def slot(self, url_or_host: str, min_interval: Optional[float] = None,
+                   jitter: Optional[float] = None):
+        """
+        Reserva uma vaga do host e espera pela sua vez
+
+        Uma exceção dentro do bloco conta como pedido sem resposta. O
+        resultado dos pedidos com resposta é passado a feedback().
+
+        Args:
+            url_or_host: URL completo ou host
+            min_interval: Intervalo inicial do host, usado só na criação do bucket
+            jitter: Ver TokenBucket
+        """
+        if replaying():
+            # Fixtures locais (LRE_FIXTURES=replay): sem espaçamento nem controlo de carga
+            yield
+            return
+
+        host = urlparse(url_or_host).netloc or url_or_host
+        bucket = self.bucket(host, min_interval, jitter)
+        limit = self.limit(host)
+        await limit.acquire()
+        try:
+            waited = await bucket.acquire()
+            if waited:
+                logger.debug(f"Rate limit {host}: {waited:.2f}s")
+            yield
+        except Exception:
+            self.feedback(host, None)
+            raise
+        finally:
+            await limit.release()
+
+    def feedback(self, url_or_host: str, status: Optional[int], latency_s: Optional[float] = None,
+                 retry_after: Optional[float] = None):
+        """
+        Resultado de um pedido ao host (ajusta concorrência e ritmo)
+
+        Args:
+            url_or_host: URL completo ou host
+            status: Status HTTP (None = sem resposta)
+            latency_s: Duração do pedido (None se não for comparável com os outros)
+            retry_after: Segundos do header Retry-After (parse_retry_after)
+        """
+        host = urlparse(url_or_host).netloc or url_or_host
+        limit = self.limit(host)
+        throttled = status is None or status in THROTTLE_STATUSES
+        if not throttled and status >= 400 and not retry_after:
+            # 403/404...: problema do pedido, não sinal de carga
+            return
+        cut = limit.on_response(latency_s, throttled, retry_after)
+        if cut:
+            logger.info(f"{host}: a abrandar para {limit.limit:.1f} pedidos em simultâneo "
+                        f"(status {status}" + (f", Retry-After {retry_after:.0f}s)" if retry_after else ")"))
+
+        bucket = self._buckets.get(host)
+        if bucket is not None:
+            bucket._refill()
+            bucket.rate = self._base_rates[host] * limit.limit
+        metrics.set_gauge('host_concurrency_limit', round(limit.limit, 2), host=host)
+
+
+# Instância global (partilhada por todos os scrapers do processo)
+host_limiter = HostRateLimiter()
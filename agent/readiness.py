@@ -0,0 +1,177 @@
+"""
+Readiness - Lisboa Real Estate AI
+Esperar pelo conteúdo em vez de networkidle e pausas fixas
+
+Cada site tem uma especificação de "pronto": um seletor das listagens com
+um número mínimo de itens, e/ou a resposta JSON que traz os dados. A página
+é entregue ao parser assim que o conteúdo existe; se o timeout expirar,
+segue com o que estiver carregado.
+"""
+
+import time
+import fnmatch
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Dict, Optional, TYPE_CHECKING
+from urllib.parse import urlparse
+
+from metrics import metrics
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page, Response
+
+logger = logging.getLogger(__name__)
+
+# Conta os itens; se ainda não chegam, faz scroll para disparar lazy loading
+_ITEMS_PRESENT_JS = """
+([selector, minItems, scroll]) => {
+    const count = document.querySelectorAll(selector).length;
+    if (count < minItems && scroll) {
+        window.scrollBy(0, window.innerHeight);
+    }
+    return count >= minItems;
+}
+"""
+
+
+@dataclass
+class ReadinessSpec:
+    """
+    Quando é que uma página está pronta para parse
+
+    Pronta quando o seletor tem min_items OU chegou a resposta JSON.
+
+    Args:
+        selector: Seletor CSS dos itens da listagem
+        min_items: Mínimo de itens presentes
+        response_pattern: Padrão fnmatch do URL de uma resposta JSON com os dados
+        timeout_ms: Espera máxima depois do DOM carregado
+        scroll: Fazer scroll enquanto faltam itens (lazy loading)
+    """
+    selector: Optional[str] = None
+    min_items: int = 1
+    response_pattern: Optional[str] = None
+    timeout_ms: int = 15000
+    scroll: bool = False
+
+
+# Sites sem especificação própria: cards genéricos de listagem
+DEFAULT_SPEC = ReadinessSpec(
+    selector='article, .card, .property, .property-item, .auction-item, .imovel, .leilao, .item',
+    min_items=3,
+    timeout_ms=10000,
+    scroll=True,
+)
+
+# Especificações por host
+SITE_READINESS: Dict[str, ReadinessSpec] = {
+    'www.idealista.pt': ReadinessSpec(selector='article.item', min_items=1),
+    'www.imovirtual.pt': ReadinessSpec(selector='article[data-cy="listing-item"], article', min_items=1),
+    'casa.sapo.pt': ReadinessSpec(selector='.property', min_items=1),
+    'www.supercasa.pt': ReadinessSpec(selector='.property', min_items=1),
+    'www.leilosoc.com': ReadinessSpec(
+        selector='.property-item, .auction-item, .card, article', min_items=1, scroll=True
+    ),
+    'www.e-leiloes.pt': ReadinessSpec(selector='.card, .leilao, article', min_items=1),
+}
+
+
+def spec_for(url: str) -> ReadinessSpec:
+    """Especificação do site do URL"""
+    return SITE_READINESS.get(urlparse(url).netloc, DEFAULT_SPEC)
+
+
+async def wait_ready(page: 'Page', spec: Optional[ReadinessSpec] = None,
+                     response_waiter: Optional[asyncio.Future] = None) -> bool:
+    """
+    Espera até a página satisfazer a especificação (ou o timeout)
+
+    Returns:
+        True se o conteúdo ficou pronto, False se expirou o timeout
+    """
+    spec = spec or spec_for(page.url)
+
+    waiters = set()
+    if response_waiter is not None:
+        waiters.add(response_waiter)
+    if spec.selector:
+        waiters.add(asyncio.ensure_future(page.wait_for_function(
+            _ITEMS_PRESENT_JS,
+            arg=[spec.selector, spec.min_items, spec.scroll],
+            timeout=spec.timeout_ms,
+            polling=250 if spec.scroll else 'raf',
+        )))
+    if not waiters:
+        return True
+
+    # A primeira condição satisfeita ganha; timeout ou erro: o parser fica
+    # com o que existir
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + spec.timeout_ms / 1000
+    ready = False
+    try:
+        while waiters and not ready:
+            done, waiters = await asyncio.wait(
+                waiters, timeout=max(deadline - loop.time(), 0),
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                break
+            for task in done:
+                if task.exception() is None:
+                    ready = True
+                else:
+                    logger.debug(f"Página não ficou pronta ({page.url}): {task.exception()}")
+    finally:
+        for task in waiters:
+            task.cancel()
+
+    return ready
+
+
+async def goto_ready(page: 'Page', url: str, spec: Optional[ReadinessSpec] = None,
+                     timeout_ms: int = 30000) -> Optional['Response']:
+    """
+    Navega até ao URL e espera pela especificação de readiness do site
+
+    Substitui goto(wait_until='networkidle') seguido de sleeps/scrolls.
+
+    Args:
+        page: Página Playwright
+        url: URL a carregar
+        spec: Especificação (por omissão a do site)
+        timeout_ms: Timeout da navegação (até ao DOM carregado)
+
+    Returns:
+        Resposta da navegação (como page.goto)
+    """
+    spec = spec or spec_for(url)
+    host = urlparse(url).netloc
+    start = time.perf_counter()
+
+    # A resposta JSON pode chegar antes do DOM: registar a espera antes de navegar
+    response_waiter = None
+    if spec.response_pattern:
+        response_waiter = asyncio.ensure_future(page.wait_for_event(
+            'response',
+            predicate=lambda r: fnmatch.fnmatch(r.url, spec.response_pattern) and r.ok,
+            timeout=timeout_ms + spec.timeout_ms,
+        ))
+
+    try:
+        response = await page.goto(url, wait_until='domcontentloaded', timeout=timeout_ms)
+    except Exception:
+        if response_waiter is not None:
+            response_waiter.cancel()
+        raise
+
+    ready = await wait_ready(page, spec, response_waiter)
+    elapsed = time.perf_counter() - start
+
+    metrics.observe('page_ready_seconds', elapsed, host=host, ready=str(ready).lower())
+    if not ready:
+        metrics.inc('errors_total', component='readiness', host=host)
+        logger.info(f"{host}: conteúdo incompleto após {elapsed:.1f}s, a continuar")
+
+    return response
@@ -0,0 +1,181 @@
+"""
+Resource policy - Lisboa Real Estate AI
+Bloqueio de pedidos desnecessários nas páginas Playwright
+
+Para extrair listagens só é preciso o DOM: imagens, vídeo, fontes e
+pedidos de tracking são abortados antes de sair do browser. A política é
+escolhida por site (host da página) e cada página reporta os pedidos
+bloqueados e uma estimativa dos bytes poupados.
+"""
+
+import fnmatch
+import logging
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple, TYPE_CHECKING
+from urllib.parse import urlparse
+
+from metrics import metrics
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page, Route
+
+logger = logging.getLogger(__name__)
+
+# Tipos de recurso do Playwright bloqueados por omissão
+DEFAULT_BLOCKED_TYPES = ('image', 'media', 'font')
+
+# Analytics, publicidade e beacons (padrões fnmatch sobre o host)
+TRACKING_HOSTS = (
+    '*google-analytics.com',
+    '*googletagmanager.com',
+    '*googlesyndication.com',
+    '*googleadservices.com',
+    '*doubleclick.net',
+    '*facebook.net',
+    '*facebook.com',
+    '*hotjar.com',
+    '*criteo.com',
+    '*criteo.net',
+    '*taboola.com',
+    '*outbrain.com',
+    '*scorecardresearch.com',
+    '*clarity.ms',
+    '*tiktok.com',
+    '*adnxs.com',
+)
+
+# Tamanho médio por tipo (bytes): pedidos abortados não têm resposta,
+# por isso os bytes poupados são uma estimativa
+ESTIMATED_BYTES = {
+    'image': 60_000,
+    'media': 500_000,
+    'font': 35_000,
+    'script': 40_000,
+    'stylesheet': 20_000,
+    'xhr': 5_000,
+    'fetch': 5_000,
+    'other': 5_000,
+}
+
+
+@dataclass
+class ResourcePolicy:
+    """
+    Regras de bloqueio de uma página
+
+    Args:
+        block_types: Tipos de recurso a abortar (image, media, font, ...)
+        block_hosts: Padrões fnmatch de hosts a abortar (qualquer tipo)
+        block_urls: Padrões fnmatch sobre o URL completo
+        allow_urls: Exceções (têm prioridade sobre os bloqueios)
+    """
+    block_types: Tuple[str, ...] = DEFAULT_BLOCKED_TYPES
+    block_hosts: Tuple[str, ...] = TRACKING_HOSTS
+    block_urls: Tuple[str, ...] = ()
+    allow_urls: Tuple[str, ...] = ()
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        if any(fnmatch.fnmatch(url, pattern) for pattern in self.allow_urls):
+            return False
+        if resource_type in self.block_types:
+            return True
+        host = urlparse(url).netloc
+        if any(fnmatch.fnmatch(host, pattern) for pattern in self.block_hosts):
+            return True
+        return any(fnmatch.fnmatch(url, pattern) for pattern in self.block_urls)
+
+
+DEFAULT_POLICY = ResourcePolicy()
+
+# Políticas por site (host da página); os restantes usam DEFAULT_POLICY
+SITE_POLICIES: Dict[str, Optional[ResourcePolicy]] = {
+    'www.idealista.pt': ResourcePolicy(
+        block_urls=('*/ads/*', '*didomi*', '*datadome*/tags.js'),
+    ),
+    'www.imovirtual.pt': ResourcePolicy(
+        block_urls=('*/ads/*', '*onetrust*'),
+    ),
+    'casa.sapo.pt': ResourcePolicy(
+        block_urls=('*/publicidade/*', '*sapo.pt/ads*'),
+    ),
+    'www.supercasa.pt': ResourcePolicy(),
+}
+
+
+def policy_for(url_or_host: str) -> Optional[ResourcePolicy]:
+    """Política do site (None = não bloquear nada)"""
+    host = urlparse(url_or_host).netloc or url_or_host
+    return SITE_POLICIES.get(host, DEFAULT_POLICY)
+
+
+@dataclass
+class PageResourceStats:
+    """Pedidos bloqueados numa página"""
+    site: str = ""
+    allowed: int = 0
+    blocked: Counter = field(default_factory=Counter)
+    bytes_saved: int = 0
+
+    def as_dict(self) -> Dict:
+        return {
+            'site': self.site,
+            'allowed': self.allowed,
+            'blocked': dict(self.blocked),
+            'bytes_saved_est': self.bytes_saved,
+        }
+
+
+class PageResourceGuard:
+    """
+    Intercepta os pedidos de uma página e aplica a política do site
+
+    A política é escolhida na primeira navegação da página (host do
+    documento principal), exceto se for dada explicitamente.
+    """
+
+    def __init__(self, page: 'Page', policy: Optional[ResourcePolicy] = None):
+        self.page = page
+        self.fixed_policy = policy
+        self.policy: Optional[ResourcePolicy] = policy
+        self.stats = PageResourceStats()
+
+    async def install(self) -> 'PageResourceGuard':
+        await self.page.route('**/*', self._handle)
+        self.page.once('close', lambda _: self.report())
+        return self
+
+    async def _handle(self, route: 'Route'):
+        request = route.request
+
+        if request.is_navigation_request() and request.frame.parent_frame is None:
+            self.stats.site = urlparse(request.url).netloc
+            if self.fixed_policy is None:
+                self.policy = policy_for(request.url)
+
+        resource_type = request.resource_type
+        if self.policy and self.policy.should_block(resource_type, request.url):
+            saved = ESTIMATED_BYTES.get(resource_type, ESTIMATED_BYTES['other'])
+            self.stats.blocked[resource_type] += 1
+            self.stats.bytes_saved += saved
+            metrics.inc('requests_blocked_total', type=resource_type, site=self.stats.site)
+            metrics.inc('bytes_saved_total', saved, site=self.stats.site)
+            await route.abort('blockedbyclient')
+            return
+
+        self.stats.allowed += 1
+        await route.continue_()
+
+    def report(self) -> Dict:
+        """Resumo da página (registado no log quando a página fecha)"""
+        blocked = sum(self.stats.blocked.values())
+        if blocked:
+            logger.info(f"{self.stats.site or 'página'}: {blocked} pedidos bloqueados "
+                        f"(~{self.stats.bytes_saved / 1024:.0f} KiB poupados), "
+                        f"{self.stats.allowed} permitidos")
+        return self.stats.as_dict()
+
+
+async def apply_policy(page: 'Page', policy: Optional[ResourcePolicy] = None) -> PageResourceGuard:
+    """Instala o bloqueio de recursos numa página antes de navegar"""
+    return await PageResourceGuard(page, policy).install()
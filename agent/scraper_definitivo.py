@@ -5,9 +5,11 @@ Com informação detalhada para cards expandidos
 
 import asyncio
 import json
-import re
 from datetime import datetime
-from playwright.async_api import async_playwright
+from browser_pool import get_browser_pool, close_browser_pool
+from readiness import goto_ready
+from ratelimit import host_limiter, parse_retry_after
+from extractors import extract
 
 SITES_OK = [
     {"nome": "leilosoc.com", "url": "https://www.leilosoc.com/pt/leiloes/?categoria=imoveis", "tipo": "leiloes"},
@@ -18,66 +20,25 @@ SITES_OK = [
     {"nome": "capital-leiloeira.pt", "url": "https://www.capital-leiloeira.pt/", "tipo": "leiloes"},
 ]
 
-def extrair_preco(texto):
-    padroes = [r'(\d+[\.\s]?\d+)\s*€', r'€\s*(\d+[\.\s]?\d+)', r'(\d+)\.?\d{0,3}\s*€']
-    for padrao in padroes:
-        match = re.search(padrao, texto)
-        if match:
-            try:
-                return float(match.group(1).replace('.', '').replace(' ', '').replace(',', '.'))
-            except:
-                continue
-    return None
-
-def extrair_area(texto):
-    padroes = [r'(\d+)\s*m2', r'(\d+)\s*m²', r'(\d+)\s*metros', r'(\d+)\s*m\s*2']
-    for padrao in padroes:
-        match = re.search(padrao, texto.lower())
-        if match:
-            try:
-                return float(match.group(1))
-            except:
-                continue
-    return None
-
-def extrair_tipologia(texto):
-    tipos = ['T0', 'T1', 'T2', 'T3', 'T4', 'T5', 'T6', 'Moradia', 'Loja', 'Armazém', 'Terreno', 'Prédio']
-    for tipo in tipos:
-        if tipo.lower() in texto.lower():
-            return tipo
-    return "Imóvel"
-
-def extrair_localizacao(texto):
-    # Procurar por padrões de localização em Portugal
-    concelhos = ['Lisboa', 'Oeiras', 'Cascais', 'Sintra', 'Amadora', 'Loures', 'Almada', 'Seixal']
-    for concelho in concelhos:
-        if concelho.lower() in texto.lower():
-            return concelho
-    return "Grande Lisboa"
-
 async def scrape_site_detalhado(site):
     """Faz scraping detalhado de um site"""
     imoveis = []
     
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        context = await browser.new_context(
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            viewport={'width': 1920, 'height': 1080}
-        )
-        page = await context.new_page()
-        
+    # Browser partilhado entre sites (browser_pool)
+    async with get_browser_pool().page(
+        user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+        viewport={'width': 1920, 'height': 1080}
+    ) as page:
         try:
             print(f"🔍 A aceder {site['nome']}...")
-            await page.goto(site['url'], timeout=60000, wait_until='domcontentloaded')
-            
-            # Aguardar carregamento
-            await asyncio.sleep(5)
-            
-            # Scroll para carregar lazy content
-            for _ in range(3):
-                await page.evaluate('window.scrollTo(0, document.body.scrollHeight)')
-                await asyncio.sleep(2)
+            # Pronta quando há cards (com scroll para lazy content), sem pausas fixas;
+            # o ritmo de cada site é do controlador adaptativo (ratelimit)
+            async with host_limiter.slot(site['url']):
+                resposta = await goto_ready(page, site['url'], timeout_ms=60000)
+                host_limiter.feedback(
+                    site['url'], resposta.status if resposta else 200,
+                    retry_after=parse_retry_after(resposta.headers.get('retry-after')) if resposta else None
+                )
             
             # Procurar cards de imóveis
             seletores = [
@@ -113,10 +74,11 @@ async def scrape_site_detalhado(site):
                         continue
                     
                     # Extrair dados
-                    preco = extrair_preco(texto)
-                    area = extrair_area(texto)
-                    tipo = extrair_tipologia(texto)
-                    localizacao = extrair_localizacao(texto)
+                    campos = extract(texto)
+                    preco = campos.price
+                    area = campos.area_m2
+                    tipo = campos.typology or "Imóvel"
+                    localizacao = campos.location or "Grande Lisboa"
                     
                     # Extrair título (primeira linha ou texto curto)
                     linhas = [l.strip() for l in texto.split('\n') if l.strip()]
@@ -168,12 +130,8 @@ async def scrape_site_detalhado(site):
                 except Exception as e:
                     continue
             
-            await context.close()
-            
         except Exception as e:
             print(f"  ❌ Erro: {str(e)[:80]}")
-        
-        await browser.close()
     
     return imoveis
 
@@ -189,7 +147,8 @@ async def main():
         imoveis = await scrape_site_detalhado(site)
         print(f"✅ {len(imoveis)} imóveis extraídos")
         todos_imoveis.extend(imoveis)
-        await asyncio.sleep(3)  # Delay entre sites
+    
+    await close_browser_pool()
     
     # Guardar resultados
     resultado = {
@@ -5,7 +5,8 @@ Scraper Rápido - Extrai dados dos 6 sites OK
 import asyncio
 import json
 from datetime import datetime
-from playwright.async_api import async_playwright
+from browser_pool import get_browser_pool, close_browser_pool
+from readiness import goto_ready
 
 SITES_OK = [
     {"nome": "leilosoc.com", "url": "https://www.leilosoc.com/pt/leiloes/?categoria=imoveis"},
@@ -21,17 +22,11 @@ async def scrape_site(site):
     imoveis = []
     
     try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
-            
+        # Browser partilhado entre sites (browser_pool)
+        async with get_browser_pool().page() as page:
             print(f"🔍 A aceder {site['nome']}...")
-            await page.goto(site['url'], timeout=30000)
-            await page.wait_for_load_state("domcontentloaded")
-            
-            # Scroll para carregar lazy content
-            await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-            await asyncio.sleep(2)
+            # Pronta quando há cards (com scroll para lazy content)
+            await goto_ready(page, site['url'], timeout_ms=30000)
             
             # Extrair todos os links e títulos
             elementos = await page.query_selector_all('a, h2, h3, .title, .property-title')
@@ -54,7 +49,6 @@ async def scrape_site(site):
                 except:
                     continue
             
-            await browser.close()
             print(f"✅ {site['nome']}: {len(imoveis)} imóveis extraídos")
             
     except Exception as e:
@@ -74,6 +68,8 @@ async def main():
         todos_imoveis.extend(imoveis)
         await asyncio.sleep(1)  # Delay entre sites
     
+    await close_browser_pool()
+    
     # Guardar resultados
     resultado = {
         "data_scraping": datetime.now().isoformat(),
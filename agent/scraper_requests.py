@@ -4,9 +4,8 @@ Scraper Rápido com Requests - Para sites simples
 
 import requests
 import json
-import re
 from datetime import datetime
-from bs4 import BeautifulSoup
+from site_adapters import run_adapter
 
 SITES_RAPIDOS = [
     {"nome": "leilosoc.com", "url": "https://www.leilosoc.com/pt/leiloes/?categoria=imoveis"},
@@ -16,53 +15,7 @@ SITES_RAPIDOS = [
 
 def extrair_dados_html(html, fonte):
     """Extrai dados de imóveis do HTML"""
-    imoveis = []
-    soup = BeautifulSoup(html, 'html.parser')
-    
-    # Procurar por cards de imóveis
-    seletores = ['.property', '.imovel', '.leilao', '.card', 'article', '.col-md-4', '.item']
-    
-    for seletor in seletores:
-        cards = soup.select(seletor)
-        if cards:
-            for card in cards[:10]:
-                try:
-                    texto = card.get_text(strip=True)
-                    if len(texto) < 20:
-                        continue
-                    
-                    # Extrair preço
-                    preco_match = re.search(r'(\d+[\.\s]?\d+)\s*€', texto)
-                    preco = float(preco_match.group(1).replace('.', '').replace(' ', '')) if preco_match else 0
-                    
-                    # Extrair área
-                    area_match = re.search(r'(\d+)\s*m[2²]', texto.lower())
-                    area = float(area_match.group(1)) if area_match else None
-                    
-                    # Extrair tipologia
-                    tipos = ['T0', 'T1', 'T2', 'T3', 'T4', 'T5', 'Moradia', 'Loja']
-                    tipo = next((t for t in tipos if t in texto), 'Desconhecido')
-                    
-                    # Link
-                    link_elem = card.find('a', href=True)
-                    href = link_elem['href'] if link_elem else ''
-                    
-                    imoveis.append({
-                        "id": f"{fonte}_{len(imoveis)}",
-                        "fonte": fonte,
-                        "titulo": texto[:120],
-                        "tipo": tipo,
-                        "preco": preco,
-                        "area_m2": area,
-                        "preco_m2": round(preco / area, 2) if area and preco else None,
-                        "url": href if href.startswith('http') else f"https://{fonte}{href}",
-                        "data_extracao": datetime.now().isoformat()
-                    })
-                except:
-                    continue
-            break
-    
-    return imoveis
+    return run_adapter('generic_cards', html, fonte=fonte)
 
 def scraper_rapido():
     """Scraper rápido usando requests"""
@@ -4,13 +4,16 @@ Scraper com ScraperAPI - Jarbas Imobiliário
 Usa ScraperAPI como alternativa à Apify
 """
 
+import os
+import asyncio
 import requests
 import json
-import time
-import re
 from datetime import datetime
 from urllib.parse import quote
 
+from parse_pool import get_parse_pool, shutdown_parse_pool
+from ratelimit import THROTTLE_STATUSES, parse_retry_after
+
 # Configuração ScraperAPI
 SCRAPERAPI_KEY = os.getenv('SCRAPERAPI_KEY', 'seu_token_aqui')
 SCRAPERAPI_URL = "http://api.scraperapi.com"
@@ -25,7 +28,7 @@ SITES = [
     {"nome": "Capital Leiloeira", "url": "https://www.capital-leiloeira.pt", "ativo": True},
 ]
 
-def scrape_with_scraperapi(url, nome):
+async def scrape_with_scraperapi(url, nome):
     """Faz scraping usando ScraperAPI"""
     print(f"\n📌 {nome}")
     print(f"   URL: {url}")
@@ -34,14 +37,22 @@ def scrape_with_scraperapi(url, nome):
     api_url = f"{SCRAPERAPI_URL}/?api_key={SCRAPERAPI_KEY}&url={quote(url)}&render=true&country_code=pt"
     
     try:
-        response = requests.get(api_url, timeout=60)
+        # Sem pausas fixas: só espera quando a ScraperAPI pede (429/503, Retry-After)
+        for tentativa in range(3):
+            # requests é bloqueante: o pedido corre numa thread
+            response = await asyncio.to_thread(requests.get, api_url, timeout=60)
+            if response.status_code not in THROTTLE_STATUSES:
+                break
+            pausa = parse_retry_after(response.headers.get('Retry-After')) or 2 ** (tentativa + 1)
+            print(f"   ⏳ HTTP {response.status_code}, nova tentativa em {pausa:.0f}s")
+            await asyncio.sleep(pausa)
         
         if response.status_code == 200:
             html = response.text
             print(f"   ✅ HTML recebido: {len(html)} bytes")
             
             # Extrair imóveis do HTML
-            imoveis = extrair_imoveis_do_html(html, nome, url)
+            imoveis = await extrair_imoveis_do_html(html, nome, url)
             print(f"   🏠 Imóveis encontrados: {len(imoveis)}")
             
             return {
@@ -60,74 +71,11 @@ def scrape_with_scraperapi(url, nome):
         print(f"   ❌ Erro: {str(e)[:80]}")
         return None
 
-def extrair_imoveis_do_html(html, fonte, base_url):
-    """Extrai dados de imóveis do HTML"""
-    imoveis = []
-    
-    # Padrões comuns para imóveis em sites de leilão
-    padroes = [
-        # Padrão 1: Cards com preço e localização
-        r'([\w\s\-]+(?:T[0-5]|Moradia|Apartamento|Loja|Terreno)[\w\s\-]*).*?(\d+[\s\.]?\d+)\s*€.*?([\w\s]+(?:Lisboa|Porto|Cascais|Sintra|Oeiras|Loures|Amadora|Almada|Seixal|Setúbal)[\w\s]*)',
-        # Padrão 2: Preço seguido de área
-        r'(\d+[\s\.]?\d+)\s*€.*?([\d\.]+)\s*m[²2].*?(T[0-5]|Moradia)',
-        # Padrão 3: Títulos de imóveis
-        r'(Leilão.*?T[0-5].*?)(\d+[\s\.]?\d+)\s*€',
-    ]
-    
-    # Procurar por padrões no HTML
-    for padrao in padroes:
-        matches = re.findall(padrao, html, re.IGNORECASE | re.DOTALL)
-        for match in matches[:10]:  # Limitar a 10 por padrão
-            if isinstance(match, tuple):
-                texto = ' '.join(str(m) for m in match if m)
-            else:
-                texto = str(match)
-            
-            # Extrair preço
-            preco_match = re.search(r'(\d+[\s\.]?\d+)\s*€', texto)
-            preco = None
-            if preco_match:
-                preco_str = preco_match.group(1).replace('.', '').replace(' ', '')
-                preco = float(preco_str) if preco_str.isdigit() else None
-            
-            # Extrair área
-            area_match = re.search(r'(\d+)\s*m[²2]', texto, re.IGNORECASE)
-            area = int(area_match.group(1)) if area_match else None
-            
-            # Extrair tipologia
-            tipos = ['T0', 'T1', 'T2', 'T3', 'T4', 'T5', 'Moradia', 'Loja', 'Terreno']
-            tipologia = None
-            for tipo in tipos:
-                if tipo.lower() in texto.lower():
-                    tipologia = tipo
-                    break
-            
-            if preco and preco > 10000:  # Filtrar preços válidos
-                imovel = {
-                    "id": f"{fonte.lower().replace(' ', '_')}_{len(imoveis)}",
-                    "titulo": texto[:150].strip(),
-                    "preco": preco,
-                    "preco_texto": f"€{preco:,.0f}",
-                    "area": area,
-                    "tipologia": tipologia or "Imóvel",
-                    "fonte": fonte,
-                    "url": base_url,
-                    "data_extracao": datetime.now().isoformat()
-                }
-                imoveis.append(imovel)
-    
-    # Remover duplicados baseado no título
-    imoveis_unicos = []
-    titulos_vistos = set()
-    for imo in imoveis:
-        titulo_base = imo["titulo"][:50].lower()
-        if titulo_base not in titulos_vistos:
-            titulos_vistos.add(titulo_base)
-            imoveis_unicos.append(imo)
-    
-    return imoveis_unicos
+async def extrair_imoveis_do_html(html, fonte, base_url):
+    """Extrai dados de imóveis do HTML (no pool de processos, fora do event loop)"""
+    return await get_parse_pool().parse('regex_leilao', html, fonte=fonte, base_url=base_url)
 
-def main():
+async def main():
     print("=" * 70)
     print("🏠 SCRAPERAPI - EXTRATOR DE IMÓVEIS")
     print("=" * 70)
@@ -137,16 +85,17 @@ def main():
     resultados = []
     todos_imoveis = []
     
-    for site in SITES:
-        if not site["ativo"]:
-            continue
-            
-        resultado = scrape_with_scraperapi(site["url"], site["nome"])
-        if resultado:
-            resultados.append(resultado)
-            todos_imoveis.extend(resultado.get("imoveis", []))
-        
-        time.sleep(2)  # Respeitar rate limits
+    try:
+        for site in SITES:
+            if not site["ativo"]:
+                continue
+                
+            resultado = await scrape_with_scraperapi(site["url"], site["nome"])
+            if resultado:
+                resultados.append(resultado)
+                todos_imoveis.extend(resultado.get("imoveis", []))
+    finally:
+        shutdown_parse_pool()
     
     # Guardar resultados detalhados
     output = {
@@ -201,4 +150,4 @@ def main():
     return todos_imoveis
 
 if __name__ == "__main__":
-    imoveis = main()
+    imoveis = asyncio.run(main())
@@ -7,7 +7,9 @@ import asyncio
 import json
 import re
 from datetime import datetime
-from playwright.async_api import async_playwright
+from browser_pool import get_browser_pool, close_browser_pool
+from readiness import goto_ready
+from extractors import extract
 
 SITES = [
     {"nome": "leilosoc.com", "url": "https://www.leilosoc.com/pt/leiloes/?categoria=imoveis"},
@@ -25,100 +27,81 @@ print(f"⏰ Início: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 print(f"📍 Sites a processar: {len(SITES)}")
 print("")
 
-async def scrape_site(browser, site):
+async def scrape_site(pool, site):
     """Scraper simples para um site"""
     print(f"📌 {site['nome']} - A iniciar...", flush=True)
     
     imoveis = []
     
     try:
-        context = await browser.new_context(
+        # Página e contexto devolvidos ao pool mesmo que a extração falhe
+        async with pool.page(
             user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        )
-        page = await context.new_page()
+        ) as page:
+            print(f"   🌐 A navegar para {site['url'][:50]}...", flush=True)
         
-        print(f"   🌐 A navegar para {site['url'][:50]}...", flush=True)
+            # Navegar e esperar pelo conteúdo (readiness.py)
+            response = await goto_ready(page, site['url'], timeout_ms=30000)
         
-        # Navegar com timeout
-        response = await page.goto(site['url'], timeout=30000, wait_until='domcontentloaded')
+            print(f"   ✅ Página carregada (Status: {response.status if response else 'N/A'})", flush=True)
         
-        print(f"   ✅ Página carregada (Status: {response.status if response else 'N/A'})", flush=True)
+            # Extrair todo o texto da página
+            content = await page.content()
+            text = await page.inner_text('body')
         
-        # Aguardar um pouco para JS carregar
-        await asyncio.sleep(3)
+            print(f"   📄 HTML: {len(content)} bytes | Texto: {len(text)} bytes", flush=True)
         
-        # Extrair todo o texto da página
-        content = await page.content()
-        text = await page.inner_text('body')
+            # Procurar por padrões de imóveis
+            # Padrão: T1, T2, Apartamento, Moradia + preço
+            padroes_imoveis = [
+                r'(T[0-5]|Apartamento|Moradia|Loja)[\s\w\-]+(?:\d+[\.\s]?\d+)\s*€',
+                r'(\d+[\.\s]?\d+)\s*€[\s\w\-]+(?:T[0-5]|Apartamento|Moradia)',
+            ]
         
-        print(f"   📄 HTML: {len(content)} bytes | Texto: {len(text)} bytes", flush=True)
+            encontrados = 0
+            for padrao in padroes_imoveis:
+                matches = re.findall(padrao, text, re.IGNORECASE)
+                encontrados += len(matches)
         
-        # Procurar por padrões de imóveis
-        # Padrão: T1, T2, Apartamento, Moradia + preço
-        padroes_imoveis = [
-            r'(T[0-5]|Apartamento|Moradia|Loja)[\s\w\-]+(?:\d+[\.\s]?\d+)\s*€',
-            r'(\d+[\.\s]?\d+)\s*€[\s\w\-]+(?:T[0-5]|Apartamento|Moradia)',
-        ]
+            print(f"   🔍 Padrões de imóveis encontrados: {encontrados}", flush=True)
         
-        encontrados = 0
-        for padrao in padroes_imoveis:
-            matches = re.findall(padrao, text, re.IGNORECASE)
-            encontrados += len(matches)
+            # Extrair links de imóveis
+            links = await page.query_selector_all('a')
+            links_imoveis = []
         
-        print(f"   🔍 Padrões de imóveis encontrados: {encontrados}", flush=True)
-        
-        # Extrair links de imóveis
-        links = await page.query_selector_all('a')
-        links_imoveis = []
-        
-        for link in links[:30]:  # Limitar a 30 links
-            try:
-                href = await link.get_attribute('href') or ""
-                texto = await link.inner_text()
-                
-                # Filtrar links relevantes
-                if any(kw in texto.lower() for kw in ['t1', 't2', 't3', 'apartamento', 'moradia', 'imovel', 'leilao', '€']):
-                    if len(texto) > 10 and len(texto) < 200:
-                        links_imoveis.append({
-                            'texto': texto.strip()[:100],
-                            'url': href[:100] if href else ''
-                        })
-            except:
-                pass
-        
-        print(f"   🔗 Links de imóveis: {len(links_imoveis)}", flush=True)
-        
-        # Criar entradas de imóveis dos links
-        for i, link in enumerate(links_imoveis[:10]):  # Máximo 10 por site
-            # Extrair preço
-            preco_match = re.search(r'(\d+[\.\s]?\d+)\s*€', link['texto'])
-            preco = None
-            if preco_match:
+            for link in links[:30]:  # Limitar a 30 links
                 try:
-                    preco_str = preco_match.group(1).replace('.', '').replace(' ', '')
-                    preco = float(preco_str)
+                    href = await link.get_attribute('href') or ""
+                    texto = await link.inner_text()
+                
+                    # Filtrar links relevantes
+                    if any(kw in texto.lower() for kw in ['t1', 't2', 't3', 'apartamento', 'moradia', 'imovel', 'leilao', '€']):
+                        if len(texto) > 10 and len(texto) < 200:
+                            links_imoveis.append({
+                                'texto': texto.strip()[:100],
+                                'url': href[:100] if href else ''
+                            })
                 except:
                     pass
-            
-            # Extrair tipologia
-            tipos = ['T0', 'T1', 'T2', 'T3', 'T4', 'T5', 'Apartamento', 'Moradia', 'Loja']
-            tipologia = None
-            for tipo in tipos:
-                if tipo.lower() in link['texto'].lower():
-                    tipologia = tipo
-                    break
-            
-            imoveis.append({
-                'id': f"{site['nome'].split('.')[0]}_{i}",
-                'fonte': site['nome'],
-                'titulo': link['texto'],
-                'tipologia': tipologia or 'Imóvel',
-                'preco': preco,
-                'url': link['url'] if link['url'].startswith('http') else f"https://{site['nome']}{link['url']}",
-                'data_extracao': datetime.now().isoformat()
-            })
         
-        await context.close()
+            print(f"   🔗 Links de imóveis: {len(links_imoveis)}", flush=True)
+        
+            # Criar entradas de imóveis dos links
+            for i, link in enumerate(links_imoveis[:10]):  # Máximo 10 por site
+                # Extrair preço e tipologia
+                campos = extract(link['texto'])
+                preco = campos.price
+                tipologia = campos.typology
+            
+                imoveis.append({
+                    'id': f"{site['nome'].split('.')[0]}_{i}",
+                    'fonte': site['nome'],
+                    'titulo': link['texto'],
+                    'tipologia': tipologia or 'Imóvel',
+                    'preco': preco,
+                    'url': link['url'] if link['url'].startswith('http') else f"https://{site['nome']}{link['url']}",
+                    'data_extracao': datetime.now().isoformat()
+                })
         
         print(f"   ✅ Concluído: {len(imoveis)} imóveis extraídos", flush=True)
         
@@ -130,17 +113,15 @@ async def scrape_site(browser, site):
 async def main():
     todos_imoveis = []
     
-    async with async_playwright() as p:
-        print("🚀 A lançar browser...", flush=True)
-        browser = await p.chromium.launch(headless=True)
-        print("✅ Browser pronto!\n", flush=True)
-        
+    # Browser partilhado (browser_pool), lançado no primeiro site
+    pool = get_browser_pool()
+    try:
         for site in SITES:
-            imoveis = await scrape_site(browser, site)
+            imoveis = await scrape_site(pool, site)
             todos_imoveis.extend(imoveis)
             print("")
-        
-        await browser.close()
+    finally:
+        await close_browser_pool()
     
     # Guardar resultados
     resultado = {
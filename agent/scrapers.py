@@ -12,15 +12,29 @@ from dataclasses import dataclass
 from urllib.parse import urljoin, urlparse
 import re
 
-try:
-    import aiohttp
-    from bs4 import BeautifulSoup
-    from playwright.async_api import async_playwright
-except ImportError:
-    pass  # Serão instaladas via requirements.txt
+from metrics import metrics
+from extractors import extract_area, extract_price, extract_typology
 
 logger = logging.getLogger(__name__)
 
+# Extração de todos os itens numa só chamada ao browser ($$eval)
+EXTRACT_ITEMS_JS = """
+(items) => items.map(item => {
+    const text = (selector) => {
+        const el = item.querySelector(selector);
+        return el ? el.innerText : '';
+    };
+    const link = item.querySelector('.item-link');
+    return {
+        title: link ? link.innerText : '',
+        href: link ? (link.getAttribute('href') || '') : '',
+        price: text('.item-price'),
+        details: text('.item-detail-char'),
+        location: text('.item-detail-char .ellipsis'),
+    };
+})
+"""
+
 @dataclass
 class ScrapedProperty:
     """Modelo de imóvel extraído"""
@@ -52,18 +66,24 @@ class BaseScraper:
     """Classe base para scrapers"""
     
     def __init__(self, delay_ms: int = 1000):
+        # Intervalo inicial por host; o controlador adaptativo (ratelimit) ajusta-o
         self.delay_ms = delay_ms
         self.session = None
+        self.fetcher = None
     
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession(
-            headers=self.get_headers()
-        )
+        from fetcher import TieredFetcher
+        from http_client import get_http_session
+        
+        # Sessão do processo: ligações, DNS e TLS reaproveitados entre scrapers
+        self.session = get_http_session()
+        self.fetcher = TieredFetcher(session=self.session, min_interval=self.delay_ms / 1000)
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            await self.session.close()
+        if self.fetcher:
+            await self.fetcher.close()
+        self.session = None
     
     def get_headers(self) -> Dict[str, str]:
         """Headers HTTP para requisições"""
@@ -74,42 +94,24 @@ class BaseScraper:
         }
     
     async def fetch(self, url: str) -> Optional[str]:
-        """Faz requisição HTTP e retorna HTML"""
-        try:
-            await asyncio.sleep(self.delay_ms / 1000)
-            async with self.session.get(url) as response:
-                if response.status == 200:
-                    return await response.text()
-                else:
-                    logger.warning(f"HTTP {response.status} em {url}")
-                    return None
-        except Exception as e:
-            logger.error(f"Erro ao buscar {url}: {e}")
-            return None
+        """
+        Retorna o HTML da página
+        
+        HTTP simples primeiro; o browser só é usado nos sites que o exigem
+        (decisão guardada por site, ver fetcher.TieredFetcher).
+        """
+        result = await self.fetcher.fetch(url)
+        if not result.ok:
+            logger.warning(f"Sem conteúdo válido em {url} (HTTP {result.status}, {result.tier})")
+        return result.html
     
     def extract_price(self, text: str) -> Optional[float]:
-        """Extrai valor numérico de preço"""
-        if not text:
-            return None
-        # Remover símbolos e espaços
-        cleaned = re.sub(r'[^\d,\.]', '', text.replace(' ', ''))
-        # Converter para float
-        try:
-            return float(cleaned.replace(',', '.'))
-        except ValueError:
-            return None
+        """Extrai valor numérico de preço (elemento de preço, "€" opcional)"""
+        return extract_price(text, require_currency=False)
     
     def extract_area(self, text: str) -> Optional[float]:
         """Extrai área em m²"""
-        if not text:
-            return None
-        match = re.search(r'(\d+[\.,]?\d*)\s*m[²2]?', text, re.IGNORECASE)
-        if match:
-            try:
-                return float(match.group(1).replace(',', '.'))
-            except ValueError:
-                return None
-        return None
+        return extract_area(text)
 
 
 class IdealistaScraper(BaseScraper):
@@ -139,61 +141,55 @@ class IdealistaScraper(BaseScraper):
         
         logger.info(f"Buscando no Idealista: {search_url}")
         
-        # Usar Playwright para JavaScript-rendered content
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
-            
+        # Usar Playwright para JavaScript-rendered content (browser partilhado)
+        from browser_pool import get_browser_pool
+        from readiness import goto_ready
+        
+        async with get_browser_pool().page() as page:
             try:
-                await page.goto(search_url, wait_until='networkidle')
-                await asyncio.sleep(2)  # Esperar carregamento
+                # Esperar pelas listagens (readiness.py) em vez de networkidle + pausa
+                await goto_ready(page, search_url)
                 
                 # Extrair dados dos imóveis
-                items = await page.query_selector_all('article.item')
+                with metrics.timer('page_parse_seconds', portal='idealista'):
+                    # Uma única ida ao browser para todos os itens
+                    items = await page.eval_on_selector_all('article.item', EXTRACT_ITEMS_JS)
+                    
+                    for item in items[:20]:  # Limitar a 20 resultados
+                        try:
+                            prop = self._parse_item(item)
+                            if prop:
+                                properties.append(prop)
+                        except Exception as e:
+                            logger.error(f"Erro ao parsear item: {e}")
+                            metrics.inc('errors_total', component='parse', portal='idealista')
                 
-                for item in items[:20]:  # Limitar a 20 resultados
-                    try:
-                        prop = await self._parse_item(item)
-                        if prop:
-                            properties.append(prop)
-                    except Exception as e:
-                        logger.error(f"Erro ao parsear item: {e}")
+                metrics.inc('listings_total', len(properties), portal='idealista')
                 
             except Exception as e:
                 logger.error(f"Erro na busca Idealista: {e}")
-            finally:
-                await browser.close()
         
         return properties
     
-    async def _parse_item(self, item) -> Optional[ScrapedProperty]:
-        """Parse de um item de imóvel"""
+    def _parse_item(self, item: Dict[str, str]) -> Optional[ScrapedProperty]:
+        """Parse de um item de imóvel (dict devolvido por EXTRACT_ITEMS_JS)"""
         try:
             # Título
-            title_elem = await item.query_selector('.item-link')
-            title = await title_elem.inner_text() if title_elem else ""
-            href = await title_elem.get_attribute('href') if title_elem else ""
-            url = urljoin(self.BASE_URL, href)
+            title = item.get('title') or ""
+            url = urljoin(self.BASE_URL, item.get('href') or "")
             
             # Preço
-            price_elem = await item.query_selector('.item-price')
-            price_text = await price_elem.inner_text() if price_elem else ""
-            price = self.extract_price(price_text)
+            price = self.extract_price(item.get('price') or "")
             
             # Área e tipologia
-            details_elem = await item.query_selector('.item-detail-char')
-            details = await details_elem.inner_text() if details_elem else ""
+            details = item.get('details') or ""
             area = self.extract_area(details)
             
             # Extrair tipologia
-            typology = ""
-            typ_match = re.search(r'(T\d+|Moradia|Apartamento)', details, re.IGNORECASE)
-            if typ_match:
-                typology = typ_match.group(1).upper()
+            typology = extract_typology(details) or ""
             
             # Localização
-            loc_elem = await item.query_selector('.item-detail-char .ellipsis')
-            location = await loc_elem.inner_text() if loc_elem else ""
+            location = item.get('location') or ""
             
             # ID único
             prop_id = re.search(r'/\d+/', url)
@@ -279,45 +275,61 @@ class MultiPortalScraper:
             'supercasa': SupercasaScraper,
         }
     
+    @property
+    def portals(self) -> List[str]:
+        """Portais suportados"""
+        return list(self.scrapers)
+    
+    def host_for(self, portal: str) -> str:
+        """Host do portal (usado para limites por host)"""
+        ScraperClass = self.scrapers.get(portal)
+        return urlparse(ScraperClass.BASE_URL).netloc if ScraperClass else portal
+    
+    async def search_portal(self, portal: str, location: str = "lisboa",
+                            typology: str = "", **kwargs) -> List[ScrapedProperty]:
+        """Busca num portal específico"""
+        ScraperClass = self.scrapers.get(portal)
+        if not ScraperClass:
+            logger.error(f"Portal não suportado: {portal}")
+            return []
+        
+        async with ScraperClass() as scraper:
+            return await scraper.search(location, typology)
+    
     async def search_all(self, location: str = "lisboa",
-                         typology: str = "") -> Dict[str, List[ScrapedProperty]]:
+                         typology: str = "", **kwargs) -> Dict[str, List[ScrapedProperty]]:
         """
-        Busca em todos os portais disponíveis
+        Busca em todos os portais disponíveis, em paralelo
+        
+        Cada portal é um host diferente; o espaçamento entre pedidos ao mesmo
+        host é garantido pelo rate limiter. Opções da v2 (max_pages,
+        checkpointer) são ignoradas; os imóveis são guardados no fim da execução.
         
         Returns:
             Dict com resultados por portal
         """
-        results = {}
-        
-        for name, ScraperClass in self.scrapers.items():
+        async def search(name: str) -> List[ScrapedProperty]:
             try:
-                async with ScraperClass() as scraper:
-                    properties = await scraper.search(location, typology)
-                    results[name] = properties
-                    logger.info(f"{name}: {len(properties)} imóveis encontrados")
+                properties = await self.search_portal(name, location, typology)
+                logger.info(f"{name}: {len(properties)} imóveis encontrados")
+                return properties
             except Exception as e:
                 logger.error(f"Erro no scraper {name}: {e}")
-                results[name] = []
+                return []
         
-        return results
+        names = list(self.scrapers)
+        found = await asyncio.gather(*(search(name) for name in names))
+        return dict(zip(names, found))
     
     def deduplicate(self, all_properties: Dict[str, List[ScrapedProperty]]) -> List[ScrapedProperty]:
         """
-        Remove duplicados entre portais baseado em características similares
+        Remove duplicados entre portais (o mesmo imóvel com preço/área
+        ligeiramente diferentes em cada portal; ver dedup.py)
         """
-        seen = set()
-        unique = []
-        
-        for portal, properties in all_properties.items():
-            for prop in properties:
-                # Chave de deduplicação: localização + preço + área
-                key = f"{prop.location}|{prop.price}|{prop.area_m2}"
-                
-                if key not in seen:
-                    seen.add(key)
-                    unique.append(prop)
+        from dedup import ListingDeduplicator
         
-        return unique
+        listings = [prop for properties in all_properties.values() for prop in properties]
+        return ListingDeduplicator().deduplicate(listings)
 
 
 async def main():
@@ -7,20 +7,21 @@ import asyncio
 import logging
 import json
 import random
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, TYPE_CHECKING
 from datetime import datetime
 from dataclasses import dataclass
 from urllib.parse import urljoin, urlparse, quote
 import re
 import time
 
-try:
-    import aiohttp
-    from bs4 import BeautifulSoup
-    from playwright.async_api import async_playwright, Page, Browser
-    from playwright_stealth import stealth_async
-except ImportError:
-    pass
+from metrics import metrics
+from extractors import extract_area, extract_price, extract_typology, split_location
+from ratelimit import host_limiter, parse_retry_after
+from readiness import goto_ready
+
+# Playwright é importado apenas quando o browser é lançado (arranque rápido do CLI)
+if TYPE_CHECKING:
+    from playwright.async_api import Page
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +33,35 @@ USER_AGENTS = [
     'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.2 Safari/605.1.15',
 ]
 
+# Esconde sinais de automação em todas as páginas do contexto
+STEALTH_JS = """
+    Object.defineProperty(navigator, 'webdriver', {
+        get: () => undefined
+    });
+    Object.defineProperty(navigator, 'plugins', {
+        get: () => [1, 2, 3, 4, 5]
+    });
+"""
+
+# Extração de todos os itens numa só chamada ao browser ($$eval):
+# devolve uma lista de dicts com o texto de cada campo
+EXTRACT_ITEMS_JS = """
+(items, sel) => items.map(item => {
+    const text = (selector) => {
+        const el = item.querySelector(selector);
+        return el ? el.innerText : '';
+    };
+    const link = item.querySelector(sel.title);
+    return {
+        title: link ? link.innerText : '',
+        href: link ? (link.getAttribute('href') || '') : '',
+        price: text(sel.price),
+        details: text(sel.details),
+        location: text(sel.location),
+    };
+})
+"""
+
 @dataclass
 class ScrapedProperty:
     """Modelo de imóvel extraído"""
@@ -62,88 +92,106 @@ class ScrapedProperty:
 class StealthScraper:
     """Scraper com técnicas de anti-detecção"""
     
-    def __init__(self, delay_ms: int = 2000, use_proxy: bool = False):
+    def __init__(self, delay_ms: int = 2000, use_proxy: bool = False, pool=None,
+                 human_behavior: bool = False):
+        # Intervalo inicial por host; o controlador adaptativo (ratelimit) ajusta-o
         self.delay_ms = delay_ms
         self.use_proxy = use_proxy
-        self.browser: Optional[Browser] = None
+        self.pool = pool
         self.context = None
+        # Scroll/rato simulados: opcional e só na primeira página de cada contexto
+        self.human_behavior = human_behavior
+        self._humanized = False
+        self.pages_fetched = 0  # páginas carregadas com sucesso (rendimento por página)
     
     async def init_browser(self):
-        """Inicializa browser com stealth mode"""
-        playwright = await async_playwright().start()
+        """Empresta um contexto stealth do browser partilhado (browser_pool)"""
+        from browser_pool import get_browser_pool
+        
+        if self.context:
+            return self
         
-        browser_args = ['--disable-blink-features=AutomationControlled']
         if self.use_proxy:
             # Adicionar proxy se configurado
             pass
         
-        self.browser = await playwright.chromium.launch(
-            headless=True,
-            args=browser_args
-        )
+        self.pool = self.pool or get_browser_pool()
         
-        # Contexto com viewport e user agent realistas
-        self.context = await self.browser.new_context(
+        # Contexto com viewport e user agent realistas + scripts de stealth
+        self.context = await self.pool.acquire_context(
+            init_script=STEALTH_JS,
             viewport={'width': 1920, 'height': 1080},
             user_agent=random.choice(USER_AGENTS),
             locale='pt-PT',
             timezone_id='Europe/Lisbon',
         )
         
-        # Adicionar scripts de stealth
-        await self.context.add_init_script("""
-            Object.defineProperty(navigator, 'webdriver', {
-                get: () => undefined
-            });
-            Object.defineProperty(navigator, 'plugins', {
-                get: () => [1, 2, 3, 4, 5]
-            });
-        """)
-        
         return self
     
     async def close(self):
-        """Fecha o browser"""
-        if self.browser:
-            await self.browser.close()
+        """Devolve o contexto ao pool (o browser continua quente)"""
+        if self.context:
+            await self.pool.release_context(self.context)
+            self.context = None
+            self._humanized = False
     
-    async def fetch_page(self, url: str) -> Optional[Page]:
+    async def fetch_page(self, url: str) -> Optional['Page']:
         """Carrega página com delays e comportamento humano"""
         if not self.context:
             await self.init_browser()
         
-        page = await self.context.new_page()
+        page = await self.pool.new_page(self.context)
+        host = urlparse(url).netloc
         
         try:
-            # Delay aleatório antes de carregar
-            await asyncio.sleep(random.uniform(1, 3))
+            # Vaga e ritmo adaptativos do host, com jitter (partilhados entre pesquisas
+            # concorrentes); delay_ms é só o intervalo inicial
+            async with host_limiter.slot(host, min_interval=self.delay_ms / 1000, jitter=1.0):
+                # Pronta assim que as listagens existem (readiness.py), sem networkidle
+                start = time.perf_counter()
+                with metrics.timer('page_fetch_seconds', host=host):
+                    response = await goto_ready(page, url, timeout_ms=30000)
+                host_limiter.feedback(
+                    host, response.status if response else 200, time.perf_counter() - start,
+                    parse_retry_after(response.headers.get('retry-after')) if response else None
+                )
             
-            await page.goto(url, wait_until='networkidle', timeout=30000)
+            metrics.inc('pages_total', host=host)
+            self.pages_fetched += 1
+            if response:
+                # Tamanho real do corpo (content-length falta em respostas chunked/comprimidas)
+                try:
+                    metrics.inc('bytes_total', len(await response.body()), host=host)
+                except Exception:
+                    pass  # corpo indisponível (redirect, navegação substituída)
             
-            # Simular comportamento humano
-            await self._human_behavior(page)
+            # Comportamento humano (opcional): uma vez por contexto, não em cada página
+            if self.human_behavior and not self._humanized:
+                self._humanized = True
+                await self._human_behavior(page)
             
             return page
             
         except Exception as e:
             logger.error(f"Erro ao carregar {url}: {e}")
+            metrics.inc('errors_total', component='fetch', host=host)
             await page.close()
             return None
     
-    async def _human_behavior(self, page: Page):
-        """Simula comportamento humano na página"""
+    async def _human_behavior(self, page: 'Page'):
+        """Simula comportamento humano na página (no máximo ~2s)"""
         # Scroll aleatório
-        for _ in range(random.randint(2, 5)):
+        for _ in range(random.randint(1, 2)):
             await page.mouse.wheel(0, random.randint(300, 700))
-            await asyncio.sleep(random.uniform(0.5, 1.5))
+            await asyncio.sleep(random.uniform(0.2, 0.5))
         
         # Movimento do mouse aleatório
-        for _ in range(random.randint(3, 7)):
+        for _ in range(random.randint(2, 3)):
             await page.mouse.move(
                 random.randint(100, 1800),
                 random.randint(100, 900)
             )
-            await asyncio.sleep(random.uniform(0.2, 0.8))
+            await asyncio.sleep(random.uniform(0.1, 0.3))
 
 
 class IdealistaScraper:
@@ -151,6 +199,16 @@ class IdealistaScraper:
     
     BASE_URL = "https://www.idealista.pt"
     
+    # Seletores atualizados (podem mudar); usados também por bench_adapters
+    SELECTORS = {
+        'items': 'article.item',
+        'title': '.item-link',
+        'price': '.item-price',
+        'details': '.item-detail-char',
+        'location': '.item-detail-char .ellipsis',
+        'description': '.item-description',
+    }
+    
     def __init__(self, stealth: Optional[StealthScraper] = None):
         self.stealth = stealth or StealthScraper()
     
@@ -159,9 +217,14 @@ class IdealistaScraper:
                      typology: str = "",
                      min_price: Optional[int] = None,
                      max_price: Optional[int] = None,
-                     max_pages: int = 3) -> List[ScrapedProperty]:
+                     max_pages: int = 3,
+                     checkpoint=None) -> List[ScrapedProperty]:
         """
         Busca imóveis no Idealista
+        
+        Args:
+            checkpoint: CellCheckpoint opcional; retoma na primeira página por
+                fazer e guarda cada página assim que é extraída
         """
         properties = []
         
@@ -193,9 +256,10 @@ class IdealistaScraper:
         logger.info(f"Buscando no Idealista: {search_url}")
         
         await self.stealth.init_browser()
+        start_page = checkpoint.start_page if checkpoint else 1
         
         try:
-            for page_num in range(1, max_pages + 1):
+            for page_num in range(start_page, max_pages + 1):
                 page_url = f"{search_url}?pagina={page_num}" if page_num > 1 else search_url
                 
                 page = await self.stealth.fetch_page(page_url)
@@ -212,10 +276,18 @@ class IdealistaScraper:
                 has_next = await page.query_selector('a.icon-arrow-right-after')
                 await page.close()
                 
-                if not has_next or len(items) == 0:
+                if not items:
+                    # Bloqueio, captcha ou página vazia: parar sem dar a célula
+                    # por terminada (a próxima execução retoma nesta página)
+                    logger.warning(f"Página {page_num} sem imóveis, a parar sem fechar o checkpoint")
                     break
                 
-                await asyncio.sleep(random.uniform(3, 6))
+                # Última página só quando é uma página de resultados sem "seguinte"
+                if checkpoint:
+                    checkpoint.page_done(page_num, items, finished=not has_next or page_num == max_pages)
+                
+                if not has_next:
+                    break
                 
         finally:
             await self.stealth.close()
@@ -225,57 +297,46 @@ class IdealistaScraper:
     async def _extract_properties(self, page) -> List[ScrapedProperty]:
         """Extrai lista de imóveis da página"""
         properties = []
+        selectors = self.SELECTORS
         
-        # Seletores atualizados (podem mudar)
-        selectors = {
-            'items': 'article.item',
-            'title': '.item-link',
-            'price': '.item-price',
-            'details': '.item-detail-char',
-            'location': '.item-detail-char .ellipsis',
-            'description': '.item-description',
-        }
-        
-        items = await page.query_selector_all(selectors['items'])
-        
-        for item in items:
-            try:
-                prop = await self._parse_item(item, selectors)
-                if prop and prop.price > 0:
-                    properties.append(prop)
-            except Exception as e:
-                logger.error(f"Erro ao parsear item: {e}")
+        with metrics.timer('page_parse_seconds', portal='idealista'):
+            # Uma única ida ao browser para todos os itens; o parse é local
+            items = await page.eval_on_selector_all(selectors['items'], EXTRACT_ITEMS_JS, selectors)
+            
+            for item in items:
+                try:
+                    prop = self._parse_item(item)
+                    if prop and prop.price > 0:
+                        properties.append(prop)
+                except Exception as e:
+                    logger.error(f"Erro ao parsear item: {e}")
+                    metrics.inc('errors_total', component='parse', portal='idealista')
         
+        metrics.inc('listings_total', len(properties), portal='idealista')
         return properties
     
-    async def _parse_item(self, item, selectors) -> Optional[ScrapedProperty]:
-        """Parse de um item de imóvel"""
+    def _parse_item(self, item: Dict[str, str]) -> Optional[ScrapedProperty]:
+        """Parse de um item de imóvel (dict devolvido por EXTRACT_ITEMS_JS)"""
         try:
             # Título e URL
-            title_elem = await item.query_selector(selectors['title'])
-            title = await title_elem.inner_text() if title_elem else ""
-            href = await title_elem.get_attribute('href') if title_elem else ""
-            url = urljoin(self.BASE_URL, href)
+            title = item.get('title') or ""
+            url = urljoin(self.BASE_URL, item.get('href') or "")
             
             # Extrair ID do URL
             prop_id = re.search(r'/\d+/', url)
             prop_id = prop_id.group(0).strip('/') if prop_id else str(hash(url))
             
             # Preço
-            price_elem = await item.query_selector(selectors['price'])
-            price_text = await price_elem.inner_text() if price_elem else ""
-            price = self._extract_price(price_text)
+            price = extract_price(item.get('price') or "", require_currency=False)
             
             # Detalhes (área, tipologia)
-            details_elem = await item.query_selector(selectors['details'])
-            details = await details_elem.inner_text() if details_elem else ""
-            area = self._extract_area(details)
-            typology = self._extract_typology(details)
+            details = item.get('details') or ""
+            area = extract_area(details)
+            typology = extract_typology(details) or ""
             
             # Localização
-            loc_elem = await item.query_selector(selectors['location'])
-            location = await loc_elem.inner_text() if loc_elem else ""
-            parish, municipality = self._parse_location(location)
+            location = item.get('location') or ""
+            parish, municipality = split_location(location)
             
             return ScrapedProperty(
                 id=f"idealista_{prop_id}",
@@ -293,103 +354,85 @@ class IdealistaScraper:
         except Exception as e:
             logger.error(f"Erro no parse: {e}")
             return None
-    
-    def _extract_price(self, text: str) -> Optional[float]:
-        """Extrai valor numérico de preço"""
-        if not text:
-            return None
-        cleaned = re.sub(r'[^\d,\.]', '', text.replace(' ', ''))
-        try:
-            return float(cleaned.replace(',', '.'))
-        except ValueError:
-            return None
-    
-    def _extract_area(self, text: str) -> Optional[float]:
-        """Extrai área em m²"""
-        if not text:
-            return None
-        match = re.search(r'(\d+[\.,]?\d*)\s*m[²2]?', text, re.IGNORECASE)
-        if match:
-            try:
-                return float(match.group(1).replace(',', '.'))
-            except ValueError:
-                return None
-        return None
-    
-    def _extract_typology(self, text: str) -> str:
-        """Extrai tipologia do texto"""
-        patterns = [
-            (r'\b(T\d+)\b', lambda m: m.group(1).upper()),
-            (r'\bestudio\b', 'T0'),
-            (r'\bmoradia\b', 'Moradia'),
-        ]
-        
-        for pattern, extractor in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                return extractor(match)
-        
-        return ""
-    
-    def _parse_location(self, location: str) -> tuple:
-        """Parse de localização em parish, municipality"""
-        parts = location.split(',')
-        if len(parts) >= 2:
-            return parts[0].strip(), parts[-1].strip()
-        return location, "Lisboa"
 
 
 class MultiPortalScraper:
     """Scraper unificado para múltiplos portais"""
     
+    # Adicionar mais quando implementados
+    SCRAPERS = {
+        'idealista': IdealistaScraper,
+    }
+    
     def __init__(self):
         self.stealth = StealthScraper()
     
-    async def search_portal(self, portal: str, **kwargs) -> List[ScrapedProperty]:
-        """Busca num portal específico"""
-        scrapers = {
-            'idealista': IdealistaScraper,
-        }
+    @property
+    def portals(self) -> List[str]:
+        """Portais suportados"""
+        return list(self.SCRAPERS)
+    
+    def host_for(self, portal: str) -> str:
+        """Host do portal (usado para limites por host)"""
+        ScraperClass = self.SCRAPERS.get(portal)
+        return urlparse(ScraperClass.BASE_URL).netloc if ScraperClass else portal
+    
+    async def search_portal(self, portal: str,
+                            stealth: Optional[StealthScraper] = None,
+                            checkpointer=None,
+                            **kwargs) -> List[ScrapedProperty]:
+        """
+        Busca num portal específico
         
-        ScraperClass = scrapers.get(portal)
+        Args:
+            stealth: Contexto stealth a usar (por omissão o do scraper); pesquisas
+                concorrentes devem passar um próprio
+            checkpointer: CrawlCheckpointer para guardar/retomar página a página
+        """
+        ScraperClass = self.SCRAPERS.get(portal)
         if not ScraperClass:
             logger.error(f"Portal não suportado: {portal}")
             return []
         
-        scraper = ScraperClass(stealth=self.stealth)
+        if checkpointer:
+            kwargs['checkpoint'] = checkpointer.for_cell(
+                portal, kwargs.get('location', 'lisboa'), kwargs.get('typology', '')
+            )
+        
+        scraper = ScraperClass(stealth=stealth or self.stealth)
         return await scraper.search(**kwargs)
     
     async def search_all(self, **kwargs) -> Dict[str, List[ScrapedProperty]]:
-        """Busca em todos os portais"""
-        portals = ['idealista']  # Adicionar mais quando implementados
-        results = {}
+        """
+        Busca em todos os portais, em paralelo
         
-        for portal in portals:
+        Cada portal tem o seu contexto no browser partilhado; o espaçamento
+        por host fica a cargo do rate limiter.
+        """
+        portals = self.portals
+        
+        async def search(portal: str) -> List[ScrapedProperty]:
             try:
-                properties = await self.search_portal(portal, **kwargs)
-                results[portal] = properties
+                stealth = StealthScraper() if len(portals) > 1 else None
+                properties = await self.search_portal(portal, stealth=stealth, **kwargs)
                 logger.info(f"{portal}: {len(properties)} imóveis")
+                return properties
             except Exception as e:
                 logger.error(f"Erro em {portal}: {e}")
-                results[portal] = []
+                return []
         
-        return results
+        found = await asyncio.gather(*(search(portal) for portal in portals))
+        return dict(zip(portals, found))
     
     def deduplicate(self, all_properties: Dict[str, List[ScrapedProperty]]) -> List[ScrapedProperty]:
-        """Remove duplicados entre portais"""
-        seen = set()
-        unique = []
-        
-        for portal, properties in all_properties.items():
-            for prop in properties:
-                # Chave de deduplicação
-                key = f"{prop.parish}|{prop.price}|{prop.area_m2}|{prop.typology}"
-                
-                if key not in seen:
-                    seen.add(key)
-                    unique.append(prop)
+        """
+        Remove duplicados entre portais (o mesmo imóvel com preço/área
+        ligeiramente diferentes em cada portal; ver dedup.py)
+        """
+        from dedup import ListingDeduplicator
         
-        return unique
+        listings = [prop for properties in all_properties.values() for prop in properties]
+        return ListingDeduplicator().deduplicate(listings)
 
 
 async def main():
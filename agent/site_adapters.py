@@ -0,0 +1,329 @@
+"""
+Site adapters - Lisboa Real Estate AI
+Extração de imóveis a partir do HTML, por site
+
+Cada adapter é uma função pura HTML -> lista de dicts (registos compactos,
+serializáveis em JSON). São chamados pelo nome, o que permite corrê-los
+noutro processo (parse_pool) e guardar o resultado na cache HTTP.
+
+A versão de cada adapter entra na chave da cache: mudar a extração implica
+subir a versão.
+"""
+
+import re
+import logging
+from datetime import date, datetime
+from itertools import islice
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from extractors import extract_fields, extract_price
+
+logger = logging.getLogger(__name__)
+
+
+class Adapter(NamedTuple):
+    name: str
+    version: int
+    func: Callable[..., List[Dict]]
+
+    @property
+    def cache_key(self) -> str:
+        return f"{self.name}_v{self.version}"
+
+
+ADAPTERS: Dict[str, Adapter] = {}
+
+
+def adapter(name: str, version: int = 1):
+    """Regista uma função de extração com o nome do site"""
+    def register(func):
+        ADAPTERS[name] = Adapter(name, version, func)
+        return func
+    return register
+
+
+def get_adapter(name: str) -> Adapter:
+    if name not in ADAPTERS:
+        raise KeyError(f"Adapter desconhecido: {name}")
+    return ADAPTERS[name]
+
+
+def run_adapter(name: str, html: str, **context) -> List[Dict]:
+    """Extrai os imóveis do HTML com o adapter `name`"""
+    return get_adapter(name).func(html, **context)
+
+
+# ----------------------------------------------------------------------
+# Padrões (compilados uma vez; preço/área/tipologia vêm de extractors)
+# ----------------------------------------------------------------------
+
+# Padrões comuns para imóveis em sites de leilão (texto completo da página)
+PADROES_LEILAO = [
+    # Padrão 1: Cards com preço e localização
+    re.compile(r'([\w\s\-]+(?:T[0-5]|Moradia|Apartamento|Loja|Terreno)[\w\s\-]*).*?(\d+[\s\.]?\d+)\s*€.*?([\w\s]+(?:Lisboa|Porto|Cascais|Sintra|Oeiras|Loures|Amadora|Almada|Seixal|Setúbal)[\w\s]*)', re.IGNORECASE | re.DOTALL),
+    # Padrão 2: Preço seguido de área
+    re.compile(r'(\d+[\s\.]?\d+)\s*€.*?([\d\.]+)\s*m[²2].*?(T[0-5]|Moradia)', re.IGNORECASE | re.DOTALL),
+    # Padrão 3: Títulos de imóveis
+    re.compile(r'(Leilão.*?T[0-5].*?)(\d+[\s\.]?\d+)\s*€', re.IGNORECASE | re.DOTALL),
+]
+
+# Datas em páginas de detalhe ("2024-03-12", "12/03/2024", JSON-LD datePosted)
+DATA_ISO_RE = re.compile(r'([0-9]{4})-([0-9]{2})-([0-9]{2})')
+DATA_PT_RE = re.compile(r'([0-9]{1,2})[/.-]([0-9]{1,2})[/.-]([0-9]{4})')
+DATA_JSONLD_RE = re.compile(r'"date(?:Posted|Published|Created)"\s*:\s*"([0-9]{4}-[0-9]{2}-[0-9]{2})')
+
+
+# ----------------------------------------------------------------------
+# Adapters
+# ----------------------------------------------------------------------
+
+@adapter('leilosoc', version=3)
+def parse_leilosoc(html: str) -> List[Dict]:
+    """Cards de imóveis da página de leilões da leilosoc.com (campos de LeilaoProperty)"""
+    from html_parser import parse_html, site_selectors
+
+    items = []
+    selectors = site_selectors('leilosoc')
+    doc = parse_html(html)
+
+    # Procurar cards de imóveis (estrutura típica)
+    cards = doc.css(selectors['card'])
+
+    for card in cards[:10]:  # Limitar a 10 para teste
+        try:
+            # Extrair dados básicos
+            titulo = card.css_first(selectors['title'])
+            titulo = titulo.text(strip=True) if titulo else "Sem título"
+
+            preco = extract_price(card.text(separator=' ')) or 0
+
+            link_elem = card.css_first(selectors['link'])
+            link = link_elem.attr('href', "") if link_elem else ""
+            if link and not link.startswith('http'):
+                link = f"https://www.leilosoc.com{link}"
+
+            items.append(dict(
+                id=f"leilosoc_{len(items)}",
+                titulo=titulo,
+                localizacao="Lisboa",
+                descricao="",
+                preco_base=preco,
+                preco_avaliacao=None,
+                data_leilao=None,
+                tipo="Apartamento",
+                area=None,
+                url=link,
+                fonte="leilosoc.com",
+                imagens=[],
+                estado="aberto"
+            ))
+
+        except Exception as e:
+            logger.warning(f"Erro ao extrair card: {e}")
+            continue
+
+    return items
+
+
+@adapter('portal_cards')
+def parse_portal_cards(html: str, portal: str, base_url: str = '') -> List[Dict]:
+    """Cards de listagem de um portal (seletores de html_parser.SITE_SELECTORS[portal])"""
+    from html_parser import parse_html, site_selectors
+
+    selectors = site_selectors(portal)
+    doc = parse_html(html)
+
+    def text_of(card, field: str) -> Optional[str]:
+        element = card.css_first(selectors[field]) if field in selectors else None
+        return element.text(separator=' ', strip=True) if element is not None else None
+
+    cards, textos = [], []
+    for card in doc.css(selectors['items']):
+        texto = card.text(separator=' ', strip=True)
+        cards.append((card, texto))
+        textos.append(text_of(card, 'details') or texto)
+
+    # Área, tipologia e concelho de todos os cards numa passagem
+    campos = extract_fields(textos)
+
+    items = []
+    for (card, texto), campo in zip(cards, campos):
+        link = card.css_first(selectors['title'])
+        href = link.attr('href', '') if link is not None else ''
+        price_text = text_of(card, 'price')
+        location = text_of(card, 'location') or campo.location or ''
+        items.append({
+            'id': f"{portal}_{len(items)}",
+            'portal': portal,
+            'url': href if href.startswith('http') or not base_url else f"{base_url.rstrip('/')}{href}",
+            'title': link.text(strip=True) if link is not None else texto[:120],
+            # Elemento só com o preço: "€" opcional
+            'price': (extract_price(price_text, require_currency=False) if price_text is not None
+                      else campo.price) or 0,
+            'area_m2': campo.area_m2,
+            'typology': campo.typology or '',
+            'location': location,
+        })
+    return items
+
+
+@adapter('generic_cards', version=2)
+def parse_generic_cards(html: str, fonte: str) -> List[Dict]:
+    """Cards genéricos (primeiro seletor com resultados) de sites sem adapter próprio"""
+    from html_parser import parse_html, select_cards, site_selectors
+
+    imoveis = []
+    selectors = site_selectors('generic')
+    doc = parse_html(html)
+
+    cards = []
+    for card in select_cards(doc, selectors['cards'], limit=10):
+        texto = card.text(separator=' ', strip=True)
+        if len(texto) >= 20:
+            cards.append((card, texto))
+
+    # Preço, área e tipologia de todos os cards numa passagem
+    campos = extract_fields(texto for _, texto in cards)
+
+    for (card, texto), campo in zip(cards, campos):
+        try:
+            preco = campo.price or 0
+            area = campo.area_m2
+
+            # Link
+            link_elem = card.css_first(selectors['link'])
+            href = link_elem.attr('href', '') if link_elem else ''
+
+            imoveis.append({
+                "id": f"{fonte}_{len(imoveis)}",
+                "fonte": fonte,
+                "titulo": texto[:120],
+                "tipo": campo.typology or 'Desconhecido',
+                "preco": preco,
+                "area_m2": area,
+                "preco_m2": round(preco / area, 2) if area and preco else None,
+                "url": href if href.startswith('http') else f"https://{fonte}{href}",
+                "data_extracao": datetime.now().isoformat()
+            })
+        except Exception:
+            continue
+
+    return imoveis
+
+
+@adapter('regex_leilao', version=2)
+def parse_regex_leilao(html: str, fonte: str, base_url: str) -> List[Dict]:
+    """Imóveis por padrões de texto sobre a página inteira (sites sem estrutura estável)"""
+    imoveis = []
+
+    # Procurar por padrões no HTML
+    titulos, textos = [], []
+    for padrao in PADROES_LEILAO:
+        for match in islice(padrao.finditer(html), 10):  # Limitar a 10 por padrão
+            titulos.append(' '.join(g for g in match.groups() if g))
+            # Texto completo do match: os grupos não incluem o "€" do preço
+            textos.append(match.group(0))
+
+    for titulo, campos in zip(titulos, extract_fields(textos)):
+        preco = campos.price
+        if preco and preco > 10000:  # Filtrar preços válidos
+            imoveis.append({
+                "id": f"{fonte.lower().replace(' ', '_')}_{len(imoveis)}",
+                "titulo": titulo[:150].strip(),
+                "preco": preco,
+                "preco_texto": f"€{preco:,.0f}",
+                "area": campos.area_m2,
+                "tipologia": campos.typology or "Imóvel",
+                "fonte": fonte,
+                "url": base_url,
+                "data_extracao": datetime.now().isoformat()
+            })
+
+    # Remover duplicados baseado no título
+    imoveis_unicos = []
+    titulos_vistos = set()
+    for imo in imoveis:
+        titulo_base = imo["titulo"][:50].lower()
+        if titulo_base not in titulos_vistos:
+            titulos_vistos.add(titulo_base)
+            imoveis_unicos.append(imo)
+
+    return imoveis_unicos
+
+
+def _parse_date(texto: str) -> Optional[str]:
+    """Primeira data do texto em ISO (AAAA-MM-DD), None se não existe ou é inválida"""
+    match = DATA_ISO_RE.search(texto or '')
+    if match:
+        ano, mes, dia = (int(g) for g in match.groups())
+    else:
+        match = DATA_PT_RE.search(texto or '')
+        if not match:
+            return None
+        dia, mes, ano = (int(g) for g in match.groups())
+    try:
+        # Datas impossíveis (31/02) partiriam o datetime.fromisoformat do enrichment
+        return date(ano, mes, dia).isoformat()
+    except ValueError:
+        return None
+
+
+@adapter('detail_page')
+def parse_detail_page(html: str) -> List[Dict]:
+    """
+    Página de detalhe de um imóvel: descrição, características, fotos,
+    data de publicação e histórico de preços
+
+    Devolve um único registo (lista vazia se a página não tem nada útil).
+    """
+    from html_parser import parse_html, select_cards, site_selectors
+
+    selectors = site_selectors('detail')
+    doc = parse_html(html)
+
+    descricao = ''
+    elem = next(iter(select_cards(doc, selectors['description'], limit=1)), None)
+    if elem is not None:
+        descricao = elem.text(separator=' ', strip=True)
+    if not descricao:
+        meta = doc.css_first(selectors['meta_description'])
+        descricao = (meta.attr('content', '') if meta else '').strip()
+
+    caracteristicas = []
+    for elem in select_cards(doc, selectors['features'], limit=50):
+        texto = elem.text(separator=' ', strip=True)
+        if texto and len(texto) < 120 and texto not in caracteristicas:
+            caracteristicas.append(texto)
+
+    fotos = [m.attr('content') for m in doc.css(selectors['photos']) if m.attr('content')]
+    for img in select_cards(doc, selectors['gallery'], limit=30):
+        src = img.attr('data-src') or img.attr('src')
+        if src and src.startswith('http') and src not in fotos:
+            fotos.append(src)
+
+    publicado = None
+    meta = doc.css_first(selectors['published'])
+    if meta is not None:
+        publicado = _parse_date(meta.attr('content', ''))
+    if publicado is None:
+        match = DATA_JSONLD_RE.search(html)
+        publicado = _parse_date(match.group(1)) if match else None
+
+    historico = []
+    for elem in select_cards(doc, selectors['price_history'], limit=30):
+        texto = elem.text(separator=' ', strip=True)
+        # Sem a data: "2024-05-01 280.000 €" daria 1280000
+        preco = extract_price(DATA_PT_RE.sub(' ', DATA_ISO_RE.sub(' ', texto)))
+        if preco:
+            historico.append({'date': _parse_date(texto), 'price': preco})
+
+    if not (descricao or caracteristicas or fotos or publicado or historico):
+        return []
+
+    return [{
+        'description': descricao[:5000],
+        'features': caracteristicas,
+        'photos': fotos[:30],
+        'published_at': publicado,
+        'price_history': historico,
+    }]
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Site registry - Lisboa Real Estate AI
+Saúde e rendimento de cada site, persistidos em SQLite (tabela site_health)
+
+Por site (host): taxa de sucesso e latência mediana nas últimas
+tentativas, imóveis por página, total de imóveis, último erro e a técnica
+que funcionou (http, browser ou api). Substitui as listas sites_ok /
+sites_falhados em memória e o registo à mão em docs/scraping_memoria.md.
+
+Quem escreve: o fetcher (cada página), o fan-out (cada pesquisa) e o
+master_scraper (cada site). Quem lê: o fan-out e a fila de jobs (ordem e
+páginas por site) e o fetcher (timeout por site). A capacidade de crawl vai
+para os sites que de facto produzem imóveis.
+
+Uso:
+    python site_registry.py                  # tabela dos sites
+"""
+
+import sys
+import logging
+from statistics import median
+from typing import Callable, Dict, Iterable, List, Optional, TypeVar
+
+from fixtures import replaying
+
+logger = logging.getLogger(__name__)
+
+TECH_HTTP = 'http'
+TECH_BROWSER = 'browser'
+TECH_API = 'api'
+
+# Tentativas/páginas consideradas nas taxas (as mais antigas saem da janela)
+WINDOW = 20
+# Mínimo de amostras para confiar nas estatísticas de um site
+MIN_SAMPLES = 3
+# Imóveis por página assumidos para um site ainda sem histórico
+PRIOR_LISTINGS = 5
+
+T = TypeVar('T')
+
+
+class SiteRegistry:
+    """
+    Registo de saúde e rendimento por site
+
+    Args:
+        db: PropertyDatabase (tabela site_health); criada se omitida
+        window: Tamanho das janelas de tentativas e de rendimento
+    """
+
+    def __init__(self, db=None, window: int = WINDOW):
+        self.db = db
+        self.window = window
+        self._own_db = db is None
+
+    def close(self):
+        """Fecha a base de dados, se foi criada aqui"""
+        if self._own_db and self.db is not None:
+            self.db.close()
+            self.db = None
+
+    def _get_db(self):
+        if self.db is None:
+            from database import PropertyDatabase
+            self.db = PropertyDatabase()
+        return self.db
+
+    def get(self, site: str) -> Optional[Dict]:
+        return self._get_db().get_site_health(site)
+
+    # ------------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------------
+
+    def record(self, site: str, ok: bool, latency_s: Optional[float] = None,
+               technique: Optional[str] = None, error: Optional[str] = None,
+               listings: Optional[int] = None):
+        """
+        Regista uma tentativa (página ou pesquisa) num site
+
+        Args:
+            site: Host
+            ok: A tentativa produziu conteúdo válido
+            latency_s: Duração (None se não for comparável, ex.: pesquisa de várias páginas)
+            technique: http, browser ou api (guardada quando ok)
+            error: Motivo da falha
+            listings: Imóveis obtidos (None se ainda não se sabe; ver record_listings)
+        """
+        if replaying():
+            # Fixtures locais não dizem nada sobre o site real
+            return
+        health = self.get(site) or {}
+        recent = (health.get('recent') or [])[-(self.window - 1):]
+        recent.append([bool(ok), round(latency_s * 1000, 1) if latency_s is not None else None])
+
+        updated = self._summary(health, recent, health.get('recent_yields') or [])
+        updated.update(
+            attempts=(health.get('attempts') or 0) + 1,
+            successes=(health.get('successes') or 0) + int(bool(ok)),
+            technique=technique if ok and technique else health.get('technique'),
+            last_error=None if ok else (error or health.get('last_error')),
+            last_success=ok,
+            last_attempt=True,
+        )
+        self._get_db().save_site_health(site, updated)
+
+        if listings is not None:
+            self.record_listings(site, listings)
+
+    def record_listings(self, site: str, listings: int):
+        """Regista os imóveis extraídos de uma página/pesquisa do site"""
+        if replaying():
+            return
+        health = self.get(site) or {}
+        yields = (health.get('recent_yields') or [])[-(self.window - 1):]
+        yields.append(int(listings))
+
+        updated = self._summary(health, health.get('recent') or [], yields)
+        updated.update(
+            attempts=health.get('attempts') or 0,
+            successes=health.get('successes') or 0,
+            technique=health.get('technique'),
+            last_error=health.get('last_error'),
+            listings_total=(health.get('listings_total') or 0) + int(listings),
+        )
+        self._get_db().save_site_health(site, updated)
+
+    @staticmethod
+    def _summary(health: Dict, recent: List, yields: List[int]) -> Dict:
+        latencies = [ms for _, ms in recent if ms is not None]
+        return {
+            'recent': recent,
+            'recent_yields': yields,
+            'success_rate': round(sum(ok for ok, _ in recent) / len(recent), 3) if recent else None,
+            'median_latency_ms': median(latencies) if latencies else None,
+            'listings_per_page': round(sum(yields) / len(yields), 2) if yields else None,
+            'listings_total': health.get('listings_total') or 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Leitura (decisões de crawl)
+    # ------------------------------------------------------------------
+
+    def yield_score(self, site: str) -> float:
+        """
+        Imóveis esperados por tentativa: taxa de sucesso × imóveis por página
+
+        Suavizado para sites com pouco histórico: um site novo fica a meio
+        da tabela (é explorado) e um site que nunca rende desce aos poucos.
+        """
+        health = self.get(site) or {}
+        recent = health.get('recent') or []
+        yields = health.get('recent_yields') or []
+        success = (sum(ok for ok, _ in recent) + 1) / (len(recent) + 2)
+        per_page = (sum(yields) + PRIOR_LISTINGS) / (len(yields) + 1)
+        return success * per_page
+
+    def order(self, items: Iterable[T], site_of: Callable[[T], str] = lambda s: s) -> List[T]:
+        """Itens ordenados pelo rendimento do site (maior primeiro; estável nos empates)"""
+        items = list(items)
+        scores = {site: self.yield_score(site) for site in {site_of(item) for item in items}}
+        return sorted(items, key=lambda item: -scores[site_of(item)])
+
+    def page_budget(self, site: str, max_pages: int) -> int:
+        """
+        Páginas a pedir ao site nesta execução
+
+        - Sem histórico suficiente: max_pages
+        - Nunca rendeu imóveis nas últimas páginas: 1 (só para voltar a testar)
+        - Falha mais de metade das vezes: metade
+        """
+        health = self.get(site)
+        if not health or len(health['recent']) + len(health['recent_yields']) < MIN_SAMPLES:
+            return max_pages
+        if len(health['recent_yields']) >= MIN_SAMPLES and not any(health['recent_yields']):
+            return 1
+        if health['success_rate'] is not None and health['success_rate'] < 0.5:
+            return max(1, max_pages // 2)
+        return max_pages
+
+    def timeout_for(self, site: str, default_s: float, min_s: float = 5.0) -> float:
+        """Timeout do pedido: 4× a latência mediana do site, entre min_s e default_s"""
+        health = self.get(site)
+        if not health or not health['median_latency_ms'] \
+                or sum(ms is not None for _, ms in health['recent']) < MIN_SAMPLES:
+            return default_s
+        return max(min_s, min(default_s, 4 * health['median_latency_ms'] / 1000))
+
+    def report(self) -> List[Dict]:
+        """Todos os sites com as estatísticas principais"""
+        return [
+            {
+                'site': h['site'],
+                'technique': h['technique'],
+                'success_rate': h['success_rate'],
+                'median_latency_ms': h['median_latency_ms'],
+                'listings_per_page': h['listings_per_page'],
+                'listings_total': h['listings_total'],
+                'yield_score': round(self.yield_score(h['site']), 2),
+                'last_error': h['last_error'],
+                'last_success': h['last_success'],
+            }
+            for h in self._get_db().get_all_site_health()
+        ]
+
+
+def main():
+    """Tabela de saúde/rendimento dos sites"""
+    registry = SiteRegistry()
+    try:
+        rows = registry.report()
+    finally:
+        registry.close()
+
+    if not rows:
+        print("Sem sites registados (corra um scraping primeiro)")
+        return 0
+
+    print(f"{'site':<32} {'técnica':<8} {'sucesso':>8} {'latência':>9} {'im./pág':>8} {'total':>7}")
+    for r in rows:
+        rate = f"{r['success_rate']:.0%}" if r['success_rate'] is not None else '-'
+        latency = f"{r['median_latency_ms']:.0f}ms" if r['median_latency_ms'] else '-'
+        per_page = f"{r['listings_per_page']:.1f}" if r['listings_per_page'] is not None else '-'
+        print(f"{r['site']:<32} {r['technique'] or '-':<8} {rate:>8} {latency:>9} "
+              f"{per_page:>8} {r['listings_total']:>7}")
+        if r['last_error'] and r['success_rate'] is not None and r['success_rate'] < 1:
+            print(f"{'':<32} ↳ {r['last_error'][:70]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
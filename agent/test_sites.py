@@ -1,6 +1,7 @@
-import aiohttp
 import asyncio
 
+from http_client import get_http_session, close_http_session
+
 sites = [
     'https://www.leilosoc.com/',
     'https://www.e-leiloes.pt/',
@@ -14,15 +15,19 @@ sites = [
 ]
 
 async def test(url):
+    import aiohttp
+    
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, timeout=10) as resp:
-                return url, resp.status
+        async with get_http_session().get(url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+            return url, resp.status
     except Exception as e:
         return url, str(e)[:50]
 
 async def main():
-    results = await asyncio.gather(*[test(u) for u in sites])
+    try:
+        results = await asyncio.gather(*[test(u) for u in sites])
+    finally:
+        await close_http_session()
     print('='*60)
     print('RESULTADOS DOS 9 SITES:')
     print('='*60)